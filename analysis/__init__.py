@@ -1,2 +1,19 @@
-from .summary import analyze_fairness_amr
-from .centrality_score import top_k_fairness_graphs
+# The entry points are resolved on first access so that importing one
+# submodule (e.g. analysis.summary) does not load pandas/numpy for the others.
+_EXPORTS = {
+    "analyze_fairness_amr": ".summary",
+    "top_k_fairness_graphs": ".centrality_score",
+    "analyze_all": ".combined",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
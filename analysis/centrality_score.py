@@ -1,12 +1,15 @@
-import penman
-from penman.models.noop import NoOpModel
-import re
-import pandas as pd
-import numpy as np
-from collections import defaultdict, deque
-from pathlib import Path
+import contextlib
+import heapq
+from collections import defaultdict
+from functools import lru_cache, partial
+from itertools import chain
 
-FAIRNESS_REGEX = re.compile(r"Fairness|fairness|fair-[0-9]+", re.IGNORECASE)
+from corpus import chunked, iter_amr_blocks, ordered_pool_map, profiling
+from corpus.cache import GraphCache, load_graph_cache
+from corpus.concepts import FAIRNESS_NODE_MATCHER
+from corpus.decode import decode_noop
+from .graph_index import GraphIndex
+from .output import TableWriter, score_columns, top_k_frame
 
 ROLE_WEIGHTS = defaultdict(
     lambda: 0.4,
@@ -22,90 +25,82 @@ ROLE_WEIGHTS = defaultdict(
 )
 
 
-def read_amr_blocks(filepath):
-    """Parse AMR blocks starting at '('."""
-    blocks, current = [], []
-    with open(filepath, "r", encoding="utf-8") as f:
-        for line in f:
-            s = line.strip()
-            if not s or s.startswith("#"):
-                continue
-            if s.startswith("(") and current:
-                blocks.append("\n".join(current))
-                current = []
-            current.append(s)
-    if current:
-        blocks.append("\n".join(current))
-    return blocks
-
-
-def build_graph_dict(triples):
-    adj = defaultdict(list)
-    rev = defaultdict(list)
-    for src, role, tgt in triples:
-        adj[src].append((role, tgt))
-        rev[tgt].append((role, src))
-    return adj, rev
-
-
-def find_fairness_nodes(triples):
-    fairness_nodes = set()
-    for src, role, tgt in triples:
-        if isinstance(tgt, str) and FAIRNESS_REGEX.search(tgt):
-            fairness_nodes.add(src)
-    return fairness_nodes
-
-
-def shortest_distances_from_root(adj, root):
-    """Compute shortest BFS distances from root to all reachable nodes."""
-    dist = {root: 0}
-    queue = deque([root])
-    while queue:
-        node = queue.popleft()
-        for _, tgt in adj[node]:
-            if tgt == node or tgt in dist:
-                continue
-            dist[tgt] = dist[node] + 1
-            queue.append(tgt)
-    return dist
-
-
-def get_incoming_roles(rev):
-    return {node: [r for r, _ in lst] for node, lst in rev.items()}
-
-
-def fairness_score_for_graph(amr_str, graph_id):
+def fairness_score_for_graph(amr_str, graph_id, block_id=None, scores=None):
     """
     Compute a fairness centrality score for a single AMR graph.
-    Returns (graph_id, score, fairness_node_count, amr_str).
+    Returns (graph_id, score, fairness_node_count, amr_str); with a ScoreSet
+    (see analysis.scoring), the tuple of its scores is appended.
     """
+    with profiling.block(graph_id, block_id):
+        g = _decode_for_scoring(amr_str, graph_id)
+        if g is None:
+            return _unscored(graph_id, amr_str, scores)
+        return score_decoded_graph(g, graph_id, amr_str, scores)
+
+
+def _unscored(graph_id, amr_str, scores=None):
+    if scores is not None:
+        return scores.unscored(graph_id, amr_str)
+    return (graph_id, 0.0, 0, amr_str)
+
+
+def _decode_for_scoring(amr_str, graph_id):
+    """NoOp-decoded graph, or None if it cannot have fairness nodes or fails."""
+    with profiling.stage("precheck"):
+        may_match = FAIRNESS_NODE_MATCHER.may_occur_in(amr_str)
+    if not may_match:
+        profiling.count("blocks_skipped_by_precheck")
+        return None
     try:
-        g = penman.decode(amr_str, model=NoOpModel())
+        with profiling.stage("decode"):
+            return decode_noop(amr_str)
     except Exception as e:
+        profiling.count("decode_failures")
         print(f"[Graph {graph_id}] Decode error: {e}")
-        return (graph_id, 0.0, 0, amr_str)
+        return None
+
+
+def score_decoded_graph(g, graph_id, amr_str=None, scores=None):
+    """
+    Score an already decoded graph (anything with `top` and NoOp `triples`).
+    Returns (graph_id, score, fairness_node_count, amr_str).
+    """
+    return score_graph_index(GraphIndex.from_graph(g), graph_id, amr_str, scores)
 
-    adj, rev = build_graph_dict(g.triples)
-    inst_map = {src: tgt for src, role, tgt in g.triples if role == ":instance"}
-    fairness_nodes = find_fairness_nodes(g.triples)
+
+def score_graph_index(index, graph_id, amr_str=None, scores=None):
+    """
+    Score a graph from its GraphIndex, reusing its adjacency and instance maps.
+    Returns (graph_id, score, fairness_node_count, amr_str), or with a
+    ScoreSet its ScoreSet.score_graph tuple.
+    """
+    with profiling.stage("score"):
+        if scores is not None:
+            return scores.score_graph(index, graph_id, amr_str)
+        return _score_graph_index(index, graph_id, amr_str)
+
+
+def _score_graph_index(index, graph_id, amr_str):
+    fairness_nodes = index.sources_of(FAIRNESS_NODE_MATCHER)
     if not fairness_nodes:
         return (graph_id, 0.0, 0, amr_str)
 
-    distances = shortest_distances_from_root(adj, g.top)
-    incoming_roles = get_incoming_roles(rev)
+    top = index.top
+    edges = index.edges
+    distances = index.distances_from(top)
 
     node_scores = []
     for fn in fairness_nodes:
-        dist = distances.get(fn)
-        if dist is None:
+        dist = distances[fn]
+        if dist < 0:
             continue
-        roles = incoming_roles.get(fn, [])
+        roles = edges.incoming_roles(fn)
         weight = max(
             [ROLE_WEIGHTS[r] for r in roles],
-            default=1.0 if inst_map.get(g.top) else 0.4,
+            default=1.0 if index.concept(top) else 0.4,
         )
 
-        if fn == g.top:
+        if fn == top:
             weight, dist = 1.0, 0
 
         node_scores.append(weight * (1 / (1 + dist)))
@@ -113,21 +108,322 @@ def fairness_score_for_graph(amr_str, graph_id):
     if not node_scores:
         return (graph_id, 0.0, len(fairness_nodes), amr_str)
 
-    max_score = np.max(node_scores)
+    max_score = max(node_scores)
 
     return (graph_id, max_score, len(fairness_nodes), amr_str)
 
 
-def top_k_fairness_graphs(filepath, k=5):
-    blocks = read_amr_blocks(filepath)
-    scored_graphs = [
-        fairness_score_for_graph(block, i) for i, block in enumerate(blocks)
+def iter_fairness_scores(filepath, scores=None):
+    """Lazily score every graph of an AMR file, in file order."""
+    blocks = profiling.timed_iter(iter_amr_blocks(filepath), "read")
+    for i, block in enumerate(blocks):
+        yield fairness_score_for_graph(block.amr, i, block.metadata.get("id"), scores)
+
+
+def _rank_key(scored):
+    # Higher score first, then file order (lower gid) on ties.
+    return scored[1], -scored[0]
+
+
+def select_top_k(scored_graphs, k):
+    """
+    Keep the k best (gid, score, fairness_nodes, amr) tuples in a bounded heap.
+    Same result as a stable descending sort on score sliced to k: ties keep
+    file order, and only the retained graphs keep their AMR text alive.
+    """
+    return heapq.nlargest(k, scored_graphs, key=_rank_key)
+
+
+def score_chunk_batched(chunk):
+    """
+    Score (gid, amr_str) pairs with the vectorized engine: decode them one by
+    one, then score all decoded graphs in one batch. Same tuples, in the same
+    order, as fairness_score_for_graph.
+    """
+    from .batch_centrality import score_graph_batch
+
+    decoded = []
+    for gid, amr_str in chunk:
+        g = _decode_for_scoring(amr_str, gid)
+        if g is not None:
+            decoded.append((gid, g))
+
+    with profiling.stage("score"):
+        scores, counts = score_graph_batch([g for _, g in decoded])
+    results = {
+        gid: (scores[j], int(counts[j])) for j, (gid, _) in enumerate(decoded)
+    }
+    return [
+        (gid, *results.get(gid, (0.0, 0)), amr_str) for gid, amr_str in chunk
     ]
-    scored_graphs.sort(key=lambda x: x[1], reverse=True)
-    top_graphs = scored_graphs[:k]
 
-    print(f"Top {k} graphs by fairness centrality:\n")
 
-    df = pd.DataFrame(top_graphs, columns=["gid", "score", "fairness_nodes", "amr"])
+def iter_fairness_scores_batched(filepath, batch_size=256):
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    blocks = profiling.timed_iter(iter_amr_blocks(filepath), "read")
+    numbered = ((i, block.amr) for i, block in enumerate(blocks))
+    for chunk in chunked(numbered, batch_size):
+        yield from score_chunk_batched(chunk)
+
+
+def score_row(scored):
+    """
+    (gid, score, fairness_nodes) row of analysis.output.SCORE_COLUMNS, or
+    (gid, *scores, fairness_nodes) for a tuple scored by a ScoreSet.
+    """
+    gid, score, n_fair, _, *variants = scored
+    if variants:
+        return (gid, *map(float, variants[0]), int(n_fair))
+    return gid, float(score), int(n_fair)
+
+
+def _recorded(scored_graphs, writer):
+    """Pass scored tuples through, writing each one's row to writer if any."""
+    for scored in scored_graphs:
+        if writer is not None:
+            writer.write(score_row(scored))
+        yield scored
+
+
+def _partial_top_k(scored_graphs, k, keep_rows):
+    """Top-k of a chunk, plus the rows of all its graphs when keep_rows."""
+    if not keep_rows:
+        return select_top_k(scored_graphs, k), None
+    scored_graphs = list(scored_graphs)
+    return select_top_k(scored_graphs, k), [score_row(s) for s in scored_graphs]
+
+
+def _merge_partials(partials, writer):
+    for top, rows in partials:
+        if writer is not None:
+            writer.write_rows(rows)
+        yield from top
+
+
+def _top_k_of_chunk(chunk, k, engine="graph", keep_rows=False, scores=None):
+    if engine == "batch":
+        scored = score_chunk_batched(chunk)
+    else:
+        scored = (
+            fairness_score_for_graph(amr, i, scores=scores) for i, amr in chunk
+        )
+    return _partial_top_k(scored, k, keep_rows)
+
+
+# OffsetIndex of the file a parallel_top_k worker scores: opened once by the
+# pool initializer, closed when the worker process exits.
+_worker_offsets = None
+
+
+def _open_worker_offsets(amr_path):
+    from multiprocessing.util import Finalize
+
+    from corpus.offsets import OffsetIndex
+
+    global _worker_offsets
+    _worker_offsets = OffsetIndex(amr_path)
+    Finalize(_worker_offsets, _worker_offsets.close, exitpriority=0)
+
+
+def _top_k_of_indexed_range(bounds, k, engine="graph", keep_rows=False, scores=None):
+    """_top_k_of_chunk of the blocks [start, stop), read by the worker itself."""
+    with profiling.stage("read"):
+        blocks = _worker_offsets.blocks(*bounds)
+        chunk = [(gid, block.amr) for gid, block in blocks]
+    return _top_k_of_chunk(chunk, k, engine, keep_rows, scores)
+
+
+def parallel_top_k(
+    filepath, k, workers, chunksize=256, engine="graph", writer=None, scores=None
+):
+    """
+    Score graphs on a process pool, keeping a top-k per chunk, then merge the
+    partial results. Gives the same ranking as the serial path. With a
+    writer, workers also send back the score rows of every graph. When the
+    file has an up-to-date offset index (corpus.offsets), workers are sent
+    gid ranges and read their blocks themselves instead of the text.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from corpus.offsets import open_offset_index
+
+    keep_rows = writer is not None
+    pool_options = {}
+    index = open_offset_index(filepath)
+    if index is not None:
+        with index:
+            n = len(index)
+        pool_options = {
+            "initializer": _open_worker_offsets,
+            "initargs": (str(filepath),),
+        }
+        task = partial(
+            _top_k_of_indexed_range,
+            k=k,
+            engine=engine,
+            keep_rows=keep_rows,
+            scores=scores,
+        )
+        chunks = ((i, min(i + chunksize, n)) for i in range(0, n, chunksize))
+    else:
+        blocks = profiling.timed_iter(iter_amr_blocks(filepath), "read")
+        numbered = ((i, block.amr) for i, block in enumerate(blocks))
+        task = partial(
+            _top_k_of_chunk, k=k, engine=engine, keep_rows=keep_rows, scores=scores
+        )
+        chunks = chunked(numbered, chunksize)
+
+    with ProcessPoolExecutor(max_workers=workers, **pool_options) as pool:
+        partials = ordered_pool_map(pool, task, chunks, window=2 * workers)
+        return select_top_k(_merge_partials(partials, writer), k)
+
+
+def _score_cached(cache, i, scores=None):
+    error = cache.error(i)
+    if error is not None:
+        profiling.count("decode_failures")
+        print(f"[Graph {i}] Decode error: {error}")
+        return _unscored(i, None, scores)
+    with profiling.block(i):
+        with profiling.stage("cache"):
+            g = cache.graph(i)
+        return score_graph_index(GraphIndex.from_graph(g), i, scores=scores)
+
+
+def score_cached_range_batched(cache, start, stop, flags):
+    """Vectorized scores of cached graphs [start, stop), straight from the arrays."""
+    from .batch_centrality import score_cache_range
+
+    for i in range(start, stop):
+        error = cache.error(i)
+        if error is not None:
+            profiling.count("decode_failures")
+            print(f"[Graph {i}] Decode error: {error}")
+    with profiling.stage("score"):
+        scores, counts = score_cache_range(cache, start, stop, flags)
+    return [
+        (i, scores[i - start], int(counts[i - start]), None) for i in range(start, stop)
+    ]
+
+
+@lru_cache(maxsize=4)
+def _open_cache(cache_dir):
+    return GraphCache(cache_dir)
+
+
+@lru_cache(maxsize=4)
+def _cache_flags(cache_dir):
+    from .batch_centrality import VocabFlags
+
+    return VocabFlags(_open_cache(cache_dir).strings)
+
+
+def _top_k_of_cached_range(
+    bounds, cache_dir, k, engine="graph", keep_rows=False, scores=None
+):
+    cache = _open_cache(cache_dir)
+    if engine == "batch":
+        scored = score_cached_range_batched(cache, *bounds, _cache_flags(cache_dir))
+    else:
+        scored = (_score_cached(cache, i, scores) for i in range(*bounds))
+    return _partial_top_k(scored, k, keep_rows)
+
+
+def cached_top_k(
+    cache, k, workers=1, chunksize=256, engine="graph", writer=None, scores=None
+):
+    """
+    Top-k over a graph cache without calling penman. The AMR text is read
+    back from the cache only for the returned graphs.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+    n = len(cache)
+    ranges = ((i, min(i + chunksize, n)) for i in range(0, n, chunksize))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = ordered_pool_map(
+                pool,
+                partial(
+                    _top_k_of_cached_range,
+                    cache_dir=str(cache.cache_dir),
+                    k=k,
+                    engine=engine,
+                    keep_rows=writer is not None,
+                    scores=scores,
+                ),
+                ranges,
+                window=2 * workers,
+            )
+            top_graphs = select_top_k(_merge_partials(partials, writer), k)
+    elif engine == "batch":
+        from .batch_centrality import VocabFlags
+
+        flags = VocabFlags(cache.strings)
+        scored = chain.from_iterable(
+            score_cached_range_batched(cache, start, stop, flags)
+            for start, stop in ranges
+        )
+        top_graphs = select_top_k(_recorded(scored, writer), k)
+    else:
+        scored = (_score_cached(cache, i, scores) for i in range(n))
+        top_graphs = select_top_k(_recorded(scored, writer), k)
+    return [
+        (gid, score, n_fair, cache.text(gid), *variants)
+        for gid, score, n_fair, _, *variants in top_graphs
+    ]
+
+
+def top_k_fairness_graphs(
+    filepath,
+    k=5,
+    workers=1,
+    chunksize=256,
+    use_cache=True,
+    engine="graph",
+    output=None,
+    scores=None,
+):
+    """
+    engine="graph" scores graphs one at a time; engine="batch" scores chunks
+    of `chunksize` graphs with the vectorized CSR engine (same results).
+    With `output`, the score of every graph (not only the top k) is streamed
+    to that file (see analysis.output.SCORE_COLUMNS), keyed by graph id.
+    With a ScoreSet (analysis.scoring), graphs get one column per score of
+    the set instead of `score`, and are ranked by the first one. Raises
+    ValueError if workers or chunksize is below 1.
+    """
+    if workers < 1 or chunksize < 1:
+        raise ValueError("workers and chunksize must be at least 1")
+    if scores is not None and engine == "batch":
+        raise ValueError("the batch engine only computes the default score")
+    names = None if scores is None else scores.names
+    cache = load_graph_cache(filepath) if use_cache else None
+    with contextlib.ExitStack() as stack:
+        writer = (
+            stack.enter_context(TableWriter(output, score_columns(names)))
+            if output
+            else None
+        )
+        if cache is not None:
+            top_graphs = cached_top_k(
+                cache, k, workers, chunksize, engine, writer, scores
+            )
+        elif workers > 1:
+            top_graphs = parallel_top_k(
+                filepath, k, workers, chunksize, engine, writer, scores
+            )
+        elif engine == "batch":
+            scored = iter_fairness_scores_batched(filepath, chunksize)
+            top_graphs = select_top_k(_recorded(scored, writer), k)
+        else:
+            scored = iter_fairness_scores(filepath, scores)
+            top_graphs = select_top_k(_recorded(scored, writer), k)
+
+    if writer is not None:
+        print(f"Wrote {writer.rows_written} graph scores to {output}\n")
+    print(f"Top {k} graphs by fairness centrality:\n")
 
-    return df
+    return top_k_frame(top_graphs, names)
@@ -0,0 +1,46 @@
+from corpus import profiling
+from corpus.cache import load_graph_cache
+from corpus.concepts import FAIRNESS_CONCEPTS, FAIRNESS_NODE_MATCHER
+from .centrality_score import score_graph_index, select_top_k
+from .graph_index import iter_graph_records
+from .output import top_k_frame
+from .summary import FairnessSummary
+
+
+def analyze_all(filepath, k=10, max_items=20, use_cache=True):
+    """
+    Run the summary and the centrality ranking in a single pass: every graph
+    is decoded once and its GraphIndex feeds both. Prints the summary report
+    and returns the top-k DataFrame of `top_k_fairness_graphs`.
+    """
+    cache = load_graph_cache(filepath) if use_cache else None
+    summary = FairnessSummary()
+
+    def scored_graphs():
+        records = iter_graph_records(
+            filepath, cache, prefilter=(FAIRNESS_CONCEPTS, FAIRNESS_NODE_MATCHER)
+        )
+        for record in records:
+            if record.index is None:
+                if record.error is not None:
+                    print(f"[Graph {record.gid}] Decode error: {record.error}")
+                yield (record.gid, 0.0, 0, record.amr)
+                continue
+            with profiling.stage("summarize"):
+                summary.add(record.index)
+            yield score_graph_index(record.index, record.gid, record.amr)
+
+    top_graphs = select_top_k(scored_graphs(), k)
+    if cache is not None:
+        top_graphs = [
+            (gid, score, n_fair, cache.text(gid))
+            for gid, score, n_fair, _ in top_graphs
+        ]
+
+    with profiling.stage("format"):
+        summary.print_report(max_items)
+    print("\nAnalysis completed.\n")
+
+    print(f"Top {k} graphs by fairness centrality:\n")
+
+    return top_k_frame(top_graphs)
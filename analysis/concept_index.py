@@ -0,0 +1,200 @@
+"""
+Persistent inverted index of an AMR corpus, for ad-hoc questions such as
+"which graphs have fairness under an :ARG1 of require-01?".
+
+`build_concept_index` decodes the corpus once (or reads its `.gcache`) and
+writes `<input_file>.cindex.sqlite` with three tables:
+
+- concepts:  concept -> (gid, var)
+- edges:     (gid, parent_var, parent_concept, role, child_var, child_concept),
+             the de-inverted relations the fairness summary walks; for a
+             constant child, child_concept is the constant itself
+- fairness:  (gid, var, concept, position) of every fairness occurrence
+
+`query_concept_index` answers concept/role/parent-child patterns from it
+with indexed SQL lookups, without decoding anything.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+
+from corpus import profiling
+from corpus.cache import load_graph_cache
+
+INDEX_SUFFIX = ".cindex.sqlite"
+INDEX_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE concepts (concept TEXT, gid INTEGER, var TEXT);
+CREATE TABLE edges (
+    gid INTEGER, parent_var TEXT, parent_concept TEXT, role TEXT,
+    child_var TEXT, child_concept TEXT
+);
+CREATE TABLE fairness (gid INTEGER, var TEXT, concept TEXT, position TEXT);
+"""
+
+INDEXES = """
+CREATE INDEX concepts_concept ON concepts (concept);
+CREATE INDEX edges_role ON edges (role);
+CREATE INDEX edges_parent ON edges (parent_concept);
+CREATE INDEX edges_child ON edges (child_concept);
+CREATE INDEX fairness_concept ON fairness (concept);
+"""
+
+
+def index_path_for(path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return f"{INDEX_VERSION}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def _graph_rows(index, gid, contexts):
+    labels, concept = index.labels, index.concept
+    concepts = [(concept(v), gid, labels[v]) for v in index.variables]
+    summary_edges = index.summary_edges
+    edges = [
+        (gid, labels[s], concept(s, labels[s]), role, labels[t], concept(t, labels[t]))
+        for s in dict.fromkeys(summary_edges.sources)
+        for role, t in summary_edges.outgoing(s)
+    ]
+    fairness = [
+        (gid, c.var, c.concept, c.position)
+        for c in contexts
+        if c.relation == "self"
+    ]
+    return concepts, edges, fairness
+
+
+def _insert(conn, pending):
+    conn.executemany("INSERT INTO concepts VALUES (?, ?, ?)", pending[0])
+    conn.executemany("INSERT INTO edges VALUES (?, ?, ?, ?, ?, ?)", pending[1])
+    conn.executemany("INSERT INTO fairness VALUES (?, ?, ?, ?)", pending[2])
+    for rows in pending:
+        rows.clear()
+
+
+def build_concept_index(amr_path, use_cache=True, batch_size=5000) -> Path:
+    """Write the inverted index of amr_path next to it and return its path."""
+    # Imported here so that `query` does not load penman.
+    from .graph_index import iter_graph_records
+    from .summary import fairness_contexts
+
+    path = index_path_for(amr_path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    if tmp.exists():
+        tmp.unlink()
+
+    cache = load_graph_cache(amr_path) if use_cache else None
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(SCHEMA)
+        pending = ([], [], [])
+
+        def flush():
+            with profiling.stage("insert"):
+                _insert(conn, pending)
+
+        n_graphs = 0
+        for record in iter_graph_records(amr_path, cache, errors="ignore"):
+            n_graphs += 1
+            if record.index is None:
+                print(f"[Graph {record.gid}] Decode error: {record.error}")
+                continue
+            with profiling.stage("index"):
+                new_rows = _graph_rows(
+                    record.index, record.gid, fairness_contexts(record.index)
+                )
+            for rows, new in zip(pending, new_rows):
+                rows.extend(new)
+            if len(pending[1]) >= batch_size:
+                flush()
+        flush()
+
+        with profiling.stage("insert"):
+            conn.executescript(INDEXES)
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("source", _source_stamp(amr_path)), ("n_graphs", str(n_graphs))],
+        )
+        conn.commit()
+    except BaseException:
+        conn.close()
+        tmp.unlink()
+        raise
+    conn.close()
+    os.replace(tmp, path)
+    return path
+
+
+def open_concept_index(amr_path):
+    """sqlite connection to the index of amr_path, or None if missing or stale."""
+    path = index_path_for(amr_path)
+    if not path.exists():
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+    try:
+        fresh = row is not None and row[0] == _source_stamp(amr_path)
+    except OSError:
+        fresh = False
+    if not fresh:
+        conn.close()
+        return None
+    return conn
+
+
+def _role(role):
+    return role if role.startswith(":") else ":" + role
+
+
+def query_concept_index(
+    conn, concept=None, parent=None, role=None, child=None, position=None, limit=20
+):
+    """
+    Run one pattern query; values are exact or shell-style globs ("fair*").
+
+    - parent/role/child: edges matching all given parts
+    - position:          fairness occurrences at that position ("root",
+                         "interior", "leaf"), optionally of `concept`
+    - concept alone:     every variable with that concept
+
+    Returns (n_matches, n_graphs, DataFrame of the first `limit` matches).
+    """
+    if parent or role or child:
+        if concept or position:
+            raise ValueError("concept/position cannot be combined with parent/role/child")
+        table = "edges"
+        columns = ["gid", "parent_var", "parent_concept", "role", "child_var", "child_concept"]
+        where = [("parent_concept", parent), ("role", role and _role(role)), ("child_concept", child)]
+    elif position:
+        table = "fairness"
+        columns = ["gid", "var", "concept", "position"]
+        where = [("concept", concept), ("position", position)]
+    elif concept:
+        table = "concepts"
+        columns = ["gid", "var", "concept"]
+        where = [("concept", concept)]
+    else:
+        raise ValueError("Give at least one of concept, parent, role, child or position")
+
+    where = [(column, value) for column, value in where if value]
+    clause = " AND ".join(f"{column} GLOB ?" for column, _ in where)
+    params = [value for _, value in where]
+
+    n_matches, n_graphs = conn.execute(
+        f"SELECT COUNT(*), COUNT(DISTINCT gid) FROM {table} WHERE {clause}", params
+    ).fetchone()
+    rows = conn.execute(
+        f"SELECT {', '.join(columns)} FROM {table} WHERE {clause}"
+        " ORDER BY gid, rowid LIMIT ?",
+        params + [limit],
+    ).fetchall()
+    import pandas as pd
+
+    return n_matches, n_graphs, pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,223 @@
+from array import array
+from sys import intern
+from typing import NamedTuple, Optional
+
+from corpus import iter_amr_blocks, profiling
+from corpus.concepts import FAIRNESS_CONCEPTS
+from corpus.decode import decode_noop
+
+
+class EdgeLists:
+    """
+    Edges of a graph over integer node ids: edge e is (sources[e], roles[e],
+    targets[e]), in triple order. `out[i]` and `inc[i]` are the numbers of the
+    edges leaving and entering node i, in triple order; they are filled in
+    the same pass that lists the edges, so nothing is sorted or regrouped.
+    """
+
+    __slots__ = ("sources", "roles", "targets", "out", "inc")
+
+    def __init__(self, sources, roles, targets, out, inc):
+        self.sources = sources
+        self.roles = roles
+        self.targets = targets
+        self.out = out
+        self.inc = inc
+
+    def outgoing(self, node):
+        """[(role, target)] of node, in triple order."""
+        roles, targets = self.roles, self.targets
+        return [(roles[e], targets[e]) for e in self.out[node]]
+
+    def incoming_roles(self, node):
+        roles = self.roles
+        return [roles[e] for e in self.inc[node]]
+
+
+class GraphIndex:
+    """
+    Compact form of one decoded AMR graph, built once after decoding and
+    shared by the summary counters, the centrality scorer and the concept
+    index.
+
+    Every distinct node label (variable, concept or constant) gets an integer
+    id; `labels[i]` is the label of node i. Labels and roles are interned, so
+    graphs held together share their strings. `edges` holds the NoOp triples
+    (as decoded with NoOpModel) as-is, including `:instance` edges, for the
+    centrality scorer; it is grouped in the same pass that numbers the nodes.
+    `summary_edges`, built on first use, holds the default-model de-inverted
+    triples without `:instance` edges, like `penman.decode` would give, for
+    the summary.
+    """
+
+    __slots__ = (
+        "labels",
+        "top",
+        "variables",
+        "concept_ids",
+        "edges",
+        "_summary_edges",
+    )
+
+    def __init__(self, top, triples):
+        ids = {top: 0}
+        out, inc = [[]], [[]]
+        sources, roles, targets = [], [], []
+        # variable -> concept, in order of the first :instance triple (last wins)
+        variables = {}
+        for e, (src, role, tgt) in enumerate(triples):
+            s = ids.get(src)
+            if s is None:
+                s = ids[src] = len(out)
+                out.append([])
+                inc.append([])
+            t = ids.get(tgt)
+            if t is None:
+                t = ids[tgt] = len(out)
+                out.append([])
+                inc.append([])
+            out[s].append(e)
+            inc[t].append(e)
+            sources.append(s)
+            roles.append(intern(role))
+            targets.append(t)
+            if role == ":instance":
+                variables[s] = t
+        concept_ids = array("i", [-1]) * len(ids)
+        for var, concept in variables.items():
+            concept_ids[var] = concept
+
+        self.labels = tuple([intern(x) if type(x) is str else x for x in ids])
+        self.top = 0
+        self.variables = array("i", variables)
+        self.concept_ids = concept_ids
+        self.edges = EdgeLists(sources, tuple(roles), targets, out, inc)
+        self._summary_edges = None
+
+    @classmethod
+    def from_graph(cls, g):
+        return cls(g.top, g.triples)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def concept(self, node, default=None):
+        """Concept label of a variable node, `default` for other nodes."""
+        c = self.concept_ids[node]
+        return default if c < 0 else self.labels[c]
+
+    @property
+    def summary_edges(self):
+        if self._summary_edges is None:
+            edges, concept_ids = self.edges, self.concept_ids
+            out = [[] for _ in self.labels]
+            inc = [[] for _ in self.labels]
+            sources, roles, targets = [], [], []
+            for s, role, t in zip(edges.sources, edges.roles, edges.targets):
+                if role == ":instance":
+                    continue
+                if role.endswith("-of") and concept_ids[t] >= 0:
+                    s, role, t = t, intern(role[:-3]), s
+                    if role == ":instance":
+                        continue
+                e = len(roles)
+                out[s].append(e)
+                inc[t].append(e)
+                sources.append(s)
+                roles.append(role)
+                targets.append(t)
+            self._summary_edges = EdgeLists(sources, tuple(roles), targets, out, inc)
+        return self._summary_edges
+
+    def distances_from(self, root):
+        """BFS distance of every node from root over `edges`; -1 if unreachable."""
+        out, targets = self.edges.out, self.edges.targets
+        dist = [-1] * len(self.labels)
+        dist[root] = 0
+        queue = [root]
+        for node in queue:
+            d = dist[node] + 1
+            for e in out[node]:
+                t = targets[e]
+                if dist[t] < 0:
+                    dist[t] = d
+                    queue.append(t)
+        return dist
+
+    def sources_of(self, matcher):
+        """Nodes with an edge to a matching label."""
+        matches = matcher.matches
+        hits = [node for node, label in enumerate(self.labels) if matches(label)]
+        inc, sources = self.edges.inc, self.edges.sources
+        return {sources[e] for node in hits for e in inc[node]}
+
+    @property
+    def fairness_vars(self):
+        """Variables whose concept is a fairness concept (FAIRNESS_CONCEPTS)."""
+        labels, concept_ids = self.labels, self.concept_ids
+        return [
+            v
+            for v in self.variables
+            if FAIRNESS_CONCEPTS.matches(labels[concept_ids[v]])
+        ]
+
+
+class GraphRecord(NamedTuple):
+    """
+    One graph of a corpus: its index and text. `index` is None when decoding
+    failed (`error` is set) or when the pre-check skipped the block.
+    """
+
+    gid: int
+    amr: Optional[str]
+    index: Optional[GraphIndex]
+    error: Optional[str]
+
+
+def iter_graph_records(filepath, cache=None, errors="strict", prefilter=()):
+    """
+    Yield a GraphRecord per block of filepath, decoding each graph once.
+
+    With a GraphCache (see corpus.cache.load_graph_cache), graphs come from it
+    without calling penman and `amr` is None; use `cache.text(gid)` for the
+    few rows that need the text. With `prefilter` matchers, blocks whose raw
+    text cannot match any of them are not decoded.
+    """
+    if cache is not None:
+        for i in range(len(cache)):
+            error = cache.error(i)
+            if error is not None:
+                profiling.count("decode_failures")
+                yield GraphRecord(i, None, None, error)
+            else:
+                with profiling.stage("cache"):
+                    g = cache.graph(i)
+                yield GraphRecord(i, None, GraphIndex.from_graph(g), None)
+        return
+
+    blocks = profiling.timed_iter(iter_amr_blocks(filepath, errors=errors), "read")
+    yield from iter_block_records(enumerate(blocks), prefilter)
+
+
+def iter_block_records(numbered_blocks, prefilter=()):
+    """GraphRecords of (gid, AmrBlock) pairs, e.g. read through an OffsetIndex."""
+    for i, block in numbered_blocks:
+        with profiling.block(i, block.metadata.get("id")):
+            record = _decode_record(i, block.amr, prefilter)
+        yield record
+
+
+def _decode_record(i, amr, prefilter):
+    if prefilter:
+        with profiling.stage("precheck"):
+            may_match = any(m.may_occur_in(amr) for m in prefilter)
+        if not may_match:
+            profiling.count("blocks_skipped_by_precheck")
+            return GraphRecord(i, amr, None, None)
+    try:
+        with profiling.stage("decode"):
+            g = decode_noop(amr)
+    except Exception as e:
+        profiling.count("decode_failures")
+        return GraphRecord(i, amr, None, str(e))
+    return GraphRecord(i, amr, GraphIndex.from_graph(g), None)
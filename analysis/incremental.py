@@ -0,0 +1,111 @@
+"""
+Incremental analysis: per-block results (centrality score and summary
+counter contributions) are kept in a corpus.incremental.ResultStore keyed by
+the block's content hash, so only new or changed blocks are decoded again.
+"""
+
+from corpus import iter_amr_blocks, profiling
+from corpus.concepts import FAIRNESS_CONCEPTS, FAIRNESS_NODE_MATCHER
+from corpus.decode import decode_noop
+from corpus.incremental import block_digest
+from .centrality_score import score_graph_index, select_top_k
+from .graph_index import GraphIndex
+from .output import top_k_frame
+from .summary import FairnessSummary
+
+# Store key of block_result; bump when scoring or summary counting changes.
+ANALYSIS_KIND = "analysis-v2"
+# How every reader of an ANALYSIS_KIND store decodes the file: block digests
+# are taken on the decoded text, so all subcommands must agree on it.
+READ_ERRORS = "ignore"
+
+
+def block_result(amr_str):
+    """Everything both analyses need from one block, as JSON-friendly data."""
+    if not (
+        FAIRNESS_CONCEPTS.may_occur_in(amr_str)
+        or FAIRNESS_NODE_MATCHER.may_occur_in(amr_str)
+    ):
+        empty = FairnessSummary().to_dict()
+        return {"error": None, "score": 0.0, "fairness_nodes": 0, "summary": empty}
+    try:
+        with profiling.stage("decode"):
+            g = decode_noop(amr_str)
+    except Exception as e:
+        return {"error": str(e)}
+    index = GraphIndex.from_graph(g)
+    part = FairnessSummary()
+    with profiling.stage("summarize"):
+        part.add(index)
+    _, score, n_fair, _ = score_graph_index(index, None)
+    return {
+        "error": None,
+        "score": float(score),
+        "fairness_nodes": n_fair,
+        "summary": part.to_dict(),
+    }
+
+
+def iter_block_results(filepath, store):
+    """Yield (gid, amr, result), computing only blocks missing from the store."""
+    blocks = profiling.timed_iter(
+        iter_amr_blocks(filepath, errors=READ_ERRORS), "read"
+    )
+    for i, block in enumerate(blocks):
+        with profiling.stage("store"):
+            digest = block_digest(block.amr)
+            result = store.get(digest)
+        if result is None:
+            with profiling.block(i, block.metadata.get("id")):
+                result = block_result(block.amr)
+            with profiling.stage("store"):
+                store.put(digest, result)
+        if result["error"] is not None:
+            profiling.count("decode_failures")
+            print(f"[Graph {i}] Decode error: {result['error']}")
+        yield i, block.amr, result
+
+
+def _merge_summary(results, summary):
+    for gid, amr, result in results:
+        if result["error"] is None:
+            summary.merge(FairnessSummary.from_dict(result["summary"]))
+        yield gid, amr, result
+
+
+def _scored(results):
+    for gid, amr, result in results:
+        if result["error"] is not None:
+            yield (gid, 0.0, 0, amr)
+        else:
+            yield (gid, result["score"], result["fairness_nodes"], amr)
+
+
+def incremental_summary(amr_path, store, max_items=20):
+    """Same report as analyze_fairness_amr, merged from per-block results."""
+    summary = FairnessSummary()
+    for _ in _merge_summary(iter_block_results(amr_path, store), summary):
+        pass
+    summary.print_report(max_items)
+    print(f"\nIncremental: {store.report()}")
+    print("\nAnalysis completed.")
+
+
+def incremental_top_k(filepath, store, k=5):
+    """Same DataFrame as top_k_fairness_graphs, from per-block results."""
+    top_graphs = select_top_k(_scored(iter_block_results(filepath, store)), k)
+    print(f"Incremental: {store.report()}")
+    print(f"Top {k} graphs by fairness centrality:\n")
+    return top_k_frame(top_graphs)
+
+
+def incremental_all(filepath, store, k=10, max_items=20):
+    """Same output as analyze_all, from per-block results."""
+    summary = FairnessSummary()
+    results = _merge_summary(iter_block_results(filepath, store), summary)
+    top_graphs = select_top_k(_scored(results), k)
+    summary.print_report(max_items)
+    print(f"\nIncremental: {store.report()}")
+    print("\nAnalysis completed.\n")
+    print(f"Top {k} graphs by fairness centrality:\n")
+    return top_k_frame(top_graphs)
@@ -0,0 +1,195 @@
+"""
+Columnar result files for downstream tools.
+
+Rows are buffered and written in chunks, so a whole corpus can be exported
+without holding its results in memory. The format follows the file suffix:
+
+- .csv                    always available
+- .parquet                needs pyarrow
+- .arrow, .feather, .ipc  Arrow IPC file, needs pyarrow
+
+Files are written under a temporary name and renamed when complete.
+The top-k DataFrames printed by the CLI are built here too, so pandas is
+only imported once a table is rendered.
+"""
+
+import csv
+import os
+from pathlib import Path
+
+# (name, type) with type in {"int64", "float64", "string"}; strings may be None.
+SCORE_COLUMNS = (
+    ("gid", "int64"),
+    ("score", "float64"),
+    ("fairness_nodes", "int64"),
+)
+
+CONTEXT_COLUMNS = (
+    ("gid", "int64"),
+    ("var", "string"),
+    ("concept", "string"),
+    ("position", "string"),
+    ("relation", "string"),
+    ("role", "string"),
+    ("role_family", "string"),
+    ("other_var", "string"),
+    ("other_concept", "string"),
+)
+
+TOP_K_COLUMNS = ["gid", "score", "fairness_nodes", "amr"]
+SELECTION_COLUMNS = ["gid", "id", "score", "fairness_nodes"]
+
+FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+
+def output_format(path) -> str:
+    """Format of an output path; raises ValueError/ImportError if unusable."""
+    suffix = Path(path).suffix.lower()
+    fmt = FORMATS.get(suffix)
+    if fmt is None:
+        raise ValueError(
+            f"Unsupported output format {suffix!r} (use one of {', '.join(FORMATS)})"
+        )
+    if fmt != "csv":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                f"Writing {suffix} files needs pyarrow (pip install pyarrow); "
+                "use a .csv path instead"
+            ) from None
+    return fmt
+
+
+def score_columns(score_names=None):
+    """SCORE_COLUMNS, or with score_names one float column per named score."""
+    if not score_names:
+        return SCORE_COLUMNS
+    return (
+        ("gid", "int64"),
+        *((name, "float64") for name in score_names),
+        ("fairness_nodes", "int64"),
+    )
+
+
+def top_k_frame(top_graphs, score_names=None):
+    """
+    DataFrame of (gid, score, fairness_nodes, amr) rows. With score_names,
+    rows carry a tuple of those scores last (see analysis.scoring), shown as
+    one column per score in place of `score`.
+    """
+    import pandas as pd
+
+    if not score_names:
+        return pd.DataFrame(top_graphs, columns=TOP_K_COLUMNS)
+    rows = [
+        (gid, *variants, n_fair, amr)
+        for gid, _, n_fair, amr, variants in top_graphs
+    ]
+    return pd.DataFrame(rows, columns=["gid", *score_names, "fairness_nodes", "amr"])
+
+
+def selection_frame(rows):
+    """DataFrame of (gid, id, score, fairness_nodes) rows."""
+    import pandas as pd
+
+    return pd.DataFrame(rows, columns=SELECTION_COLUMNS)
+
+
+class TableWriter:
+    """
+    Stream rows (tuples in `columns` order) to a CSV, Parquet or Arrow file.
+
+        with TableWriter("scores.parquet", SCORE_COLUMNS) as out:
+            out.write((0, 0.5, 1))
+    """
+
+    def __init__(self, path, columns, chunk_rows=50_000):
+        self.path = Path(path)
+        self.columns = columns
+        self.chunk_rows = chunk_rows
+        self.format = output_format(self.path)
+        self.rows_written = 0
+        self._buffer = []
+        self._tmp = self.path.with_name(f".{self.path.name}.tmp")
+        self._file = None
+        self._writer = None
+
+    def write(self, row) -> None:
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_rows:
+            self._flush()
+
+    def write_rows(self, rows) -> None:
+        for row in rows:
+            self.write(row)
+
+    def _flush(self):
+        if self._writer is None:
+            self._open()
+        if self.format == "csv":
+            self._writer.writerows(self._buffer)
+        else:
+            self._writer.write_table(self._arrow_table(self._buffer))
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def _open(self):
+        if self.format == "csv":
+            self._file = open(self._tmp, "w", encoding="utf-8", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow([name for name, _ in self.columns])
+        elif self.format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(self._tmp, self._arrow_schema())
+        else:
+            import pyarrow as pa
+
+            self._writer = pa.ipc.new_file(str(self._tmp), self._arrow_schema())
+
+    def _arrow_schema(self):
+        import pyarrow as pa
+
+        types = {"int64": pa.int64(), "float64": pa.float64(), "string": pa.string()}
+        return pa.schema([(name, types[kind]) for name, kind in self.columns])
+
+    def _arrow_table(self, rows):
+        import pyarrow as pa
+
+        columns = list(zip(*rows)) if rows else [() for _ in self.columns]
+        data = {name: list(col) for (name, _), col in zip(self.columns, columns)}
+        return pa.Table.from_pydict(data, schema=self._arrow_schema())
+
+    def close(self) -> None:
+        """Write the last chunk (and the header of an empty table), then rename."""
+        if self._buffer or self._writer is None:
+            self._flush()
+        if self.format == "csv":
+            self._file.close()
+        else:
+            self._writer.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        elif self._writer is not None:
+            self._writer.close()
+        if self._tmp.exists():
+            os.unlink(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,171 @@
+"""
+Partial analysis results of corpus shards, and their merge.
+
+`analyze_shard` runs the single-pass analysis of analysis.combined on one
+shard (see corpus.shards) and saves what the reports are made of next to
+it, as `<shard>.analysis.json`: the summary counters and examples, the
+score of every graph, the shard's top-k graphs with their text and the
+decode errors. `merge_analysis` adds the partials up in shard order and
+prints the report of `analyze.py summary`, `centrality_score` or `all` on
+the whole corpus: merged counters keep their order and examples, and the
+global top-k is always among the shards' top-k.
+"""
+
+import contextlib
+import json
+import os
+from pathlib import Path
+
+from corpus.concepts import FAIRNESS_CONCEPTS, FAIRNESS_NODE_MATCHER
+from corpus.shards import manifest_of_shard, shard_stamp
+from .centrality_score import score_graph_index, score_row, select_top_k
+from .graph_index import iter_graph_records
+from .output import SCORE_COLUMNS, TableWriter, top_k_frame
+from .summary import FairnessSummary
+
+PARTIAL_SUFFIX = ".analysis.json"
+PARTIAL_VERSION = 1
+# Graphs of each shard kept with their text; merges can show up to this many.
+DEFAULT_PARTIAL_K = 100
+
+REPORTS = ("summary", "centrality_score", "all")
+
+
+def partial_path_for(shard_path) -> Path:
+    shard_path = Path(shard_path)
+    return shard_path.with_name(shard_path.name + PARTIAL_SUFFIX)
+
+
+def analyze_shard(shard_path, k=DEFAULT_PARTIAL_K) -> Path:
+    """Analyze one shard and write its partial result; returns its path."""
+    shard = manifest_of_shard(shard_path).shard_of(shard_path)
+    stamp = shard_stamp(shard.path)
+    summary = FairnessSummary()
+    scores = []
+    errors = []  # [gid, message, shown by summary, shown by centrality_score]
+
+    def scored_graphs():
+        records = iter_graph_records(
+            shard.path,
+            errors="ignore",
+            prefilter=(FAIRNESS_CONCEPTS, FAIRNESS_NODE_MATCHER),
+        )
+        for record in records:
+            gid = shard.first_gid + record.gid
+            if record.index is None:
+                if record.error is not None:
+                    errors.append(
+                        [
+                            gid,
+                            record.error,
+                            FAIRNESS_CONCEPTS.may_occur_in(record.amr),
+                            FAIRNESS_NODE_MATCHER.may_occur_in(record.amr),
+                        ]
+                    )
+                scored = (gid, 0.0, 0, record.amr)
+            else:
+                summary.add(record.index)
+                scored = score_graph_index(record.index, gid, record.amr)
+            scores.append(score_row(scored)[1:])
+            yield scored
+
+    top_graphs = select_top_k(scored_graphs(), k)
+    if len(scores) != shard.n_blocks:
+        raise ValueError(
+            f"{shard.path} has {len(scores)} blocks, its manifest says {shard.n_blocks}"
+        )
+    partial = {
+        "version": PARTIAL_VERSION,
+        "shard": shard.path.name,
+        "shard_stamp": stamp,
+        "first_gid": shard.first_gid,
+        "n_blocks": shard.n_blocks,
+        "k": k,
+        "summary": summary.to_dict(),
+        "scores": scores,
+        "top": [[*score_row(scored), scored[3]] for scored in top_graphs],
+        "errors": errors,
+    }
+    path = partial_path_for(shard.path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(partial, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+
+def load_partial(shard, k=0) -> dict:
+    """
+    Partial result of a Shard; ValueError if it is missing, was computed on
+    another version of the shard, or kept fewer than k top graphs.
+    """
+    path = partial_path_for(shard.path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            partial = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"no partial result for {shard.path}") from None
+    if (
+        partial.get("version") != PARTIAL_VERSION
+        or partial["shard_stamp"] != shard_stamp(shard.path)
+        or partial["first_gid"] != shard.first_gid
+    ):
+        raise ValueError(f"{path} is out of date")
+    if partial["k"] < k and len(partial["top"]) < shard.n_blocks:
+        raise ValueError(
+            f"{path} keeps the top {partial['k']} graphs of its shard;"
+            f" re-run the shard analysis with a k of at least {k}"
+        )
+    return partial
+
+
+def merge_analysis(manifest, report="all", k=10, max_items=20, output=None):
+    """
+    Print the `report` (one of REPORTS) of the whole sharded corpus from the
+    shards' partial results, as the single-file run prints it. Returns the
+    top-k DataFrame for centrality_score and all, else None. With `output`
+    (centrality_score only), the score of every graph is written to it.
+    """
+    if report not in REPORTS:
+        raise ValueError(f"report must be one of {', '.join(REPORTS)}")
+    # check every partial before printing anything; per-graph scores are
+    # only kept when they are written out
+    partials = []
+    for shard in manifest.shards:
+        partial = load_partial(shard, 0 if report == "summary" else k)
+        if output is None:
+            del partial["scores"]
+        partials.append(partial)
+
+    summary = FairnessSummary()
+    candidates = []
+    with contextlib.ExitStack() as stack:
+        writer = (
+            stack.enter_context(TableWriter(output, SCORE_COLUMNS)) if output else None
+        )
+        for partial in partials:
+            for gid, message, in_summary, in_centrality in partial["errors"]:
+                if (in_summary and report != "centrality_score") or (
+                    in_centrality and report != "summary"
+                ):
+                    print(f"[Graph {gid}] Decode error: {message}")
+            summary.merge(FairnessSummary.from_dict(partial["summary"]))
+            candidates.extend(tuple(row) for row in partial["top"])
+            if writer is not None:
+                first = partial["first_gid"]
+                writer.write_rows(
+                    (first + i, score, n_fair)
+                    for i, (score, n_fair) in enumerate(partial["scores"])
+                )
+
+    if report != "centrality_score":
+        summary.print_report(max_items)
+    if report == "summary":
+        print("\nAnalysis completed.")
+        return None
+    if report == "all":
+        print("\nAnalysis completed.\n")
+    if writer is not None:
+        print(f"Wrote {writer.rows_written} graph scores to {output}\n")
+    print(f"Top {k} graphs by fairness centrality:\n")
+    return top_k_frame(select_top_k(candidates, k))
@@ -0,0 +1,227 @@
+"""
+Pluggable fairness centrality scores.
+
+`GraphFeatures` computes structural features of every node of a GraphIndex
+in one sweep: a BFS from the top over the NoOp edges (the traversal of
+`GraphIndex.distances_from`) and one pass over the edge lists. Score
+functions registered with `register_score` turn the NodeFeatures of a
+fairness node into a number; the score of a graph is the best score of its
+fairness nodes reachable from the top, as in centrality_score.
+
+`ScoreSet` evaluates several registered scores from the same features, so
+`analyze.py centrality_score --scores centrality,subtree` costs one sweep
+per graph whatever the number of scores. "centrality" is the score of
+centrality_score.fairness_score_for_graph, and gives the same values.
+
+    @register_score("shallow")
+    def shallow(f):
+        return 1 / (1 + f.depth)
+"""
+
+from typing import NamedTuple
+
+from corpus.concepts import FAIRNESS_NODE_MATCHER
+from .centrality_score import ROLE_WEIGHTS
+
+DEFAULT_SCORES = ("centrality",)
+
+
+class NodeFeatures(NamedTuple):
+    depth: int  # BFS distance from the top, over all NoOp edges
+    weighted_depth: float  # sum of 1 / ROLE_WEIGHTS[role] along that BFS path
+    role_weight: float  # best ROLE_WEIGHTS of the incoming roles (1.0 at the top)
+    subtree_size: int  # variables under the node in the BFS tree, itself included
+    in_degree: int  # incoming edges, :instance excluded
+    out_degree: int  # outgoing edges, :instance excluded
+    reentrancies: int  # parents beyond the first (in_degree - 1, at least 0)
+    n_variables: int  # variables of the whole graph
+
+
+class GraphFeatures:
+    """
+    NodeFeatures of every node of a GraphIndex, kept as lists indexed by node
+    id; `of(node)` assembles one node's. Nodes unreachable from the top have
+    a depth of -1 (and no meaningful path features).
+    """
+
+    __slots__ = (
+        "depth",
+        "weighted_depth",
+        "role_weight",
+        "subtree_size",
+        "in_degree",
+        "out_degree",
+        "n_variables",
+    )
+
+    def __init__(self, index):
+        edges = index.edges
+        out, roles, targets = edges.out, edges.roles, edges.targets
+        n = len(index)
+        top = index.top
+
+        depth = [-1] * n
+        weighted_depth = [0.0] * n
+        parent = [-1] * n
+        depth[top] = 0
+        queue = [top]
+        for node in queue:
+            d, w = depth[node] + 1, weighted_depth[node]
+            for e in out[node]:
+                t = targets[e]
+                if depth[t] < 0:
+                    depth[t] = d
+                    weighted_depth[t] = w + 1 / ROLE_WEIGHTS[roles[e]]
+                    parent[t] = node
+                    queue.append(t)
+
+        # children come after their parent in BFS order
+        subtree_size = [int(c >= 0) for c in index.concept_ids]
+        for node in reversed(queue):
+            if parent[node] >= 0:
+                subtree_size[parent[node]] += subtree_size[node]
+
+        role_weight = [-1.0] * n
+        in_degree = [0] * n
+        out_degree = [0] * n
+        for node, role, t in zip(edges.sources, roles, targets):
+            weight = ROLE_WEIGHTS[role]
+            if weight > role_weight[t]:
+                role_weight[t] = weight
+            if role != ":instance":
+                out_degree[node] += 1
+                in_degree[t] += 1
+        no_parent = 1.0 if index.concept(top) else 0.4
+        role_weight = [no_parent if w < 0 else w for w in role_weight]
+        role_weight[top] = 1.0
+
+        self.depth = depth
+        self.weighted_depth = weighted_depth
+        self.role_weight = role_weight
+        self.subtree_size = subtree_size
+        self.in_degree = in_degree
+        self.out_degree = out_degree
+        self.n_variables = len(index.variables)
+
+    def of(self, node) -> NodeFeatures:
+        in_degree = self.in_degree[node]
+        return NodeFeatures(
+            self.depth[node],
+            self.weighted_depth[node],
+            self.role_weight[node],
+            self.subtree_size[node],
+            in_degree,
+            self.out_degree[node],
+            max(0, in_degree - 1),
+            self.n_variables,
+        )
+
+
+# -----------------------------------------------------------
+# Registered scores
+# -----------------------------------------------------------
+SCORERS = {}
+
+
+def register_score(name):
+    """Register `fn(NodeFeatures) -> float` as the node score `name`."""
+
+    def register(fn):
+        if name in SCORERS:
+            raise ValueError(f"a score named {name!r} is already registered")
+        SCORERS[name] = fn
+        return fn
+
+    return register
+
+
+@register_score("centrality")
+def centrality(f):
+    """Best incoming role weight over 1 + depth (the default score)."""
+    return f.role_weight * (1 / (1 + f.depth))
+
+
+@register_score("weighted_depth")
+def weighted_depth(f):
+    """Closeness to the top, each edge costing 1 / its role weight."""
+    return 1 / (1 + f.weighted_depth)
+
+
+@register_score("subtree")
+def subtree(f):
+    """Share of the graph's variables under the node, times its role weight."""
+    return f.role_weight * f.subtree_size / max(1, f.n_variables)
+
+
+@register_score("degree")
+def degree(f):
+    """Edges at the node (in and out) over 1 + depth."""
+    return (f.in_degree + f.out_degree) / (1 + f.depth)
+
+
+@register_score("reentrancy")
+def reentrancy(f):
+    """centrality, multiplied by the number of parents of the node."""
+    return centrality(f) * (1 + f.reentrancies)
+
+
+class ScoreSet:
+    """
+    Registered scores evaluated together, in `names` order. Picklable, so it
+    can be sent to scoring processes.
+    """
+
+    __slots__ = ("names", "_functions")
+
+    def __init__(self, names=DEFAULT_SCORES):
+        names = tuple(names)
+        unknown = [name for name in names if name not in SCORERS]
+        if unknown or not names:
+            raise ValueError(
+                f"unknown score {', '.join(map(repr, unknown)) or '(none given)'};"
+                f" available: {', '.join(SCORERS)}"
+            )
+        if len(set(names)) != len(names):
+            raise ValueError("a score is listed twice")
+        self.names = names
+        self._functions = tuple(SCORERS[name] for name in names)
+
+    @classmethod
+    def parse(cls, text):
+        """ScoreSet of a comma-separated list such as "centrality,subtree"."""
+        return cls(name.strip() for name in text.split(",") if name.strip())
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getstate__(self):
+        return self.names
+
+    def __setstate__(self, names):
+        self.__init__(names)
+
+    def unscored(self, graph_id, amr_str=None, n_fair=0):
+        return (graph_id, 0.0, n_fair, amr_str, (0.0,) * len(self.names))
+
+    def score_graph(self, index, graph_id, amr_str=None):
+        """
+        Score a graph from its GraphIndex with every score of the set.
+        Returns (graph_id, first score, fairness_node_count, amr_str, scores),
+        ranked like the tuples of centrality_score by the first score.
+        """
+        fairness_nodes = index.sources_of(FAIRNESS_NODE_MATCHER)
+        if not fairness_nodes:
+            return self.unscored(graph_id, amr_str)
+
+        features = GraphFeatures(index)
+        best = None
+        for fn in fairness_nodes:
+            if features.depth[fn] < 0:
+                continue
+            f = features.of(fn)
+            values = [score(f) for score in self._functions]
+            best = values if best is None else list(map(max, best, values))
+
+        if best is None:
+            return self.unscored(graph_id, amr_str, len(fairness_nodes))
+        return (graph_id, best[0], len(fairness_nodes), amr_str, tuple(best))
@@ -0,0 +1,54 @@
+"""
+Analyses of a few graphs of a corpus, picked by `# ::id` or by position and
+read through the file's offset index (corpus.offsets) instead of a scan.
+"""
+
+from corpus import profiling
+from corpus.concepts import FAIRNESS_CONCEPTS
+from .centrality_score import fairness_score_for_graph
+from .graph_index import iter_block_records
+from .output import selection_frame
+from .summary import FairnessSummary
+
+
+def select_blocks(index, ids=(), gid_range=None):
+    """
+    (gid, AmrBlock) pairs, in file order, of the blocks whose `# ::id` is
+    in `ids` and of the gids in `gid_range` (start, stop); every block when
+    neither is given. Raises KeyError for an id that is not in the file.
+    """
+    if not ids and gid_range is None:
+        return list(index.blocks())
+    selected = dict(index.blocks(*gid_range)) if gid_range is not None else {}
+    for block_id in ids:
+        gids = index.gids_of(block_id)
+        if not gids:
+            raise KeyError(f"no block with ::id {block_id}")
+        for gid in gids:
+            if gid not in selected:
+                selected[gid] = index.block(gid)
+    return sorted(selected.items())
+
+
+def score_selection(blocks):
+    """Score table (output.SELECTION_COLUMNS) of (gid, AmrBlock) pairs."""
+    rows = []
+    for gid, block in blocks:
+        block_id = block.metadata.get("id")
+        _, score, n_fair, _ = fairness_score_for_graph(block.amr, gid, block_id)
+        rows.append((gid, block_id, float(score), n_fair))
+    return selection_frame(rows)
+
+
+def summarize_selection(blocks, max_items=20):
+    """Print the fairness summary report of (gid, AmrBlock) pairs."""
+    summary = FairnessSummary()
+    for record in iter_block_records(blocks, prefilter=(FAIRNESS_CONCEPTS,)):
+        if record.index is None:
+            if record.error is not None:
+                print(f"[Graph {record.gid}] Decode error: {record.error}")
+            continue
+        with profiling.stage("summarize"):
+            summary.add(record.index)
+    with profiling.stage("format"):
+        summary.print_report(max_items)
@@ -5,113 +5,238 @@
 # --------------------------------------------------------
 
 import collections
-import pandas as pd
-
-
-def analyze_fairness_amr(amr_path: str, max_items: int = 20) -> None:
-    """Analyze fairness-related concepts in AMR graphs and print pandas summaries."""
-
-    try:
-        import penman
-    except ImportError:
-        print("Please install 'penman' first: pip install penman")
+import contextlib
+from typing import NamedTuple, Optional
+
+from corpus import profiling
+from corpus.cache import load_graph_cache
+from corpus.concepts import FAIRNESS_CONCEPTS
+from .graph_index import iter_graph_records
+from .output import CONTEXT_COLUMNS, TableWriter
+
+
+# --- Helper: normalize role family (group op1/op2/... as 'op') ---
+def role_family(role: str) -> str:
+    r = role.lstrip(":").lower()
+    return "op" if r.startswith("op") else r
+
+
+class FairnessContext(NamedTuple):
+    """
+    One fact about a fairness occurrence `var`: a "self" record with its
+    position, then a "parent" record per incoming edge (followed by "sibling"
+    records for the parent's other children) and a "child" record per
+    outgoing edge. `other_concept` is "(literal)" for parents and children
+    without a concept, None for such siblings.
+    """
+
+    var: str
+    concept: str
+    position: str
+    relation: str
+    role: Optional[str] = None
+    role_family: Optional[str] = None
+    other_var: Optional[str] = None
+    other_concept: Optional[str] = None
+
+
+def fairness_contexts(index):
+    """Yield the FairnessContext records of every fairness variable of a graph."""
+    # Find all fairness-related variables
+    fairness_vars = index.fairness_vars
+    if not fairness_vars:
         return
-
-    # --- Load AMR graphs ---
+    labels, concept = index.labels, index.concept
+    edges = index.summary_edges
+    out, inc = edges.out, edges.inc
+    sources, roles, targets = edges.sources, edges.roles, edges.targets
+
+    for v in fairness_vars:
+        var, v_concept = labels[v], concept(v)
+        # --- Position ---
+        if v == index.top:
+            pos = "root"
+        else:
+            pos = "interior" if out[v] else "leaf"
+        yield FairnessContext(var, v_concept, pos, "self")
+
+        # --- Parent edges ---
+        for e in inc[v]:
+            r, parent_v = roles[e], sources[e]
+            parent, parent_concept = labels[parent_v], concept(parent_v, "(literal)")
+            yield FairnessContext(
+                var, v_concept, pos, "parent", r, role_family(r), parent, parent_concept
+            )
+
+            # --- Siblings under the same parent ---
+            for sib_e in out[parent_v]:
+                sib_v = targets[sib_e]
+                if sib_v == v:
+                    continue
+                rc, sib, sib_c = roles[sib_e], labels[sib_v], concept(sib_v)
+                yield FairnessContext(
+                    var, v_concept, pos, "sibling", rc, role_family(rc), sib, sib_c
+                )
+
+        # --- Child edges ---
+        for e in out[v]:
+            r, child_v = roles[e], targets[e]
+            child, child_concept = labels[child_v], concept(child_v, "(literal)")
+            yield FairnessContext(
+                var, v_concept, pos, "child", r, role_family(r), child, child_concept
+            )
+
+
+class FairnessSummary:
+    """Counters of fairness positions/relations, fed one GraphIndex at a time."""
+
+    def __init__(self):
+        self.position_counts = collections.Counter()
+        self.parent_role_counts = collections.Counter()
+        self.parent_concept_counts = collections.Counter()
+        self.child_role_counts = collections.Counter()
+        self.sibling_concept_counts = collections.Counter()
+
+        # Optional: keep small representative samples
+        self.parent_examples = collections.defaultdict(list)
+        self.child_examples = collections.defaultdict(list)
+
+    def add(self, index) -> None:
+        self.add_contexts(fairness_contexts(index))
+
+    def add_contexts(self, contexts) -> None:
+        """Count FairnessContext records (in fairness_contexts order)."""
+        for c in contexts:
+            if c.relation == "self":
+                self.position_counts[c.position] += 1
+            elif c.relation == "parent":
+                self.parent_role_counts[c.role_family] += 1
+                self.parent_concept_counts[c.other_concept] += 1
+                if len(self.parent_examples[c.role_family]) < 3:
+                    self.parent_examples[c.role_family].append((c.other_concept, c.role))
+            elif c.relation == "sibling":
+                if c.other_concept:
+                    self.sibling_concept_counts[c.other_concept] += 1
+            else:
+                self.child_role_counts[c.role_family] += 1
+                if len(self.child_examples[c.role_family]) < 3:
+                    self.child_examples[c.role_family].append((c.other_concept, c.role))
+
+    COUNTERS = (
+        "position_counts",
+        "parent_role_counts",
+        "parent_concept_counts",
+        "child_role_counts",
+        "sibling_concept_counts",
+    )
+    EXAMPLES = ("parent_examples", "child_examples")
+
+    def merge(self, other: "FairnessSummary") -> None:
+        """
+        Add the counts of another summary computed on the graphs that follow.
+        Merging per-graph summaries in file order gives the same report as
+        adding the graphs one by one (same tie order and examples).
+        """
+        for name in self.COUNTERS:
+            getattr(self, name).update(getattr(other, name))
+        for name in self.EXAMPLES:
+            mine = getattr(self, name)
+            for fam, exs in getattr(other, name).items():
+                mine[fam].extend(exs[: 3 - len(mine[fam])])
+
+    def to_dict(self) -> dict:
+        """JSON-friendly form; key order is kept as ordered pairs."""
+        data = {name: list(getattr(self, name).items()) for name in self.COUNTERS}
+        for name in self.EXAMPLES:
+            data[name] = [
+                [fam, [list(ex) for ex in exs]] for fam, exs in getattr(self, name).items()
+            ]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FairnessSummary":
+        summary = cls()
+        for name in cls.COUNTERS:
+            getattr(summary, name).update(dict(data[name]))
+        for name in cls.EXAMPLES:
+            examples = getattr(summary, name)
+            for fam, exs in data[name]:
+                examples[fam] = [tuple(ex) for ex in exs]
+        return summary
+
+    def print_report(self, max_items: int = 20) -> None:
+        import pandas as pd
+
+        # --- Print summaries as pandas tables ---
+        def print_df(title: str, counter: collections.Counter):
+            print(f"\n=== {title} ===")
+            if not counter:
+                print("[No data]")
+                return
+            df = pd.DataFrame(counter.most_common(max_items), columns=[title, "count"])
+            print(df.to_string(index=False))
+
+        print_df("Position of fairness", self.position_counts)
+        print_df("Parent roles (relations) of fairness", self.parent_role_counts)
+        print_df("Parent concepts of fairness", self.parent_concept_counts)
+        print_df("Child roles (relations) of fairness", self.child_role_counts)
+        print_df(
+            "Sibling concepts (same parent as fairness)", self.sibling_concept_counts
+        )
+
+        print("\n--- Example relations (first few) ---")
+        for fam, exs in list(self.parent_examples.items())[:5]:
+            print(f"Parent role {fam}: {exs[:3]}")
+        for fam, exs in list(self.child_examples.items())[:5]:
+            print(f"Child role {fam}: {exs[:3]}")
+
+
+def analyze_fairness_amr(
+    amr_path: str,
+    max_items: int = 20,
+    use_cache: bool = True,
+    output: Optional[str] = None,
+) -> None:
+    """
+    Analyze fairness-related concepts in AMR graphs and print pandas summaries.
+    Graphs are read from the `.gcache` sidecar when a fresh one exists.
+    With `output`, every FairnessContext record is also streamed to that
+    file (see analysis.output.CONTEXT_COLUMNS), keyed by graph id.
+    """
+
+    # --- Stream AMR graphs (one block decoded at a time) ---
     try:
-        with open(amr_path, "r", encoding="utf-8", errors="ignore") as f:
-            graphs = penman.load(f)
-    except Exception as e:
+        open(amr_path, "rb").close()
+    except OSError as e:
         print(f"Failed to load AMR file: {e}")
         return
 
-    # --- Initialize Counters ---
-    position_counts = collections.Counter()
-    parent_role_counts = collections.Counter()
-    parent_concept_counts = collections.Counter()
-    child_role_counts = collections.Counter()
-    sibling_concept_counts = collections.Counter()
-
-    # Optional: keep small representative samples
-    parent_examples = collections.defaultdict(list)
-    child_examples = collections.defaultdict(list)
-
-    # --- Helper: normalize role family (group op1/op2/... as 'op') ---
-    def role_family(role: str) -> str:
-        r = role.lstrip(":").lower()
-        return "op" if r.startswith("op") else r
-
-    # --- Iterate over AMR graphs ---
-    for g in graphs:
-        # Map variable -> concept
-        inst = {src: tgt for (src, role, tgt) in g.triples if role == ":instance"}
-
-        # Build edge lookups
-        outgoing = collections.defaultdict(list)
-        incoming = collections.defaultdict(list)
-        for src, role, tgt in g.triples:
-            if role == ":instance":
+    cache = load_graph_cache(amr_path) if use_cache else None
+    summary = FairnessSummary()
+    records = iter_graph_records(
+        amr_path, cache, errors="ignore", prefilter=(FAIRNESS_CONCEPTS,)
+    )
+    with contextlib.ExitStack() as stack:
+        writer = (
+            stack.enter_context(TableWriter(output, CONTEXT_COLUMNS))
+            if output
+            else None
+        )
+        for record in records:
+            if record.index is None:
+                if record.error is not None:
+                    print(f"[Graph {record.gid}] Decode error: {record.error}")
                 continue
-            outgoing[src].append((role, tgt))
-            incoming[tgt].append((role, src))
-
-        # Find all fairness-related variables
-        fairness_vars = [v for v, c in inst.items() if c in {"fairness", "fair-01"}]
-        for v in fairness_vars:
-            # --- Position ---
-            if v == g.top:
-                pos = "root"
-            else:
-                children = [t for (r, t) in outgoing.get(v, []) if r != ":instance"]
-                pos = "leaf" if not children else "interior"
-            position_counts[pos] += 1
-
-            # --- Parent edges ---
-            for r, parent_v in incoming.get(v, []):
-                fam = role_family(r)
-                parent_role_counts[fam] += 1
-                parent_concept = inst.get(parent_v, "(literal)")
-                parent_concept_counts[parent_concept] += 1
-                if len(parent_examples[fam]) < 3:
-                    parent_examples[fam].append((parent_concept, r))
-
-                # --- Siblings under the same parent ---
-                for rc, sib_v in outgoing.get(parent_v, []):
-                    if sib_v == v:
-                        continue
-                    sib_concept = inst.get(sib_v)
-                    if sib_concept:
-                        sibling_concept_counts[sib_concept] += 1
-
-            # --- Child edges ---
-            for r, child_v in outgoing.get(v, []):
-                if r == ":instance":
-                    continue
-                fam = role_family(r)
-                child_role_counts[fam] += 1
-                child_concept = inst.get(child_v, "(literal)")
-                if len(child_examples[fam]) < 3:
-                    child_examples[fam].append((child_concept, r))
-
-    # --- Print summaries as pandas tables ---
-    def print_df(title: str, counter: collections.Counter):
-        print(f"\n=== {title} ===")
-        if not counter:
-            print("[No data]")
-            return
-        df = pd.DataFrame(counter.most_common(max_items), columns=[title, "count"])
-        print(df.to_string(index=False))
-
-    print_df("Position of fairness", position_counts)
-    print_df("Parent roles (relations) of fairness", parent_role_counts)
-    print_df("Parent concepts of fairness", parent_concept_counts)
-    print_df("Child roles (relations) of fairness", child_role_counts)
-    print_df("Sibling concepts (same parent as fairness)", sibling_concept_counts)
-
-    print("\n--- Example relations (first few) ---")
-    for fam, exs in list(parent_examples.items())[:5]:
-        print(f"Parent role {fam}: {exs[:3]}")
-    for fam, exs in list(child_examples.items())[:5]:
-        print(f"Child role {fam}: {exs[:3]}")
+            with profiling.stage("summarize"):
+                contexts = list(fairness_contexts(record.index))
+                summary.add_contexts(contexts)
+            if writer is not None:
+                with profiling.stage("output"):
+                    writer.write_rows((record.gid, *c) for c in contexts)
+
+    with profiling.stage("format"):
+        summary.print_report(max_items)
+    if writer is not None:
+        print(f"\nWrote {writer.rows_written} context records to {output}")
 
     print("\nAnalysis completed.")
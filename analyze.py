@@ -1,6 +1,112 @@
 import argparse
 
 
+def print_table(df):
+    from corpus import profiling
+
+    with profiling.stage("format"):
+        print(df)
+
+
+def run_incremental(args):
+    from analysis.incremental import (
+        ANALYSIS_KIND,
+        incremental_all,
+        incremental_summary,
+        incremental_top_k,
+    )
+    from corpus.incremental import ResultStore, store_path_for
+
+    with ResultStore(store_path_for(args.input_file), ANALYSIS_KIND) as store:
+        if args.command == "summary":
+            incremental_summary(args.input_file, store)
+        elif args.command == "centrality_score":
+            print_table(incremental_top_k(args.input_file, store, args.k))
+        else:
+            print_table(incremental_all(args.input_file, store, args.k))
+
+
+def run_query(parser, args):
+    from analysis.concept_index import open_concept_index, query_concept_index
+
+    conn = open_concept_index(args.input_file)
+    if conn is None:
+        print(
+            f"No up-to-date concept index for {args.input_file}; "
+            f"run: python analyze.py index {args.input_file}"
+        )
+        exit(1)
+    try:
+        n_matches, n_graphs, df = query_concept_index(
+            conn,
+            concept=args.concept,
+            parent=args.parent,
+            role=args.role,
+            child=args.child,
+            position=args.position,
+            limit=args.limit,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        conn.close()
+    print(f"{n_matches} matches in {n_graphs} graphs\n")
+    if n_matches:
+        print(df.to_string(index=False))
+
+
+def gid_range(text):
+    """argparse type of --range: START:STOP, either side may be left out."""
+    start, sep, stop = text.partition(":")
+    try:
+        if not sep:
+            raise ValueError
+        bounds = (int(start) if start else 0, int(stop) if stop else None)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected START:STOP, got {text!r}")
+    if bounds[0] < 0 or (bounds[1] is not None and bounds[1] < bounds[0]):
+        raise argparse.ArgumentTypeError(f"invalid range {text!r}")
+    return bounds
+
+
+def positive_int(text):
+    """argparse type of --workers/--chunksize: an integer of at least 1."""
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {text!r}")
+    return value
+
+
+def run_fetch(parser, args):
+    from analysis.selection import score_selection, select_blocks, summarize_selection
+    from corpus.offsets import open_offset_index
+
+    index = open_offset_index(args.input_file, errors="ignore")
+    if index is None:
+        print(
+            f"No up-to-date offset index for {args.input_file}; "
+            f"run: python analyze.py offsets {args.input_file}"
+        )
+        exit(1)
+    with index:
+        try:
+            blocks = select_blocks(index, args.id or (), args.range)
+        except KeyError as e:
+            parser.error(e.args[0])
+    if args.score:
+        print_table(score_selection(blocks))
+    elif args.summary:
+        summarize_selection(blocks)
+    else:
+        for gid, block in blocks:
+            block_id = block.metadata.get("id")
+            print(f"# gid {gid}" + (f" ::id {block_id}" if block_id else ""))
+            print(block.amr + "\n")
+
+
 def main():
     parser = argparse.ArgumentParser(description="CHAI Fairness Project Analysis Tool")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
@@ -12,6 +118,17 @@ def main():
     parser_summary.add_argument(
         "input_file", type=str, help="Input AMR file for summary analysis"
     )
+    parser_summary.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Decode with penman even if a .gcache sidecar exists",
+    )
+    parser_summary.add_argument(
+        "--output",
+        type=str,
+        help="Also write one record per fairness occurrence and relation to this "
+        ".csv, .parquet or .arrow file",
+    )
 
     # centrality_score command
     parser_centrality = subparsers.add_parser(
@@ -23,21 +140,232 @@ def main():
     parser_centrality.add_argument(
         "--k", type=int, default=10, help="Number of top results to show (default: 10)"
     )
+    parser_centrality.add_argument(
+        "--workers",
+        type=positive_int,
+        default=1,
+        help="Number of scoring processes (default: 1, serial)",
+    )
+    parser_centrality.add_argument(
+        "--chunksize",
+        type=positive_int,
+        default=256,
+        help="Graphs sent to a worker at a time (default: 256)",
+    )
+    parser_centrality.add_argument(
+        "--engine",
+        choices=("graph", "batch"),
+        default="graph",
+        help="Score graphs one at a time, or chunk by chunk with the vectorized "
+        "CSR engine (same results; default: graph)",
+    )
+    parser_centrality.add_argument(
+        "--scores",
+        metavar="A,B,C",
+        help="Compute these registered scores (centrality, weighted_depth, "
+        "subtree, degree, reentrancy) in one pass, one column each, ranking by "
+        "the first; needs --engine graph (default: the centrality score only)",
+    )
+    parser_centrality.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Decode with penman even if a .gcache sidecar exists",
+    )
+    parser_centrality.add_argument(
+        "--output",
+        type=str,
+        help="Also write the score of every graph (gid, score, fairness_nodes) to "
+        "this .csv, .parquet or .arrow file",
+    )
+
+    # all command
+    parser_all = subparsers.add_parser(
+        "all", help="Summary and top K centrality in a single pass"
+    )
+    parser_all.add_argument("input_file", type=str, help="Input AMR file to analyze")
+    parser_all.add_argument(
+        "--k", type=int, default=10, help="Number of top results to show (default: 10)"
+    )
+    parser_all.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Decode with penman even if a .gcache sidecar exists",
+    )
+
+    # index command
+    parser_index = subparsers.add_parser(
+        "index", help="Build the inverted concept index queried by `query`"
+    )
+    parser_index.add_argument("input_file", type=str, help="Input AMR file to index")
+    parser_index.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Decode with penman even if a .gcache sidecar exists",
+    )
+
+    # query command
+    parser_query = subparsers.add_parser(
+        "query", help="Concept/role/parent-child pattern query on the concept index"
+    )
+    parser_query.add_argument("input_file", type=str, help="Indexed AMR file")
+    parser_query.add_argument("--concept", help="Concept of the variable, e.g. fairness")
+    parser_query.add_argument("--parent", help="Concept of the parent, e.g. require-01")
+    parser_query.add_argument("--role", help="Role from parent to child, e.g. :ARG1")
+    parser_query.add_argument("--child", help="Concept (or constant) of the child")
+    parser_query.add_argument(
+        "--position",
+        choices=("root", "interior", "leaf"),
+        help="Position of fairness occurrences",
+    )
+    parser_query.add_argument(
+        "--limit", type=int, default=20, help="Matches to show (default: 20)"
+    )
+
+    # offsets / fetch commands
+    parser_offsets = subparsers.add_parser(
+        "offsets", help="Build the byte-offset index used by `fetch` and --workers"
+    )
+    parser_offsets.add_argument("input_file", type=str, help="AMR file to index")
+    parser_fetch = subparsers.add_parser(
+        "fetch", help="Print, score or summarize graphs picked by ::id or position"
+    )
+    parser_fetch.add_argument(
+        "input_file", type=str, help="AMR file with an offset index"
+    )
+    parser_fetch.add_argument(
+        "--id", action="append", metavar="ID", help="`# ::id` of a graph (repeatable)"
+    )
+    parser_fetch.add_argument(
+        "--range",
+        type=gid_range,
+        metavar="START:STOP",
+        help="Graphs at positions START (included) to STOP (excluded)",
+    )
+    fetch_mode = parser_fetch.add_mutually_exclusive_group()
+    fetch_mode.add_argument(
+        "--score", action="store_true", help="Print their centrality scores"
+    )
+    fetch_mode.add_argument(
+        "--summary", action="store_true", help="Print their fairness summary"
+    )
+
+    for sub in (parser_summary, parser_centrality, parser_all):
+        sub.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Reuse per-block results stored in <input_file>.incremental.sqlite "
+            "and only analyze new or changed blocks",
+        )
+    for sub in (
+        parser_summary,
+        parser_centrality,
+        parser_all,
+        parser_index,
+        parser_fetch,
+    ):
+        sub.add_argument(
+            "--profile",
+            metavar="FILE",
+            help="Time each pipeline stage and write a report to FILE "
+            "(Prometheus text for .prom/.txt, JSON otherwise)",
+        )
 
     args = parser.parse_args()
 
-    if args.command == "summary":
-        from analysis import analyze_fairness_amr
+    if getattr(args, "incremental", False):
+        # incremental runs read and decode serially, from the AMR text
+        ignored = [
+            option
+            for option, value, default in (
+                ("--workers", getattr(args, "workers", 1), 1),
+                ("--chunksize", getattr(args, "chunksize", 256), 256),
+                ("--engine", getattr(args, "engine", "graph"), "graph"),
+                ("--no-cache", args.no_cache, False),
+            )
+            if value != default
+        ]
+        if ignored:
+            parser.error(f"{ignored[0]} cannot be combined with --incremental")
+
+    if getattr(args, "output", None):
+        from analysis.output import output_format
+
+        if args.incremental:
+            parser.error("--output cannot be combined with --incremental")
+        try:
+            output_format(args.output)
+        except (ValueError, ImportError) as e:
+            parser.error(str(e))
+
+    scores = None
+    if getattr(args, "scores", None) is not None:
+        from analysis.scoring import ScoreSet
 
-        analyze_fairness_amr(args.input_file)
+        if args.incremental:
+            parser.error("--scores cannot be combined with --incremental")
+        if args.engine == "batch":
+            parser.error("--scores needs --engine graph")
+        try:
+            scores = ScoreSet.parse(args.scores)
+        except ValueError as e:
+            parser.error(str(e))
+
+    profile = getattr(args, "profile", None)
+    if profile:
+        from corpus import profiling
+
+        profiling.enable()
+
+    if getattr(args, "incremental", False):
+        run_incremental(args)
+    elif args.command == "summary":
+        from analysis.summary import analyze_fairness_amr
+
+        analyze_fairness_amr(
+            args.input_file, use_cache=not args.no_cache, output=args.output
+        )
     elif args.command == "centrality_score":
-        from analysis import top_k_fairness_graphs
+        from analysis.centrality_score import top_k_fairness_graphs
 
-        print(top_k_fairness_graphs(args.input_file, args.k))
+        print_table(
+            top_k_fairness_graphs(
+                args.input_file,
+                args.k,
+                workers=args.workers,
+                chunksize=args.chunksize,
+                use_cache=not args.no_cache,
+                engine=args.engine,
+                output=args.output,
+                scores=scores,
+            )
+        )
+    elif args.command == "index":
+        from analysis.concept_index import build_concept_index
+
+        path = build_concept_index(args.input_file, use_cache=not args.no_cache)
+        print(f"Concept index written to {path}")
+    elif args.command == "query":
+        run_query(parser, args)
+    elif args.command == "offsets":
+        from corpus.offsets import build_offset_index
+
+        path = build_offset_index(args.input_file)
+        print(f"Offset index written to {path}")
+    elif args.command == "fetch":
+        run_fetch(parser, args)
+    elif args.command == "all":
+        from analysis.combined import analyze_all
+
+        print_table(analyze_all(args.input_file, args.k, use_cache=not args.no_cache))
     else:
         parser.print_help()
         exit(1)
 
+    if profile:
+        report = profiling.active().write(profile)
+        profiling.print_report(report)
+        print(f"Profile written to {profile}")
+
 
 if __name__ == "__main__":
     main()
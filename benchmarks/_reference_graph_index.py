@@ -0,0 +1,193 @@
+"""
+Frozen copy of GraphIndex (dicts of lists of tuples) and its consumers
+before the compact rewrite. Used by bench_graph_index.py as the reference
+output and the speed/memory baseline.
+"""
+
+import collections
+from functools import cached_property
+
+from analysis.centrality_score import ROLE_WEIGHTS
+from analysis.summary import FairnessContext, role_family
+from corpus.concepts import FAIRNESS_CONCEPTS, FAIRNESS_NODE_MATCHER
+
+
+def deinvert_triples(triples):
+    """
+    Apply penman's default-model de-inversion to NoOp triples: an edge
+    `(s, :X-of, t)` pointing at a variable becomes `(t, :X, s)`.
+    """
+    variables = {src for src, role, _ in triples if role == ":instance"}
+    out = []
+    for src, role, tgt in triples:
+        if role.endswith("-of") and role != ":instance" and tgt in variables:
+            out.append((tgt, role[:-3], src))
+        else:
+            out.append((src, role, tgt))
+    return out
+
+
+def build_graph_dict(triples):
+    adj = collections.defaultdict(list)
+    rev = collections.defaultdict(list)
+    for src, role, tgt in triples:
+        adj[src].append((role, tgt))
+        rev[tgt].append((role, src))
+    return adj, rev
+
+
+def find_fairness_nodes(triples, matcher=FAIRNESS_NODE_MATCHER):
+    return {src for src, role, tgt in triples if matcher.matches(tgt)}
+
+
+def shortest_distances_from_root(adj, root):
+    """Compute shortest BFS distances from root to all reachable nodes."""
+    dist = {root: 0}
+    queue = collections.deque([root])
+    while queue:
+        node = queue.popleft()
+        for _, tgt in adj[node]:
+            if tgt == node or tgt in dist:
+                continue
+            dist[tgt] = dist[node] + 1
+            queue.append(tgt)
+    return dist
+
+
+def get_incoming_roles(rev):
+    return {node: [r for r, _ in lst] for node, lst in rev.items()}
+
+
+class LegacyGraphIndex:
+    """
+    Lookup tables of one decoded AMR graph, built once and shared by the
+    summary counters and the centrality scorer.
+
+    `triples` are NoOp triples (as decoded with NoOpModel). The centrality
+    view (`adj`/`rev`) keeps them as-is, including `:instance` edges; the
+    summary view (`outgoing`/`incoming`) uses the default-model de-inverted
+    triples without `:instance` edges, like `penman.decode` would give.
+    """
+
+    def __init__(self, top, triples):
+        self.top = top
+        self.triples = triples
+
+    @classmethod
+    def from_graph(cls, g):
+        return cls(g.top, g.triples)
+
+    @cached_property
+    def inst(self):
+        """Variable -> concept."""
+        return {src: tgt for src, role, tgt in self.triples if role == ":instance"}
+
+    @cached_property
+    def _centrality_maps(self):
+        return build_graph_dict(self.triples)
+
+    @property
+    def adj(self):
+        return self._centrality_maps[0]
+
+    @property
+    def rev(self):
+        return self._centrality_maps[1]
+
+    @cached_property
+    def _summary_maps(self):
+        outgoing = collections.defaultdict(list)
+        incoming = collections.defaultdict(list)
+        for src, role, tgt in deinvert_triples(self.triples):
+            if role == ":instance":
+                continue
+            outgoing[src].append((role, tgt))
+            incoming[tgt].append((role, src))
+        return outgoing, incoming
+
+    @property
+    def outgoing(self):
+        return self._summary_maps[0]
+
+    @property
+    def incoming(self):
+        return self._summary_maps[1]
+
+    @cached_property
+    def fairness_vars(self):
+        """Variables whose concept is a fairness concept (FAIRNESS_CONCEPTS)."""
+        return [v for v, c in self.inst.items() if FAIRNESS_CONCEPTS.matches(c)]
+
+
+def legacy_score(index, graph_id, amr_str):
+    fairness_nodes = find_fairness_nodes(index.triples)
+    if not fairness_nodes:
+        return (graph_id, 0.0, 0, amr_str)
+
+    top = index.top
+    inst_map = index.inst
+    distances = shortest_distances_from_root(index.adj, top)
+    incoming_roles = get_incoming_roles(index.rev)
+
+    node_scores = []
+    for fn in fairness_nodes:
+        dist = distances.get(fn)
+        if dist is None:
+            continue
+        roles = incoming_roles.get(fn, [])
+        weight = max(
+            [ROLE_WEIGHTS[r] for r in roles],
+            default=1.0 if inst_map.get(top) else 0.4,
+        )
+
+        if fn == top:
+            weight, dist = 1.0, 0
+
+        node_scores.append(weight * (1 / (1 + dist)))
+
+    if not node_scores:
+        return (graph_id, 0.0, len(fairness_nodes), amr_str)
+
+    max_score = max(node_scores)
+
+    return (graph_id, max_score, len(fairness_nodes), amr_str)
+
+
+def legacy_fairness_contexts(index):
+    """Yield the FairnessContext records of every fairness variable of a graph."""
+    inst, outgoing, incoming = index.inst, index.outgoing, index.incoming
+
+    # Find all fairness-related variables
+    for v in index.fairness_vars:
+        concept = inst[v]
+        # --- Position ---
+        if v == index.top:
+            pos = "root"
+        else:
+            children = [t for (r, t) in outgoing.get(v, []) if r != ":instance"]
+            pos = "leaf" if not children else "interior"
+        yield FairnessContext(v, concept, pos, "self")
+
+        # --- Parent edges ---
+        for r, parent_v in incoming.get(v, []):
+            parent_concept = inst.get(parent_v, "(literal)")
+            yield FairnessContext(
+                v, concept, pos, "parent", r, role_family(r), parent_v, parent_concept
+            )
+
+            # --- Siblings under the same parent ---
+            for rc, sib_v in outgoing.get(parent_v, []):
+                if sib_v == v:
+                    continue
+                yield FairnessContext(
+                    v, concept, pos, "sibling", rc, role_family(rc), sib_v, inst.get(sib_v)
+                )
+
+        # --- Child edges ---
+        for r, child_v in outgoing.get(v, []):
+            if r == ":instance":
+                continue
+            child_concept = inst.get(child_v, "(literal)")
+            yield FairnessContext(
+                v, concept, pos, "child", r, role_family(r), child_v, child_concept
+            )
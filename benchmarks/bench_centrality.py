@@ -0,0 +1,90 @@
+"""
+Serial vs process-pool centrality scoring on a large synthetic corpus.
+
+The corpus is built by repeating the blocks of a seed AMR file, so it has the
+same graph-size distribution as real data. Also compares the per-graph and
+the vectorized batch engine, from the AMR text and from a graph cache.
+
+    python benchmarks/bench_centrality.py --copies 40 --workers 4
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analysis.centrality_score import top_k_fairness_graphs  # noqa: E402
+from corpus import iter_amr_blocks  # noqa: E402
+from corpus.cache import build_graph_cache  # noqa: E402
+
+
+def build_corpus(seed_path, copies, out_path):
+    blocks = [block.amr for block in iter_amr_blocks(seed_path)]
+    with open(out_path, "w", encoding="utf-8") as out:
+        for _ in range(copies):
+            for amr in blocks:
+                out.write(amr + "\n\n")
+    return len(blocks) * copies
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", default="data/fair_AMR-500_clean.amr")
+    parser.add_argument("--copies", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--chunksize", type=int, default=256)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_path = os.path.join(tmp, "synthetic.amr")
+        n_graphs = build_corpus(args.seed, args.copies, corpus_path)
+        print(f"Synthetic corpus: {n_graphs} graphs")
+
+        serial, t_serial = timed(top_k_fairness_graphs, corpus_path, args.k)
+        pooled, t_pooled = timed(
+            top_k_fairness_graphs,
+            corpus_path,
+            args.k,
+            workers=args.workers,
+            chunksize=args.chunksize,
+        )
+        batched, t_batched = timed(
+            top_k_fairness_graphs, corpus_path, args.k, engine="batch"
+        )
+
+        build_graph_cache(corpus_path)
+        cached, t_cached = timed(top_k_fairness_graphs, corpus_path, args.k)
+        cached_batch, t_cached_batch = timed(
+            top_k_fairness_graphs, corpus_path, args.k, engine="batch"
+        )
+
+    rows = [
+        ("serial", t_serial, serial),
+        (f"workers={args.workers}", t_pooled, pooled),
+        ("batch engine", t_batched, batched),
+        ("cache", t_cached, cached),
+        ("cache + batch engine", t_cached_batch, cached_batch),
+    ]
+    for name, seconds, result in rows:
+        print(
+            f"{name + ':':<22} {seconds:6.2f}s ({n_graphs / seconds:8.0f} graphs/s)"
+            f"  speedup {t_serial / seconds:6.2f}x  identical {serial.equals(result)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+remove_all_css: linear-time engine vs the previous implementation.
+
+Runs both on a deterministic regression corpus of small HTML/CSS snippets
+(outputs must match) and times them on large and pathological pages.
+
+    python benchmarks/bench_css.py --size 50000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from preprocessing.cleaning import remove_all_css  # noqa: E402
+from _reference_cleaning import legacy_remove_all_css  # noqa: E402
+from synthetic import HTML_PAGES  # noqa: E402
+
+SNIPPETS = [
+    "<style>", "</style>", "<STYLE type='text/css'>", ' style="color:red"',
+    " STYLE='margin:0'", '<link rel="stylesheet" href="a.css">', "@media screen",
+    "@import url(x.css);", "@", "{", "}", ";", ":", "a", "div.cls", " ", "\n",
+    "\t", "\n\n\n", "  \n", "contact@example.org", "<p>", "</p>", "text",
+    "<link ", "<LINK", " rel='stylesheet'", ">", "<style ", "</STYLE>",
+]
+
+
+def regression_corpus(n, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield "".join(rng.choice(SNIPPETS) for _ in range(rng.randint(0, 60)))
+
+
+def timed(fn, text):
+    start = time.perf_counter()
+    result = fn(text)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=50_000, help="Characters per page")
+    parser.add_argument("--regression", type=int, default=20_000, help="Snippets to compare")
+    args = parser.parse_args()
+
+    mismatches = sum(
+        remove_all_css(t) != legacy_remove_all_css(t)
+        for t in regression_corpus(args.regression)
+    )
+    print(f"regression corpus: {args.regression} snippets, {mismatches} mismatches")
+
+    pages = {name: make_page(args.size) for name, make_page in HTML_PAGES.items()}
+    for name, text in pages.items():
+        new, t_new = timed(remove_all_css, text)
+        old, t_old = timed(legacy_remove_all_css, text)
+        print(
+            f"{name:<18} {len(text):>9} chars  old {t_old:8.3f}s  new {t_new:8.3f}s"
+            f"  speedup {t_old / t_new:7.1f}x  identical {old == new}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Fast NoOp decoder (corpus.decode) vs penman.decode.
+
+Decodes every block of each input both ways, checks that tops and triples
+are identical (and that blocks penman rejects are rejected too), then
+compares decode times and reports how many blocks took the fast path.
+
+    python benchmarks/bench_decode.py                  # data/*.amr + synthetic
+    python benchmarks/bench_decode.py --input my.amr --blocks 0
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import penman  # noqa: E402
+from penman.models.noop import NoOpModel  # noqa: E402
+
+from corpus import iter_amr_blocks  # noqa: E402
+from corpus.decode import decode_noop, fast_decode  # noqa: E402
+from synthetic import generate_amr_corpus  # noqa: E402
+
+
+def penman_decode(amr):
+    return penman.decode(amr, model=NoOpModel())
+
+
+def decode_all(decode, amrs):
+    """(top, triples) of each block, or None when it does not decode."""
+    results = []
+    for amr in amrs:
+        try:
+            g = decode(amr)
+        except Exception:
+            results.append(None)
+        else:
+            results.append((g.top, g.triples))
+    return results
+
+
+def timed(fn, *args, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", action="append", help="AMR file (repeatable)")
+    parser.add_argument("--blocks", type=int, default=5000, help="Synthetic blocks")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)  # penman's missing-concept warnings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = args.input or sorted(glob.glob(str(ROOT / "data" / "*.amr")))
+        if args.blocks:
+            path = os.path.join(tmp, "synthetic.amr")
+            generate_amr_corpus(path, args.blocks, reentrancy=0.1)
+            inputs = [*inputs, path]
+
+        print(
+            f"{'input':<26} {'blocks':>7} {'fast path':>10} {'penman':>9}"
+            f" {'fast':>9} {'speed-up':>9}  identical"
+        )
+        all_identical = True
+        for path in inputs:
+            amrs = [block.amr for block in iter_amr_blocks(path)]
+            n_fast = sum(fast_decode(amr) is not None for amr in amrs)
+            t_penman, expected = timed(decode_all, penman_decode, amrs, repeat=args.repeat)
+            t_fast, got = timed(decode_all, decode_noop, amrs, repeat=args.repeat)
+            identical = got == expected
+            all_identical &= identical
+            print(
+                f"{Path(path).name:<26} {len(amrs):7d} {n_fast:10d}"
+                f" {t_penman * 1000:7.0f}ms {t_fast * 1000:7.0f}ms"
+                f" {t_penman / t_fast:8.1f}x  {identical}"
+            )
+    sys.exit(0 if all_identical else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Compact GraphIndex (integer ids, per-node edge numbers) vs the previous dict-based one.
+
+Decodes a corpus once, checks that scores and summary contexts are
+identical, then times building each index and using it, and measures the
+memory retained while holding every graph's index.
+
+    python benchmarks/bench_graph_index.py --blocks 5000
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import penman  # noqa: E402
+from penman.models.noop import NoOpModel  # noqa: E402
+
+from analysis.centrality_score import _score_graph_index  # noqa: E402
+from analysis.graph_index import GraphIndex  # noqa: E402
+from analysis.summary import fairness_contexts  # noqa: E402
+from corpus import iter_amr_blocks  # noqa: E402
+from _reference_graph_index import (  # noqa: E402
+    LegacyGraphIndex,
+    legacy_fairness_contexts,
+    legacy_score,
+)
+from synthetic import generate_amr_corpus  # noqa: E402
+
+
+def decode_all(amrs):
+    graphs = []
+    for amr in amrs:
+        try:
+            graphs.append(penman.decode(amr, model=NoOpModel()))
+        except Exception:
+            pass
+    return graphs
+
+
+def score(cls, graphs):
+    scorer = _score_graph_index if cls is GraphIndex else legacy_score
+    return [scorer(cls.from_graph(g), i, None) for i, g in enumerate(graphs)]
+
+
+def contexts(cls, graphs):
+    walk = fairness_contexts if cls is GraphIndex else legacy_fairness_contexts
+    return [list(walk(cls.from_graph(g))) for g in graphs]
+
+
+def both(cls, graphs):
+    scorer = _score_graph_index if cls is GraphIndex else legacy_score
+    walk = fairness_contexts if cls is GraphIndex else legacy_fairness_contexts
+    for i, g in enumerate(graphs):
+        index = cls.from_graph(g)
+        list(walk(index))
+        scorer(index, i, None)
+
+
+def materialize(index):
+    """Build every lookup table a run may use."""
+    if isinstance(index, GraphIndex):
+        index.edges, index.summary_edges
+    else:
+        index.inst, index.adj, index.outgoing, index.fairness_vars
+
+
+def retained_bytes(cls, amrs):
+    """Memory held by the indexes of all graphs, penman graphs dropped."""
+    gc.collect()
+    tracemalloc.start()
+    indexes = []
+    for g in decode_all(amrs):
+        index = cls.from_graph(g)
+        materialize(index)
+        indexes.append(index)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, len(indexes)
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", help="AMR file (default: a synthetic corpus)")
+    parser.add_argument("--blocks", type=int, default=5000, help="Synthetic blocks")
+    parser.add_argument("--fanout", type=int, default=1, help="Sentences per block")
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--reentrancy", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.input
+        if path is None:
+            path = os.path.join(tmp, "synthetic.amr")
+            generate_amr_corpus(
+                path, args.blocks, args.fanout, args.depth, 0.5, args.reentrancy
+            )
+        amrs = [block.amr for block in iter_amr_blocks(path)]
+
+    with contextlib.redirect_stderr(io.StringIO()):  # penman epigraph warnings
+        graphs = decode_all(amrs)
+        identical = score(GraphIndex, graphs) == score(LegacyGraphIndex, graphs) and (
+            contexts(GraphIndex, graphs) == contexts(LegacyGraphIndex, graphs)
+        )
+        n_triples = sum(len(g.triples) for g in graphs)
+        print(f"{len(graphs)} graphs, {n_triples} triples, identical results: {identical}\n")
+
+        print(f"{'':<24} {'dict-based':>12} {'compact':>12} {'ratio':>8}")
+        for name, fn in (
+            ("build all tables", lambda cls, gs: [materialize(cls.from_graph(g)) for g in gs]),
+            ("build + score", score),
+            ("build + summary walk", contexts),
+            ("build + both", both),
+        ):
+            old = timed(fn, LegacyGraphIndex, graphs)
+            new = timed(fn, GraphIndex, graphs)
+            print(f"{name:<24} {old:11.3f}s {new:11.3f}s {old / new:7.2f}x")
+
+        old, n = retained_bytes(LegacyGraphIndex, amrs)
+        new, _ = retained_bytes(GraphIndex, amrs)
+    print(
+        f"{'memory per graph':<24} {old / n / 1024:10.1f}KB {new / n / 1024:10.1f}KB"
+        f" {old / new:7.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
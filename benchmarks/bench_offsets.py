@@ -0,0 +1,85 @@
+"""
+Random access through the offset index vs scanning the AMR file.
+
+Builds the offset index of a synthetic corpus, then fetches a few graphs by
+`# ::id` and a range of graphs by position, both ways, and checks that the
+blocks are the same.
+
+    python benchmarks/bench_offsets.py --blocks 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import iter_amr_blocks  # noqa: E402
+from corpus.offsets import build_offset_index, open_offset_index  # noqa: E402
+from synthetic import generate_amr_corpus  # noqa: E402
+
+
+def timed(fn, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=50000)
+    parser.add_argument("--ids", type=int, default=5, help="Graphs fetched by id")
+    parser.add_argument("--range", type=int, default=100, help="Graphs in the range")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.amr")
+        generate_amr_corpus(path, args.blocks)
+        size_mb = os.path.getsize(path) / (1 << 20)
+        build, _ = timed(lambda: build_offset_index(path), repeat=1)
+        print(f"{args.blocks} blocks ({size_mb:.0f}MB), index built in {build:.2f}s\n")
+
+        rng = random.Random(0)
+        ids = {f"synthetic-{rng.randrange(args.blocks)}" for _ in range(args.ids)}
+        start = args.blocks // 2
+        stop = start + args.range
+
+        def scan_ids():
+            return [b for b in iter_amr_blocks(path) if b.metadata.get("id") in ids]
+
+        def scan_range():
+            return list(islice(iter_amr_blocks(path), start, stop))
+
+        with open_offset_index(path) as index:
+
+            def indexed_ids():
+                gids = sorted(g for block_id in ids for g in index.gids_of(block_id))
+                return [index.block(g) for g in gids]
+
+            def indexed_range():
+                return [block for _, block in index.blocks(start, stop)]
+
+            print(f"{'':<22} {'scan':>10} {'index':>10} {'speed-up':>9}")
+            for name, scan, indexed in (
+                (f"{len(ids)} graphs by id", scan_ids, indexed_ids),
+                (f"range of {args.range}", scan_range, indexed_range),
+            ):
+                t_scan, expected = timed(scan)
+                t_index, got = timed(indexed)
+                assert got == expected, name
+                print(
+                    f"{name:<22} {t_scan * 1000:8.1f}ms {t_index * 1000:8.2f}ms"
+                    f" {t_scan / t_index:8.0f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Several centrality scores in one feature sweep (analysis.scoring) vs one
+scoring pass per score, on pre-built GraphIndexes of a synthetic corpus.
+
+Checks that the "centrality" score of the sweep equals the default scorer
+on every graph, then times: the default scorer, a ScoreSet of every
+registered score, and each registered score scored on its own.
+
+    python benchmarks/bench_scores.py --blocks 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from analysis.centrality_score import score_graph_index  # noqa: E402
+from analysis.graph_index import iter_graph_records  # noqa: E402
+from analysis.scoring import SCORERS, ScoreSet  # noqa: E402
+from synthetic import generate_amr_corpus  # noqa: E402
+
+
+def score_all(records, scores=None):
+    return [score_graph_index(r.index, r.gid, scores=scores) for r in records]
+
+
+def timed(fn, *args, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.amr")
+        generate_amr_corpus(path, args.blocks, reentrancy=0.1)
+        records = [r for r in iter_graph_records(path) if r.index is not None]
+
+    t_default, expected = timed(score_all, records, repeat=args.repeat)
+    every = ScoreSet(SCORERS)
+    t_sweep, got = timed(score_all, records, every, repeat=args.repeat)
+    identical = [s[1] for s in expected] == [s[4][0] for s in got]
+    t_separate = sum(
+        timed(score_all, records, ScoreSet([name]), repeat=args.repeat)[0]
+        for name in SCORERS
+    )
+
+    n = len(SCORERS)
+    print(f"{len(records)} graphs, {n} registered scores\n")
+    print(f"default scorer (1 score)           {t_default * 1000:7.0f}ms")
+    print(f"one sweep, {n} scores                {t_sweep * 1000:7.0f}ms")
+    print(f"one pass per score, {n} passes       {t_separate * 1000:7.0f}ms\n")
+    print(f"centrality identical to the default scorer: {identical}")
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
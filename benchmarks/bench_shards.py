@@ -0,0 +1,126 @@
+"""
+Sharded run (shard, per-shard jobs in parallel processes, merge) vs one
+single-machine run, on a synthetic corpus.
+
+Runs the CLIs as subprocesses, one job per shard for `process` and
+`analyze` (as a scheduler would), checks that the merged sentences and
+report are identical to `preprocess.py multisentence` and
+`analyze.py all`, and reports the time of each step.
+
+    python benchmarks/bench_shards.py --blocks 20000 --shards 4 --jobs 4
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic import generate_amr_corpus  # noqa: E402
+
+
+def cli(*args):
+    """Run a project CLI and return its stdout."""
+    result = subprocess.run(
+        [sys.executable, *map(str, args)],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout
+
+
+def run_jobs(commands, jobs):
+    """Run CLI commands, at most `jobs` at a time."""
+    running = []
+    for command in commands:
+        if len(running) >= jobs:
+            running.pop(0).wait()
+        running.append(
+            subprocess.Popen(
+                [sys.executable, *map(str, command)],
+                cwd=ROOT,
+                stdout=subprocess.DEVNULL,
+            )
+        )
+    for proc in running:
+        if proc.wait() != 0:
+            raise RuntimeError(f"job failed: {proc.args}")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=20000)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--jobs", type=int, default=4, help="Shard jobs at a time")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.amr")
+        generate_amr_corpus(corpus, args.blocks)
+        single_out = os.path.join(tmp, "single.amr")
+        merged_out = os.path.join(tmp, "merged.amr")
+        shard_dir = os.path.join(tmp, "shards")
+
+        t_single_process, single_log = timed(
+            lambda: cli("preprocess.py", "multisentence", corpus, single_out)
+        )
+        t_single_analyze, single_report = timed(
+            lambda: cli("analyze.py", "all", corpus, "--k", args.k)
+        )
+        t_shard, _ = timed(
+            lambda: cli(
+                "shards.py", "shard", corpus, shard_dir, "--shards", args.shards
+            )
+        )
+        shards = sorted(Path(shard_dir).glob("part-*.amr"))
+        jobs = [
+            ("shards.py", step, shard)
+            for shard in shards
+            for step in ("process", "analyze")
+        ]
+        t_jobs, _ = timed(lambda: run_jobs(jobs, args.jobs))
+        t_merge_sentences, merged_log = timed(
+            lambda: cli("shards.py", "merge", shard_dir, "--sentences", merged_out)
+        )
+        t_merge_report, merged_report = timed(
+            lambda: cli(
+                "shards.py", "merge", shard_dir, "--report", "all", "--k", args.k
+            )
+        )
+
+        with open(single_out, "rb") as f, open(merged_out, "rb") as g:
+            same_sentences = f.read() == g.read()
+        same_counts = single_log.splitlines()[-1].split(" to ")[0] == (
+            merged_log.splitlines()[-1].split(" to ")[0]
+        )
+        same_report = single_report == merged_report
+
+    single = t_single_process + t_single_analyze
+    sharded = t_shard + t_jobs + t_merge_sentences + t_merge_report
+    print(f"{args.blocks} blocks, {args.shards} shards, {args.jobs} jobs at a time\n")
+    print(f"single run (multisentence + all)   {single:7.2f}s")
+    print(f"  shard                            {t_shard:7.2f}s")
+    print(f"  process + analyze jobs           {t_jobs:7.2f}s")
+    print(f"  merge sentences                  {t_merge_sentences:7.2f}s")
+    print(f"  merge report                     {t_merge_report:7.2f}s")
+    print(f"sharded run                        {sharded:7.2f}s\n")
+    print(f"identical sentences: {same_sentences and same_counts}")
+    print(f"identical report: {same_report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Start-up cost of every CLI subcommand on a tiny input.
+
+Each command runs in a fresh interpreter, as a job scheduler would start it,
+on a few synthetic blocks so that the time is dominated by imports. Also
+lists which heavy modules (pandas, numpy, penman, ...) the command loaded,
+from `python -X importtime`.
+
+    python benchmarks/bench_startup.py --repeat 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from synthetic import html_page, generate_amr_corpus  # noqa: E402
+
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "penman", "sqlite3", "concurrent.futures")
+
+
+def commands(tmp):
+    raw, amr, html_dir = tmp / "raw.amr", tmp / "tiny.amr", tmp / "html"
+    return {
+        "analyze --help": ["analyze.py", "--help"],
+        "analyze summary": ["analyze.py", "summary", amr, "--no-cache"],
+        "analyze centrality_score": ["analyze.py", "centrality_score", amr, "--no-cache"],
+        "analyze all": ["analyze.py", "all", amr, "--no-cache"],
+        "analyze index": ["analyze.py", "index", amr, "--no-cache"],
+        "analyze query": ["analyze.py", "query", amr, "--concept", "fair*"],
+        "preprocess multisentence": ["preprocess.py", "multisentence", raw, tmp / "out.amr"],
+        "preprocess remove_css": ["preprocess.py", "remove_css", html_dir, "--no-manifest"],
+    }
+
+
+def run(args, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + list(map(str, args))
+    return subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def heavy_imports(args):
+    """Heavy top-level modules imported by a command."""
+    loaded = set()
+    for line in run(args, importtime=True).stderr.splitlines():
+        if line.startswith("import time:"):
+            loaded.add(line.rsplit("|", 1)[1].strip())
+    return [m for m in HEAVY_MODULES if m in loaded]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per command")
+    parser.add_argument("--blocks", type=int, default=3, help="Blocks of the tiny input")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        generate_amr_corpus(tmp / "raw.amr", args.blocks)
+        run(["preprocess.py", "multisentence", tmp / "raw.amr", tmp / "tiny.amr"])
+        run(["analyze.py", "index", tmp / "tiny.amr", "--no-cache"])
+        os.mkdir(tmp / "html")
+        for i in range(args.blocks):
+            (tmp / "html" / f"page{i}.html").write_text(html_page(2000, seed=i))
+
+        print(f"{'command':<26} {'min':>8} {'median':>8}  heavy imports")
+        for name, cmd in commands(tmp).items():
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                run(cmd)
+                times.append(time.perf_counter() - start)
+            print(
+                f"{name:<26} {min(times) * 1000:6.0f}ms {statistics.median(times) * 1000:6.0f}ms"
+                f"  {', '.join(heavy_imports(cmd)) or '-'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Default vs streaming (`--stream`) multisentence pipeline on a directory of
+.amr files.
+
+Each run happens in a fresh process. Reports the wall time, the time until
+the first sentence is visible in the output file, and the peak RSS.
+
+    python benchmarks/bench_stream.py --files 8 --blocks 1000 --workers 2
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from synthetic import generate_amr_corpus  # noqa: E402
+
+
+def _run(input_dir, output, workers, stream):
+    """Runs in a fresh process."""
+    from preprocessing.multisentence import process_amr_file
+
+    first_output = None
+    done = threading.Event()
+    start = time.perf_counter()
+
+    def watch():
+        nonlocal first_output
+        while not done.wait(0.002):
+            if os.path.exists(output) and os.path.getsize(output) > 0:
+                first_output = time.perf_counter() - start
+                return
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        process_amr_file(input_dir, output, workers=workers, stream=stream)
+    seconds = time.perf_counter() - start
+    done.set()
+    watcher.join()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1 << 20) if sys.platform == "darwin" else rss / 1024
+    return seconds, first_output if first_output is not None else seconds, rss_mb
+
+
+def run(input_dir, output, workers, stream, repeat):
+    runs = []
+    for _ in range(repeat):
+        if os.path.exists(output):
+            os.unlink(output)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            runs.append(pool.submit(_run, input_dir, output, workers, stream).result())
+    return (
+        min(r[0] for r in runs),
+        min(r[1] for r in runs),
+        max(r[2] for r in runs),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=8, help="Input files")
+    parser.add_argument("--blocks", type=int, default=1000, help="Blocks per file")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = os.path.join(tmp, "corpus")
+        os.mkdir(input_dir)
+        for i in range(args.files):
+            path = os.path.join(input_dir, f"part{i:03d}.amr")
+            generate_amr_corpus(path, args.blocks, seed=i)
+        output = os.path.join(tmp, "out.amr")
+
+        print(f"{args.files} files x {args.blocks} blocks, workers={args.workers}")
+        print(f"{'mode':<10} {'wall':>8} {'first output':>13} {'peak RSS':>10}")
+        outputs = {}
+        for stream in (False, True):
+            seconds, first, rss = run(input_dir, output, args.workers, stream, args.repeat)
+            with open(output, "rb") as f:
+                outputs[stream] = f.read()
+            name = "stream" if stream else "default"
+            print(f"{name:<10} {seconds:7.2f}s {first:12.3f}s {rss:8.1f}MB")
+        print(f"identical output: {outputs[False] == outputs[True]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Benchmark harness: times each pipeline stage on synthetic inputs.
+
+Every stage runs in a fresh process, so its peak RSS is its own. Results
+(throughput, seconds, peak RSS per stage, plus the generator parameters and
+the environment) are printed and can be saved as JSON; --compare flags
+stages whose throughput dropped against an earlier JSON file.
+
+    python benchmarks/run_benchmarks.py --blocks 2000 --json bench.json
+    python benchmarks/run_benchmarks.py --blocks 2000 --compare bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from synthetic import HTML_PAGES, generate_amr_corpus  # noqa: E402
+
+
+# -----------------------------------------------------------
+# 1. Stages: fn(inputs, params) -> (items processed, unit)
+# -----------------------------------------------------------
+def stage_remove_all_css(inputs, params):
+    from preprocessing.cleaning import remove_all_css
+
+    total = 0
+    for make_page in HTML_PAGES.values():
+        page = make_page(params["css_size"])
+        remove_all_css(page)
+        total += len(page)
+    return total, "chars"
+
+
+def stage_split_sentences(inputs, params):
+    from corpus import iter_amr_blocks
+    from preprocessing.multisentence import split_all_snt_without_duplicates
+
+    n = 0
+    for block in iter_amr_blocks(inputs["raw"]):
+        split_all_snt_without_duplicates(block.amr)
+        n += 1
+    return n, "blocks"
+
+
+def stage_process_amr_file(inputs, params):
+    from preprocessing.multisentence import process_amr_file
+
+    out = inputs["raw"] + ".out"
+    process_amr_file(inputs["raw"], out, workers=params["workers"])
+    os.unlink(out)
+    return params["blocks"], "blocks"
+
+
+def stage_fairness_score(inputs, params):
+    from analysis.centrality_score import fairness_score_for_graph
+    from corpus import iter_amr_blocks
+
+    n = 0
+    for i, block in enumerate(iter_amr_blocks(inputs["processed"])):
+        fairness_score_for_graph(block.amr, i)
+        n += 1
+    return n, "graphs"
+
+
+def stage_top_k(inputs, params):
+    from analysis.centrality_score import top_k_fairness_graphs
+
+    top_k_fairness_graphs(inputs["processed"], 10, use_cache=False)
+    return _count_blocks(inputs["processed"]), "graphs"
+
+
+def stage_analyze_fairness_amr(inputs, params):
+    from analysis.summary import analyze_fairness_amr
+
+    analyze_fairness_amr(inputs["processed"], use_cache=False)
+    return _count_blocks(inputs["processed"]), "graphs"
+
+
+def _count_blocks(path):
+    from corpus import iter_amr_blocks
+
+    return sum(1 for _ in iter_amr_blocks(path))
+
+
+STAGES = {
+    "remove_all_css": stage_remove_all_css,
+    "split_all_snt_without_duplicates": stage_split_sentences,
+    "process_amr_file": stage_process_amr_file,
+    "fairness_score_for_graph": stage_fairness_score,
+    "top_k_fairness_graphs": stage_top_k,
+    "analyze_fairness_amr": stage_analyze_fairness_amr,
+}
+
+
+def _run_stage(name, inputs, params):
+    """Runs in a fresh worker process; stage output is discarded."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        items, unit = STAGES[name](inputs, params)
+        seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1 << 20) if sys.platform == "darwin" else rss / 1024
+    return {"items": items, "unit": unit, "seconds": seconds, "peak_rss_mb": rss_mb}
+
+
+def run_stage(name, inputs, params, repeat):
+    """Best time of `repeat` runs, each in a new process; worst peak RSS."""
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            runs.append(pool.submit(_run_stage, name, inputs, params).result())
+    best = min(runs, key=lambda r: r["seconds"])
+    return {
+        "items": best["items"],
+        "unit": best["unit"],
+        "seconds": round(best["seconds"], 4),
+        "throughput": round(best["items"] / best["seconds"], 1),
+        "peak_rss_mb": round(max(r["peak_rss_mb"] for r in runs), 1),
+    }
+
+
+# -----------------------------------------------------------
+# 2. Reporting and comparison
+# -----------------------------------------------------------
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def print_results(stages):
+    print(f"{'stage':<34} {'items':>9} {'seconds':>9} {'throughput':>18} {'peak RSS':>10}")
+    for name, r in stages.items():
+        rate = f"{r['throughput']:.0f} {r['unit']}/s"
+        print(
+            f"{name:<34} {r['items']:>9} {r['seconds']:>9.3f} {rate:>18} "
+            f"{r['peak_rss_mb']:>7.1f} MB"
+        )
+
+
+def compare(stages, baseline, tolerance):
+    """Print throughput ratios against a baseline run; return regressed stages."""
+    regressed = []
+    env = baseline["environment"]
+    print(f"\nAgainst {env.get('commit')} ({env['date']}):")
+    for name, r in stages.items():
+        old = baseline["stages"].get(name)
+        if old is None:
+            continue
+        ratio = r["throughput"] / old["throughput"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"{name:<34} {ratio:6.2f}x throughput{flag}")
+    return regressed
+
+
+# -----------------------------------------------------------
+# 3. Driver
+# -----------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=2000, help="AMR blocks to generate")
+    parser.add_argument("--fanout", type=int, default=3, help="Sentences per block")
+    parser.add_argument("--depth", type=int, default=4, help="Depth of sentence trees")
+    parser.add_argument("--fairness-density", type=float, default=0.3)
+    parser.add_argument("--reentrancy", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--css-size", type=int, default=200_000, help="Characters per page")
+    parser.add_argument("--workers", type=int, default=1, help="For process_amr_file")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage (best kept)")
+    parser.add_argument(
+        "--stages", default=",".join(STAGES), help="Comma-separated subset of stages"
+    )
+    parser.add_argument("--json", help="Save results to this JSON file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Throughput drop flagged as a regression (default: 0.10)",
+    )
+    args = parser.parse_args()
+
+    names = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in names if s not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+
+    params = {
+        "blocks": args.blocks,
+        "fanout": args.fanout,
+        "depth": args.depth,
+        "fairness_density": args.fairness_density,
+        "reentrancy": args.reentrancy,
+        "seed": args.seed,
+        "css_size": args.css_size,
+        "workers": args.workers,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = {
+            "raw": os.path.join(tmp, "synthetic.amr"),
+            "processed": os.path.join(tmp, "synthetic_processed.amr"),
+        }
+        start = time.perf_counter()
+        generate_amr_corpus(
+            inputs["raw"],
+            args.blocks,
+            args.fanout,
+            args.depth,
+            args.fairness_density,
+            args.reentrancy,
+            args.seed,
+        )
+        from preprocessing.multisentence import process_amr_file
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            process_amr_file(inputs["raw"], inputs["processed"])
+        print(
+            f"Synthetic corpus: {args.blocks} blocks, "
+            f"{os.path.getsize(inputs['raw']) / 1e6:.1f} MB "
+            f"(setup {time.perf_counter() - start:.1f}s)\n"
+        )
+
+        stages = {}
+        for name in names:
+            stages[name] = run_stage(name, inputs, params, args.repeat)
+
+    print_results(stages)
+    results = {"environment": environment(), "params": params, "stages": stages}
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.json}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["params"] != params:
+            print("\nWarning: baseline was run with different parameters")
+        if compare(stages, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
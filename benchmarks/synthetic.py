@@ -0,0 +1,232 @@
+"""
+Deterministic synthetic inputs for the benchmarks.
+
+- AMR corpora of configurable size, sentence fan-out (sentences per
+  multi-sentence block), tree depth and fairness density (share of sentences
+  mentioning fairness), in the PENMAN layout of data/*.amr
+- HTML/CSS pages, realistic and pathological
+
+The same arguments and seed always give the same output.
+
+    python benchmarks/synthetic.py amr corpus.amr --blocks 10000 --fanout 4
+    python benchmarks/synthetic.py html page.html --kind email-heavy --size 200000
+"""
+
+import argparse
+import random
+
+PREDICATES = (
+    "require-01", "ensure-01", "assess-01", "create-01", "use-01", "affect-01",
+    "decide-01", "protect-01", "discriminate-02", "evaluate-01", "develop-02",
+    "allow-01", "consider-02", "include-01", "mitigate-01", "note-01",
+)
+NOUNS = (
+    "system", "model", "data", "decision", "person", "group", "society",
+    "algorithm", "bias", "outcome", "policy", "law", "rule", "standard",
+    "transparency", "accountability", "privacy", "ethics", "we", "they",
+)
+FAIRNESS_CONCEPTS = ("fairness", "fair-01", "fairness", "fair-01", "fairness")
+CORE_ROLES = (":ARG0", ":ARG1", ":ARG1", ":ARG2", ":mod", ":domain", ":op1")
+NOUN_ROLES = (":mod", ":mod", ":poss", ":topic", ":ARG1-of", ":ARG0-of", ":op1")
+CONSTANTS = ((":polarity", "-"), (":quant", "2"), (":li", "1"), (":op1", '"EU"'))
+
+
+class _Block:
+    """Builds one block; variables are unique within it, as in real AMR."""
+
+    def __init__(self, rng, depth, reentrancy):
+        self.rng = rng
+        self.depth = depth
+        self.reentrancy = reentrancy
+        self.counts = {}
+        self.variables = []
+        self.words = []
+
+    def variable(self, concept):
+        letter = concept[0]
+        n = self.counts.get(letter, 0) + 1
+        self.counts[letter] = n
+        var = letter if n == 1 else f"{letter}{n}"
+        self.variables.append(var)
+        return var
+
+    def node(self, level, indent, fairness_at=None):
+        rng = self.rng
+        if fairness_at == level:
+            concept = rng.choice(FAIRNESS_CONCEPTS)
+            fairness_at = None
+        elif level < self.depth and rng.random() < 0.6:
+            concept = rng.choice(PREDICATES)
+        else:
+            concept = rng.choice(NOUNS)
+        self.words.append(concept.split("-")[0])
+        var = self.variable(concept)
+
+        lines = [f"({var} / {concept}"]
+        pad = " " * (indent + 6)
+        if level < self.depth:
+            n_children = rng.choice((1, 1, 2, 2, 3))
+            carrier = rng.randrange(n_children) if fairness_at is not None else -1
+            roles = CORE_ROLES if concept[-3:-2] == "-" else NOUN_ROLES
+            edges = set()
+            for i in range(n_children):
+                role = rng.choice(roles)
+                if i != carrier and rng.random() < self.reentrancy:
+                    target = rng.choice(self.variables)
+                    if (role, target) not in edges:
+                        edges.add((role, target))
+                        lines.append(f"{pad}{role} {target}")
+                    continue
+                child = self.node(
+                    level + 1, indent + 6, fairness_at if i == carrier else None
+                )
+                lines.append(f"{pad}{role} {child}")
+        elif fairness_at is not None:
+            child = self.node(level + 1, indent + 6, fairness_at)
+            lines.append(f"{pad}:mod {child}")
+        if rng.random() < 0.15:
+            role, value = rng.choice(CONSTANTS)
+            lines.append(f"{pad}{role} {value}")
+        return "\n".join(lines) + ")"
+
+
+def amr_block(rng, fanout=3, depth=4, fairness_density=0.3, reentrancy=0.05):
+    """(penman_text, sentence_text) of one block with `fanout` sentences."""
+    block = _Block(rng, depth, reentrancy)
+
+    def sentence(indent):
+        fairness_at = rng.randint(1, depth) if rng.random() < fairness_density else None
+        return block.node(0, indent, fairness_at)
+
+    if fanout <= 1:
+        amr = sentence(0)
+    else:
+        var = block.variable("multi-sentence")
+        parts = [f"({var} / multi-sentence"]
+        for i in range(1, fanout + 1):
+            parts.append(f"      :snt{i} {sentence(6)}")
+        amr = "\n".join(parts) + ")"
+    return amr, " ".join(block.words).capitalize() + "."
+
+
+def generate_amr_corpus(
+    path, n_blocks, fanout=3, depth=4, fairness_density=0.3, reentrancy=0.05, seed=0
+):
+    """Write n_blocks synthetic blocks with `# ::id` / `# ::snt` metadata."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as out:
+        for i in range(n_blocks):
+            amr, text = amr_block(rng, fanout, depth, fairness_density, reentrancy)
+            out.write(f"# ::id synthetic-{i}\n# ::snt {text}\n{amr}\n\n")
+    return n_blocks
+
+
+# -----------------------------------------------------------
+# HTML / CSS pages
+# -----------------------------------------------------------
+def html_page(size, seed=0):
+    """A scraped-looking page: prose, emails, inline styles and CSS."""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        kind = rng.random()
+        if kind < 0.5:
+            part = (
+                f"<p style=\"font-size:{rng.randint(8, 20)}px\">Fairness in AI "
+                f"matters; write to user{rng.randint(0, 999)}@example.org.</p>\n"
+            )
+        elif kind < 0.7:
+            part = ".c%d{color:#%06x;margin:0}" % (rng.randint(0, 99), rng.randint(0, 1 << 24))
+        elif kind < 0.8:
+            part = "@media (max-width:600px){.a{display:none}.b{width:100%}}\n"
+        elif kind < 0.9:
+            part = "<style>body{margin:0}</style>\n"
+        else:
+            part = '<link rel="stylesheet" href="s.css">\n\n\n'
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+def email_heavy_page(size):
+    """Many '@' before an unbalanced '{': each one rescanned the tail before."""
+    line = "Write to someone@example.org about fairness in automated decisions.\n"
+    half = size // 2
+    return line * (half // len(line)) + "{" + "no closing brace here. " * (half // 23)
+
+
+def long_statement_page(size):
+    """Long brace-free runs ending in ';' and a trailing CSS block."""
+    return ("x" * 2000 + ";") * (size // 2001) + "a{b}"
+
+
+def nested_braces_page(size):
+    """Deeply nested blocks: repeated regex passes peeled one level each."""
+    depth = size // 4
+    return "a{" * depth + "}" * depth
+
+
+def unclosed_style_page(size):
+    """Many <style> openings and a single closing tag at the very end."""
+    chunk = "<style>p{margin:0} text "
+    return chunk * (size // len(chunk)) + "</style>"
+
+
+def unclosed_style_tag_page(size):
+    """Many '<style' openings without '>', then a single '</style>'."""
+    chunk = "<style "
+    return chunk * (size // len(chunk)) + "</style>"
+
+
+def unclosed_link_page(size):
+    """Many '<link' openings with a single '>' at the very end."""
+    chunk = '<link href="s.css" '
+    return chunk * (size // len(chunk)) + ">"
+
+
+HTML_PAGES = {
+    "html": html_page,
+    "email-heavy": email_heavy_page,
+    "long-statements": long_statement_page,
+    "nested-braces": nested_braces_page,
+    "unclosed-style": unclosed_style_page,
+    "unclosed-style-tag": unclosed_style_tag_page,
+    "unclosed-link": unclosed_link_page,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="kind", required=True)
+    amr = sub.add_parser("amr", help="Synthetic AMR corpus")
+    amr.add_argument("output")
+    amr.add_argument("--blocks", type=int, default=1000)
+    amr.add_argument("--fanout", type=int, default=3, help="Sentences per block")
+    amr.add_argument("--depth", type=int, default=4, help="Depth of sentence trees")
+    amr.add_argument("--fairness-density", type=float, default=0.3)
+    amr.add_argument("--reentrancy", type=float, default=0.05)
+    amr.add_argument("--seed", type=int, default=0)
+    html = sub.add_parser("html", help="Synthetic HTML/CSS page")
+    html.add_argument("output")
+    html.add_argument("--kind", choices=sorted(HTML_PAGES), default="html")
+    html.add_argument("--size", type=int, default=50_000, help="Characters")
+    args = parser.parse_args()
+
+    if args.kind == "amr":
+        generate_amr_corpus(
+            args.output,
+            args.blocks,
+            args.fanout,
+            args.depth,
+            args.fairness_density,
+            args.reentrancy,
+            args.seed,
+        )
+    else:
+        with open(args.output, "w", encoding="utf-8") as out:
+            out.write(HTML_PAGES[args.kind](args.size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+from .reader import (
+    AmrBlock,
+    expand_amr_inputs,
+    iter_amr_blocks,
+    iter_amr_inputs,
+    parse_metadata,
+)
+from .parallel import BackgroundWriter, chunked, ordered_pool_map, threaded_iter
@@ -0,0 +1,199 @@
+"""
+Decode-once graph cache stored as a sidecar directory next to an AMR file.
+
+Layout of `<file>.gcache/` (all integer columns are raw little-endian arrays
+that are opened with numpy.memmap):
+
+- meta.json         source hash, counts, decode errors
+- strings.json      interned strings (variables, roles, concepts, constants)
+- triples.i32       (n_triples, 3) string ids of (source, role, target)
+- graph_offsets.i64 (n_graphs + 1) triple range of each graph
+- tops.i32          (n_graphs) string id of each graph's top variable
+- text.bin          utf-8 AMR text of every block, concatenated
+- text_offsets.i64  (n_graphs + 1) byte range of each block in text.bin
+
+Triples are the ones penman.decode(..., model=NoOpModel()) produces, so
+no role is de-inverted (see analysis.graph_index for the default-model view).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+from .reader import iter_amr_blocks
+
+CACHE_SUFFIX = ".gcache"
+CACHE_VERSION = 1
+NONE_ID = -1
+
+
+class CachedGraph(NamedTuple):
+    """Minimal stand-in for penman.Graph: only `top` and `triples`."""
+
+    top: str
+    triples: List[Tuple[str, str, Optional[str]]]
+
+
+def cache_path_for(amr_path) -> Path:
+    amr_path = Path(amr_path)
+    return amr_path.with_name(amr_path.name + CACHE_SUFFIX)
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_graph_cache(amr_path, cache_dir=None) -> Path:
+    """Decode every block of amr_path once and write its graph cache."""
+    import numpy as np
+
+    from .decode import decode_noop
+
+    amr_path = Path(amr_path)
+    cache_dir = Path(cache_dir) if cache_dir else cache_path_for(amr_path)
+    tmp_dir = cache_dir.with_name(cache_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    strings = {}
+
+    def intern(s):
+        if s is None:
+            return NONE_ID
+        sid = strings.get(s)
+        if sid is None:
+            sid = strings[s] = len(strings)
+        return sid
+
+    errors = {}
+    n_graphs = 0
+    n_triples = 0
+    text_pos = 0
+    with open(tmp_dir / "triples.i32", "wb") as triples_f, open(
+        tmp_dir / "graph_offsets.i64", "wb"
+    ) as goff_f, open(tmp_dir / "tops.i32", "wb") as tops_f, open(
+        tmp_dir / "text.bin", "wb"
+    ) as text_f, open(
+        tmp_dir / "text_offsets.i64", "wb"
+    ) as toff_f:
+        goff_f.write(np.int64(0).tobytes())
+        toff_f.write(np.int64(0).tobytes())
+        for block in iter_amr_blocks(amr_path):
+            try:
+                g = decode_noop(block.amr)
+                ids = [intern(x) for triple in g.triples for x in triple]
+                top = intern(g.top)
+            except Exception as e:
+                errors[n_graphs] = str(e)
+                ids, top = [], NONE_ID
+            triples_f.write(np.asarray(ids, dtype=np.int32).tobytes())
+            n_triples += len(ids) // 3
+            goff_f.write(np.int64(n_triples).tobytes())
+            tops_f.write(np.int32(top).tobytes())
+            encoded = block.amr.encode("utf-8")
+            text_f.write(encoded)
+            text_pos += len(encoded)
+            toff_f.write(np.int64(text_pos).tobytes())
+            n_graphs += 1
+
+    with open(tmp_dir / "strings.json", "w", encoding="utf-8") as f:
+        json.dump(list(strings), f, ensure_ascii=False)
+    meta = {
+        "version": CACHE_VERSION,
+        "source_sha256": file_digest(amr_path),
+        "n_graphs": n_graphs,
+        "n_triples": n_triples,
+        "errors": errors,
+    }
+    with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    return cache_dir
+
+
+def _memmap(path, dtype, shape):
+    import numpy as np
+
+    if not shape[0]:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+class GraphCache:
+    """Read-only, memory-mapped view over a graph cache directory."""
+
+    def __init__(self, cache_dir):
+        import numpy as np
+
+        cache_dir = Path(cache_dir)
+        self.cache_dir = cache_dir
+        with open(cache_dir / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(cache_dir / "strings.json", encoding="utf-8") as f:
+            self.strings = json.load(f)
+        n_graphs = self.meta["n_graphs"]
+        self.errors = {int(i): e for i, e in self.meta["errors"].items()}
+        self.triple_ids = _memmap(
+            cache_dir / "triples.i32", np.int32, (self.meta["n_triples"], 3)
+        )
+        self.graph_offsets = _memmap(
+            cache_dir / "graph_offsets.i64", np.int64, (n_graphs + 1,)
+        )
+        self.tops = _memmap(cache_dir / "tops.i32", np.int32, (n_graphs,))
+        self.text_offsets = _memmap(
+            cache_dir / "text_offsets.i64", np.int64, (n_graphs + 1,)
+        )
+        self._text_path = cache_dir / "text.bin"
+
+    def __len__(self):
+        return self.meta["n_graphs"]
+
+    def _string(self, sid):
+        return None if sid == NONE_ID else self.strings[sid]
+
+    def error(self, i) -> Optional[str]:
+        return self.errors.get(i)
+
+    def graph(self, i) -> CachedGraph:
+        start, stop = self.graph_offsets[i], self.graph_offsets[i + 1]
+        s = self._string
+        triples = [
+            (s(a), s(b), s(c)) for a, b, c in self.triple_ids[start:stop].tolist()
+        ]
+        return CachedGraph(s(int(self.tops[i])), triples)
+
+    def text(self, i) -> str:
+        start, stop = int(self.text_offsets[i]), int(self.text_offsets[i + 1])
+        with open(self._text_path, "rb") as f:
+            f.seek(start)
+            return f.read(stop - start).decode("utf-8")
+
+
+def load_graph_cache(amr_path) -> Optional[GraphCache]:
+    """
+    Return the sidecar cache of amr_path, or None if missing or stale.
+    numpy is only imported once a cache is actually opened.
+    """
+    cache_dir = cache_path_for(amr_path)
+    meta_path = cache_dir / "meta.json"
+    if not meta_path.is_file():
+        return None
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    if meta.get("source_sha256") != file_digest(amr_path):
+        return None
+    return GraphCache(cache_dir)
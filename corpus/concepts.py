@@ -0,0 +1,83 @@
+import re
+from typing import Iterable, Optional
+
+
+class ConceptMatcher:
+    """
+    Decide whether a graph string (concept, constant, variable or role) is one
+    of a set of terms.
+
+    - exact:    strings matched as a whole, e.g. "fairness"
+    - senses:   lemmas matched with any sense suffix, e.g. "fair" -> "fair-01"
+    - patterns: regexes searched anywhere in the string
+    - hint:     regex that must occur in the raw AMR text for any string of
+                the graph to match; derived from exact/senses when there are
+                no patterns. Used to reject blocks before decoding them.
+
+    Decisions are memoized per distinct string, so each concept of a corpus
+    is tested once however many graphs use it.
+    """
+
+    MEMO_LIMIT = 1_000_000
+
+    def __init__(
+        self,
+        exact: Iterable[str] = (),
+        senses: Iterable[str] = (),
+        patterns: Iterable[str] = (),
+        ignore_case: bool = False,
+        hint: Optional[str] = None,
+    ):
+        flags = re.IGNORECASE if ignore_case else 0
+        exact, senses, patterns = list(exact), list(senses), list(patterns)
+
+        whole = [re.escape(t) for t in exact] + [
+            re.escape(lemma) + r"-[0-9]+" for lemma in senses
+        ]
+        self._whole = re.compile("|".join(whole), flags) if whole else None
+        self._search = (
+            re.compile("|".join(f"(?:{p})" for p in patterns), flags)
+            if patterns
+            else None
+        )
+
+        if hint is None and not patterns:
+            literals = exact + senses
+            hint = "|".join(re.escape(t) for t in literals) if literals else None
+        self._hint = re.compile(hint, flags) if hint is not None else None
+        self._memo = {}
+
+    def matches(self, s) -> bool:
+        if not isinstance(s, str):
+            return False
+        hit = self._memo.get(s)
+        if hit is None:
+            hit = bool(
+                (self._whole is not None and self._whole.fullmatch(s))
+                or (self._search is not None and self._search.search(s))
+            )
+            if len(self._memo) >= self.MEMO_LIMIT:
+                self._memo.clear()
+            self._memo[s] = hit
+        return hit
+
+    def may_occur_in(self, text: str) -> bool:
+        """Cheap raw-text pre-check: False means no string of the graph matches."""
+        return self._hint is None or self._hint.search(text) is not None
+
+    def any_triple_matches(self, triples) -> bool:
+        return any(self.matches(x) for triple in triples for x in triple)
+
+
+# Concepts counted by the fairness summary.
+FAIRNESS_CONCEPTS = ConceptMatcher(exact=("fairness", "fair-01"))
+
+# Triple targets that mark a fairness node for centrality scoring.
+FAIRNESS_NODE_MATCHER = ConceptMatcher(
+    patterns=(r"Fairness|fairness|fair-[0-9]+",), ignore_case=True, hint="fair"
+)
+
+# Split sentences kept by preprocessing: the word "fairness" anywhere.
+FAIRNESS_MENTION = ConceptMatcher(
+    patterns=(r"\bfairness\b",), ignore_case=True, hint="fairness"
+)
@@ -0,0 +1,118 @@
+"""
+Fast NoOp decoding of the PENMAN subset our corpora use.
+
+`decode_noop(amr)` gives the `top` and `triples` that
+penman.decode(amr, model=NoOpModel()) would give. Graphs made only of
+nodes, concepts, roles, symbols and strings are read by `fast_decode`: the
+text is split into tokens by one regex and the triples are emitted in a
+single pass, with a stack of the open nodes. Anything else (alignments,
+comments, missing concepts or targets, malformed input) is left to penman,
+so results and error messages stay penman's.
+
+The fast path skips penman's tree and epigraph data: its graphs can be
+analysed but not re-encoded with their original layout. Use penman.decode
+where the graph is passed to penman.encode as is.
+"""
+
+import re
+
+from .cache import CachedGraph
+
+# Tokens as penman's lexer cuts them: strings, parentheses, slash, roles
+# (which may be a bare ":") and symbols; a lone '"' is an unexpected token.
+_TOKEN_RE = re.compile(
+    r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+    r"|[()/]"
+    r'|:[^ \t\r\n\v\f"()/:~]*'
+    r'|[^ \t\r\n\v\f"()/:~]+'
+    r"|[^ \t\r\n\v\f]"
+)
+# Alignments, comments and the line breaks penman splits on besides "\n".
+_UNSUPPORTED_RE = re.compile(r"[~#\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+
+_NOT_SYMBOL = frozenset('()/:"')
+_NOT_TARGET = frozenset("()/:")
+
+
+def fast_decode(amr):
+    """
+    (top, triples) of amr as penman's NoOp decoding gives them, or None if
+    amr is outside the subset this parser handles.
+    """
+    if _UNSUPPORTED_RE.search(amr):
+        return None
+    tokens = _TOKEN_RE.findall(amr)
+    if not tokens or tokens[0] != "(":
+        return None
+
+    triples = []
+    variables = set()
+    open_nodes = []  # variables of the nodes not closed yet
+    inverted = []  # positions of `:X-of` triples to a symbol
+    pos = 0
+    try:
+        while True:
+            # tokens[pos] opens a node: "(" var ["/" concept]
+            var = tokens[pos + 1]
+            if var[0] in _NOT_SYMBOL:
+                return None
+            if tokens[pos + 2] == "/":
+                concept = tokens[pos + 3]
+                if concept[0] in _NOT_TARGET or concept == '"':
+                    return None
+                pos += 4
+            else:
+                concept = None
+                pos += 2
+            triples.append((var, ":instance", concept))
+            variables.add(var)
+            open_nodes.append(var)
+
+            # edges of the innermost open node, until one opens a nested node
+            while open_nodes:
+                role = tokens[pos]
+                if role == ")":
+                    open_nodes.pop()
+                    pos += 1
+                    continue
+                if role[0] != ":":
+                    return None
+                target = tokens[pos + 1]
+                if target == "(":
+                    triples.append((open_nodes[-1], role, tokens[pos + 2]))
+                    pos += 1
+                    break
+                if target[0] in _NOT_TARGET or target == '"':
+                    return None
+                if role.endswith("-of"):
+                    inverted.append(len(triples))
+                triples.append((open_nodes[-1], role, target))
+                pos += 2
+            else:
+                break
+    except IndexError:
+        return None
+    # like penman, ignore whatever follows the top node (e.g. a stray line
+    # of sentence text)
+
+    # Like penman, an inverted role to another node's variable is turned
+    # around even by the NoOp model; to a constant it stays as written.
+    for i in inverted:
+        src, role, tgt = triples[i]
+        if tgt in variables:
+            triples[i] = (tgt, role[:-3], src)
+    return triples[0][0], triples
+
+
+def decode_noop(amr):
+    """
+    NoOp-decoded graph of amr: a CachedGraph from the fast path, or the
+    penman.Graph (raising penman's errors) when it does not apply.
+    """
+    decoded = fast_decode(amr)
+    if decoded is not None:
+        return CachedGraph(*decoded)
+    import penman
+    from penman.models.noop import NoOpModel
+
+    return penman.decode(amr, model=NoOpModel())
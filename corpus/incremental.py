@@ -0,0 +1,90 @@
+"""
+Per-block result store for incremental runs.
+
+Results are keyed by a hash of the block text, so a re-run over a corpus
+where a few documents were appended or edited only recomputes those blocks.
+Rows not seen during a run are pruned when the store is closed.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+STORE_SUFFIX = ".incremental.sqlite"
+
+
+def store_path_for(path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + STORE_SUFFIX)
+
+
+def block_digest(amr: str) -> str:
+    return hashlib.sha1(amr.encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    """
+    JSON results of one computation (`kind`) keyed by block digest.
+    Bump the version inside `kind` when the computation changes.
+    """
+
+    def __init__(self, path, kind):
+        import sqlite3  # only stores need it, not block_digest users
+
+        self.path = Path(path)
+        self.kind = kind
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " kind TEXT, digest TEXT, run INTEGER, value TEXT,"
+            " PRIMARY KEY (kind, digest))"
+        )
+        (last_run,) = self.conn.execute(
+            "SELECT COALESCE(MAX(run), 0) FROM results WHERE kind = ?", (kind,)
+        ).fetchone()
+        self.run = last_run + 1
+
+    def get(self, digest):
+        row = self.conn.execute(
+            "SELECT value FROM results WHERE kind = ? AND digest = ?",
+            (self.kind, digest),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute(
+            "UPDATE results SET run = ? WHERE kind = ? AND digest = ?",
+            (self.run, self.kind, digest),
+        )
+        return json.loads(row[0])
+
+    def put(self, digest, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+            (self.kind, digest, self.run, json.dumps(value)),
+        )
+
+    def close(self, prune=True):
+        """Commit, and drop results of blocks that are no longer in the input."""
+        if prune:
+            self.conn.execute(
+                "DELETE FROM results WHERE kind = ? AND run < ?", (self.kind, self.run)
+            )
+        self.conn.commit()
+        self.conn.close()
+
+    def report(self):
+        total = self.hits + self.misses
+        return f"{self.hits}/{total} blocks reused from {self.path}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.conn.close()
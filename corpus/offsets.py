@@ -0,0 +1,196 @@
+"""
+Byte-offset index of an AMR file, for random access without re-reading it.
+
+`build_offset_index` scans the file once and writes
+`<file>.offsets.sqlite`, with one row per block: its position (gid), its
+`# ::id`, the byte range of its lines and its metadata. `OffsetIndex` then
+reads any block, id or gid range through a memory map of the file, giving
+the same AmrBlock as corpus.iter_amr_blocks. Pool workers can each take a
+gid range of one large file and read it themselves.
+
+The index is tied to the file's size and modification time; it is ignored
+once the file changes.
+"""
+
+import io
+import json
+import mmap
+import os
+import sqlite3
+from pathlib import Path
+
+from .reader import AmrBlock, parse_metadata
+
+OFFSETS_SUFFIX = ".offsets.sqlite"
+OFFSETS_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE blocks (
+    gid INTEGER PRIMARY KEY, id TEXT, start INTEGER, length INTEGER, metadata TEXT
+);
+"""
+
+
+def offsets_path_for(path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + OFFSETS_SUFFIX)
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return f"{OFFSETS_VERSION}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def scan_block_offsets(filepath):
+    """
+    Yield (start, length, metadata) of every block of filepath, with the
+    block boundaries of iter_amr_blocks: the byte range runs from the
+    block's first line to the end of its last non-blank line.
+    """
+    pos = 0
+    start = end = None
+    current_meta = {}
+    pending_meta = {}
+    # newline="" splits lines like the reader does but keeps the line ends,
+    # so that the encoded lengths add up to byte offsets.
+    with open(
+        filepath, "r", encoding="utf-8", errors="surrogateescape", newline=""
+    ) as f:
+        for line in f:
+            size = len(line.encode("utf-8", "surrogateescape"))
+            stripped = line.strip()
+            if stripped.startswith("#"):
+                pending_meta.update(parse_metadata(stripped))
+            elif stripped.startswith("("):
+                if start is not None:
+                    yield start, end - start, current_meta
+                current_meta, pending_meta = pending_meta, {}
+                start, end = pos, pos + size
+            elif start is not None and stripped:
+                end = pos + size
+            pos += size
+    if start is not None:
+        yield start, end - start, current_meta
+
+
+def block_text(raw: str) -> str:
+    """The AMR of a block's raw lines, as iter_amr_blocks joins them."""
+    lines = (line.strip() for line in io.StringIO(raw, newline=None))
+    return "\n".join(s for s in lines if s and not s.startswith("#"))
+
+
+def build_offset_index(amr_path, batch_size=10000) -> Path:
+    """Write the offset index of amr_path next to it and return its path."""
+    path = offsets_path_for(amr_path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    if tmp.exists():
+        tmp.unlink()
+    stamp = _source_stamp(amr_path)
+
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(SCHEMA)
+        rows = []
+        n_blocks = 0
+        for gid, (start, length, meta) in enumerate(scan_block_offsets(amr_path)):
+            metadata = json.dumps(meta, ensure_ascii=False) if meta else None
+            rows.append((gid, meta.get("id"), start, length, metadata))
+            n_blocks += 1
+            if len(rows) >= batch_size:
+                conn.executemany("INSERT INTO blocks VALUES (?, ?, ?, ?, ?)", rows)
+                rows.clear()
+        conn.executemany("INSERT INTO blocks VALUES (?, ?, ?, ?, ?)", rows)
+        conn.execute("CREATE INDEX blocks_id ON blocks (id)")
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("source", stamp), ("n_blocks", str(n_blocks))],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    return path
+
+
+class OffsetIndex:
+    """
+    Random access to the blocks of an AMR file by gid (position) or
+    `# ::id`. Use `open_offset_index`, which checks that the index is up to
+    date; close it (or use it as a context manager) when done.
+    """
+
+    def __init__(self, amr_path, errors="strict"):
+        self.amr_path = Path(amr_path)
+        self.errors = errors
+        self.conn = sqlite3.connect(offsets_path_for(amr_path))
+        (n_blocks,) = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'n_blocks'"
+        ).fetchone()
+        self.n_blocks = int(n_blocks)
+        self._map = None
+        if os.path.getsize(self.amr_path):
+            with open(self.amr_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self.n_blocks
+
+    def _block(self, start, length, metadata):
+        raw = self._map[start : start + length].decode("utf-8", self.errors)
+        return AmrBlock(block_text(raw), json.loads(metadata) if metadata else {})
+
+    def block(self, gid) -> AmrBlock:
+        row = self.conn.execute(
+            "SELECT start, length, metadata FROM blocks WHERE gid = ?", (gid,)
+        ).fetchone()
+        if row is None:
+            raise IndexError(f"no block {gid} in {self.amr_path}")
+        return self._block(*row)
+
+    def blocks(self, start=0, stop=None):
+        """Yield (gid, AmrBlock) for the gids in [start, stop), in order."""
+        stop = self.n_blocks if stop is None else min(stop, self.n_blocks)
+        rows = self.conn.execute(
+            "SELECT gid, start, length, metadata FROM blocks"
+            " WHERE gid >= ? AND gid < ? ORDER BY gid",
+            (start, stop),
+        )
+        for gid, *row in rows:
+            yield gid, self._block(*row)
+
+    def gids_of(self, block_id) -> list:
+        """Gids of the blocks whose `# ::id` is block_id (ids may repeat)."""
+        rows = self.conn.execute(
+            "SELECT gid FROM blocks WHERE id = ? ORDER BY gid", (block_id,)
+        )
+        return [gid for (gid,) in rows]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_offset_index(amr_path, errors="strict"):
+    """OffsetIndex of amr_path, or None if it is missing or out of date."""
+    path = offsets_path_for(amr_path)
+    if not path.is_file():
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        finally:
+            conn.close()
+        if row is None or row[0] != _source_stamp(amr_path):
+            return None
+    except (OSError, sqlite3.Error):
+        return None
+    return OffsetIndex(amr_path, errors)
@@ -0,0 +1,120 @@
+import queue
+import threading
+from collections import deque
+from itertools import islice
+
+from . import profiling
+
+
+def chunked(items, size):
+    """Yield lists of up to `size` consecutive items from any iterable."""
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def ordered_pool_map(pool, fn, items, window):
+    """
+    Like pool.map, but keeps at most `window` tasks in flight. When profiling
+    is on, the workers' stage times and counters are merged into it.
+    """
+    task = profiling.pooled(fn)
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(task, item))
+        if len(pending) >= window:
+            yield profiling.merged(pending.popleft().result())
+    while pending:
+        yield profiling.merged(pending.popleft().result())
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+_END = object()
+
+
+def threaded_iter(items, maxsize):
+    """
+    Iterate `items` in a background thread, at most `maxsize` items ahead of
+    the consumer: the producer blocks while the queue is full. Errors of
+    the producer are raised in the consumer.
+    """
+    q = queue.Queue(maxsize)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failure(e))
+        else:
+            put(_END)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while (item := q.get()) is not _END:
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()  # the consumer may stop early
+        thread.join()
+
+
+class BackgroundWriter:
+    """
+    Text sink whose writes to `f` happen in a background thread, with at
+    most `maxsize` pending; `f` is flushed whenever nothing is pending, so
+    output shows up as soon as it is produced. Use as a context manager.
+    """
+
+    def __init__(self, f, maxsize=1024):
+        self._f = f
+        self._queue = queue.Queue(maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, text):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(text)
+
+    def _run(self):
+        while (text := self._queue.get()) is not None:
+            if self._error is not None:
+                continue  # keep draining so that writers never block
+            try:
+                self._f.write(text)
+                if self._queue.empty():
+                    self._f.flush()
+            except Exception as e:
+                self._error = e
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        self._f.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
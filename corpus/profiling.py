@@ -0,0 +1,261 @@
+"""
+Opt-in run instrumentation: stage timers, counters and the slowest blocks.
+
+Pipeline code reports through the module-level hooks:
+
+    with profiling.stage("decode"):
+        g = penman.decode(amr)
+    profiling.count("decode_failures")
+    with profiling.block(gid, block_id):
+        ...
+
+Profiling is off unless `enable()` was called; the hooks then return a
+shared no-op context manager or return at once, so instrumented code pays
+one global lookup per call. Work done in pool workers is collected through
+`ordered_pool_map`, which sends each worker's counts back to the parent.
+"""
+
+import contextlib
+import heapq
+import json
+import time
+from pathlib import Path
+
+_NULL = contextlib.nullcontext()
+_active = None
+
+
+class Profiler:
+    """Accumulated stage times, counters and the `top_n` slowest blocks."""
+
+    def __init__(self, top_n=10):
+        self.top_n = top_n
+        self.started = time.perf_counter()
+        self.stages = {}  # name -> [calls, seconds]
+        self.counters = {}
+        self.slowest = []  # min-heap of (seconds, gid, block_id)
+
+    def add_time(self, name, seconds, calls=1):
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [calls, seconds]
+        else:
+            entry[0] += calls
+            entry[1] += seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_block(self, seconds, gid, block_id):
+        item = (seconds, -1 if gid is None else gid, block_id)
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def snapshot(self) -> dict:
+        return {
+            "stages": {k: list(v) for k, v in self.stages.items()},
+            "counters": dict(self.counters),
+            "slowest": list(self.slowest),
+        }
+
+    def merge(self, snapshot) -> None:
+        """Add the counts of a snapshot taken in another process."""
+        for name, (calls, seconds) in snapshot["stages"].items():
+            self.add_time(name, seconds, calls)
+        for name, n in snapshot["counters"].items():
+            self.count(name, n)
+        for seconds, gid, block_id in snapshot["slowest"]:
+            self.add_block(seconds, None if gid == -1 else gid, block_id)
+
+    def report(self) -> dict:
+        stages = sorted(self.stages.items(), key=lambda kv: -kv[1][1])
+        return {
+            "wall_seconds": time.perf_counter() - self.started,
+            "stages": {
+                name: {"calls": calls, "seconds": seconds}
+                for name, (calls, seconds) in stages
+            },
+            "counters": dict(sorted(self.counters.items())),
+            "slowest_blocks": [
+                {"gid": None if gid == -1 else gid, "id": block_id, "seconds": seconds}
+                for seconds, gid, block_id in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+    def write(self, path) -> dict:
+        """Write the report as Prometheus text (.prom, .txt) or JSON."""
+        report = self.report()
+        path = Path(path)
+        if path.suffix in (".prom", ".txt"):
+            text = prometheus_text(report)
+        else:
+            text = json.dumps(report, indent=2) + "\n"
+        path.write_text(text, encoding="utf-8")
+        return report
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(report, prefix="chai") -> str:
+    lines = [
+        f"# HELP {prefix}_run_seconds Wall-clock time of the run.",
+        f"# TYPE {prefix}_run_seconds gauge",
+        f"{prefix}_run_seconds {report['wall_seconds']:.6f}",
+        f"# HELP {prefix}_stage_seconds_total Time spent in each pipeline stage.",
+        f"# TYPE {prefix}_stage_seconds_total counter",
+    ]
+    for name, s in report["stages"].items():
+        lines.append(f'{prefix}_stage_seconds_total{{stage="{_label(name)}"}} {s["seconds"]:.6f}')
+    lines += [
+        f"# HELP {prefix}_stage_calls_total Number of times each stage ran.",
+        f"# TYPE {prefix}_stage_calls_total counter",
+    ]
+    for name, s in report["stages"].items():
+        lines.append(f'{prefix}_stage_calls_total{{stage="{_label(name)}"}} {s["calls"]}')
+    lines += [
+        f"# HELP {prefix}_events_total Counted events (blocks, decode failures, ...).",
+        f"# TYPE {prefix}_events_total counter",
+    ]
+    for name, n in report["counters"].items():
+        lines.append(f'{prefix}_events_total{{event="{_label(name)}"}} {n}')
+    lines += [
+        f"# HELP {prefix}_slow_block_seconds Processing time of the slowest blocks.",
+        f"# TYPE {prefix}_slow_block_seconds gauge",
+    ]
+    for rank, b in enumerate(report["slowest_blocks"], 1):
+        lines.append(
+            f'{prefix}_slow_block_seconds{{rank="{rank}",gid="{b["gid"]}",'
+            f'id="{_label(b["id"])}"}} {b["seconds"]:.6f}'
+        )
+    return "\n".join(lines) + "\n"
+
+
+def print_report(report, max_items=10) -> None:
+    wall = report["wall_seconds"]
+    print(f"\n=== Profile ({wall:.2f}s wall) ===")
+    for name, s in list(report["stages"].items())[:max_items]:
+        share = s["seconds"] / wall if wall > 0 else 0.0
+        print(f"  {name:<14} {s['seconds']:9.3f}s {share:6.1%}  ({s['calls']} calls)")
+    for name, n in report["counters"].items():
+        print(f"  {name}: {n}")
+    if report["slowest_blocks"]:
+        print("  slowest blocks:")
+        for b in report["slowest_blocks"][:max_items]:
+            label = b["gid"] if b["id"] is None else f"{b['gid']} ({b['id']})"
+            print(f"    {label}: {b['seconds'] * 1000:.1f} ms")
+
+
+# -----------------------------------------------------------
+# Hooks used by the pipeline (no-ops while profiling is off)
+# -----------------------------------------------------------
+class _Timer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.add_time(self.name, time.perf_counter() - self.start)
+
+
+class _BlockTimer:
+    __slots__ = ("profiler", "gid", "block_id", "start")
+
+    def __init__(self, profiler, gid, block_id):
+        self.profiler = profiler
+        self.gid = gid
+        self.block_id = block_id
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.add_block(time.perf_counter() - self.start, self.gid, self.block_id)
+
+
+def enable(top_n=10) -> Profiler:
+    global _active
+    _active = Profiler(top_n)
+    return _active
+
+
+def disable() -> None:
+    global _active
+    _active = None
+
+
+def active():
+    """The running Profiler, or None."""
+    return _active
+
+
+def stage(name):
+    """Context manager adding its duration to stage `name`."""
+    return _NULL if _active is None else _Timer(_active, name)
+
+
+def count(name, n=1) -> None:
+    if _active is not None:
+        _active.count(name, n)
+
+
+def block(gid, block_id=None):
+    """Context manager timing one block for the slowest-blocks list."""
+    return _NULL if _active is None else _BlockTimer(_active, gid, block_id)
+
+
+def timed_iter(items, name):
+    """Iterate items, adding the time spent producing each one to `name`."""
+    if _active is None:
+        return items
+    return _timed_iter(iter(items), name)
+
+
+def _timed_iter(items, name):
+    while True:
+        with stage(name):
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+        yield item
+
+
+class _Profiled:
+    """Picklable wrapper running fn under a fresh Profiler in a pool worker."""
+
+    def __init__(self, fn, top_n):
+        self.fn = fn
+        self.top_n = top_n
+
+    def __call__(self, item):
+        global _active
+        previous = _active
+        _active = Profiler(self.top_n)
+        try:
+            result = self.fn(item)
+            return result, _active.snapshot()
+        finally:
+            _active = previous
+
+
+def pooled(fn):
+    """fn to submit to a process pool; see `merged`."""
+    return fn if _active is None else _Profiled(fn, _active.top_n)
+
+
+def merged(result):
+    """Unwrap the result of a `pooled` call, merging the worker's counts."""
+    if _active is None:
+        return result
+    result, snapshot = result
+    _active.merge(snapshot)
+    return result
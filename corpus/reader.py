@@ -0,0 +1,80 @@
+import glob
+import re
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+METADATA_REGEX = re.compile(r"::(\S+)[ \t]*(.*?)(?=\s+::\S|$)")
+
+
+class AmrBlock(NamedTuple):
+    """One Penman graph as read from disk, with its `# ::key value` metadata."""
+
+    amr: str
+    metadata: dict
+
+
+def parse_metadata(line: str) -> dict:
+    """Parse a comment line such as `# ::id 3 ::date 2024` into a dict."""
+    return {key: value.strip() for key, value in METADATA_REGEX.findall(line)}
+
+
+def iter_amr_blocks(filepath, errors: str = "strict") -> Iterator[AmrBlock]:
+    """
+    Lazily yield the AMR blocks of a .amr file.
+
+    A block starts at a line beginning with '(' and runs until the next one.
+    Blank lines and junk lines before the first '(' are skipped. Metadata
+    comments (`# ::id`, `# ::snt`, ...) seen before a block are attached to it.
+    Only the current block is held in memory.
+    """
+    current = []
+    current_meta = {}
+    pending_meta = {}
+
+    with open(filepath, "r", encoding="utf-8", errors=errors) as f:
+        for line in f:
+            stripped = line.strip()
+
+            if stripped.startswith("#"):
+                pending_meta.update(parse_metadata(stripped))
+                continue
+
+            if stripped.startswith("("):
+                if current:
+                    yield AmrBlock("\n".join(current), current_meta)
+                    current = []
+                current_meta, pending_meta = pending_meta, {}
+                current.append(stripped)
+            elif current and stripped:
+                current.append(stripped)
+
+    if current:
+        yield AmrBlock("\n".join(current), current_meta)
+
+
+def expand_amr_inputs(inputs) -> list:
+    """
+    Files named by `inputs`, a path or a list of paths: a directory stands
+    for the .amr files it contains, a glob pattern for its matches (each in
+    sorted order). Raises FileNotFoundError when an input names no file.
+    """
+    if isinstance(inputs, (str, Path)):
+        inputs = [inputs]
+    files = []
+    for item in map(str, inputs):
+        if Path(item).is_dir():
+            matches = sorted(p for p in Path(item).glob("*.amr") if p.is_file())
+        elif Path(item).is_file():
+            matches = [Path(item)]
+        else:
+            matches = sorted(Path(p) for p in glob.glob(item) if Path(p).is_file())
+        if not matches:
+            raise FileNotFoundError(f"no AMR file matches {item}")
+        files.extend(matches)
+    return files
+
+
+def iter_amr_inputs(paths, errors: str = "strict") -> Iterator[AmrBlock]:
+    """iter_amr_blocks over several files, one after the other."""
+    for path in paths:
+        yield from iter_amr_blocks(path, errors)
@@ -0,0 +1,138 @@
+"""
+Split a corpus into shards that can be processed on different machines.
+
+`shard_amr_files` cuts the blocks of one or more .amr files, in order, into
+N contiguous shards of about the same size (in AMR text) and writes them to
+a directory with a `shards.json` manifest. Each block is written back with
+its `# ::key value` metadata, so corpus.iter_amr_blocks reads the same
+blocks from the shards as from the inputs; a block's position in the whole
+corpus (its gid) is the shard's `first_gid` plus its position in the shard.
+
+Work done on a shard is saved next to it as a partial result (see
+analysis.partials and preprocessing.multisentence.merge_sentence_files),
+stamped with the shard file's size and modification time so that a merge
+does not mix in results of an older sharding.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+from .reader import AmrBlock, iter_amr_inputs
+
+MANIFEST_NAME = "shards.json"
+SHARDS_VERSION = 1
+
+
+class Shard(NamedTuple):
+    path: Path
+    first_gid: int
+    n_blocks: int
+
+
+class ShardManifest(NamedTuple):
+    directory: Path
+    sources: list  # input files, as given when sharding
+    n_blocks: int
+    shards: list  # of Shard, in corpus order
+
+    def shard_of(self, path) -> Shard:
+        """The Shard of a shard file; ValueError if it is not one of them."""
+        name = Path(path).name
+        for shard in self.shards:
+            if shard.path.name == name:
+                return shard
+        raise ValueError(f"{path} is not a shard listed in {self.directory}")
+
+
+def shard_name(i, n_shards) -> str:
+    return f"part-{i:05d}-of-{n_shards:05d}.amr"
+
+
+def shard_stamp(path) -> str:
+    """Identifies one version of a shard file (size and modification time)."""
+    st = os.stat(path)
+    return f"{SHARDS_VERSION}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def format_block(block: AmrBlock) -> str:
+    """A block as text that iter_amr_blocks reads back unchanged."""
+    meta = "".join(f"# ::{key} {value}\n" for key, value in block.metadata.items())
+    return f"{meta}{block.amr}\n\n"
+
+
+def _block_size(block):
+    return len(block.amr) + 1
+
+
+def shard_amr_files(inputs, shard_dir, n_shards, errors="surrogateescape"):
+    """
+    Write the blocks of `inputs` (files, in order) to n_shards shard files in
+    shard_dir and return the ShardManifest. Each block goes to the shard
+    that holds the middle of its text, so shards are contiguous and hold
+    about the same amount of AMR text. Reads the inputs twice.
+    """
+    if n_shards < 1:
+        raise ValueError("n_shards must be at least 1")
+    inputs = [str(path) for path in inputs]
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    total = sum(map(_block_size, iter_amr_inputs(inputs, errors)))
+    counts = [0] * n_shards
+    files = [
+        open(
+            shard_dir / shard_name(i, n_shards),
+            "w",
+            encoding="utf-8",
+            errors=errors,
+        )
+        for i in range(n_shards)
+    ]
+    try:
+        done = 0
+        for block in iter_amr_inputs(inputs, errors):
+            size = _block_size(block)
+            i = min(n_shards - 1, (2 * done + size) * n_shards // (2 * total))
+            files[i].write(format_block(block))
+            counts[i] += 1
+            done += size
+    finally:
+        for f in files:
+            f.close()
+
+    first_gids = [sum(counts[:i]) for i in range(n_shards)]
+    manifest = {
+        "version": SHARDS_VERSION,
+        "sources": inputs,
+        "n_blocks": sum(counts),
+        "shards": [
+            {"path": shard_name(i, n_shards), "first_gid": first, "n_blocks": n}
+            for i, (first, n) in enumerate(zip(first_gids, counts))
+        ],
+    }
+    tmp = shard_dir / f".{MANIFEST_NAME}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+    os.replace(tmp, shard_dir / MANIFEST_NAME)
+    return load_manifest(shard_dir)
+
+
+def load_manifest(shard_dir) -> ShardManifest:
+    """ShardManifest of shard_dir; FileNotFoundError/ValueError if unusable."""
+    shard_dir = Path(shard_dir)
+    with open(shard_dir / MANIFEST_NAME, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != SHARDS_VERSION:
+        raise ValueError(f"{shard_dir / MANIFEST_NAME} has an unsupported version")
+    shards = [
+        Shard(shard_dir / s["path"], s["first_gid"], s["n_blocks"])
+        for s in data["shards"]
+    ]
+    return ShardManifest(shard_dir, data["sources"], data["n_blocks"], shards)
+
+
+def manifest_of_shard(shard_path) -> ShardManifest:
+    """The manifest of the directory a shard file is in."""
+    return load_manifest(Path(shard_path).parent)
@@ -1,42 +1,154 @@
 import sys
 import os
-from preprocessing import process_amr_file
-from preprocessing.cleaning import remove_all_css
+from corpus import expand_amr_inputs, profiling
+
+# Command modules are imported inside their branch: `remove_css` must not
+# load penman, and neither command needs numpy unless --cache is given.
+
+
+def pop_int_option(argv, name, default):
+    """Remove `name N` from argv and return N (or default if absent)."""
+    if name not in argv:
+        return default
+    i = argv.index(name)
+    try:
+        value = int(argv[i + 1])
+    except (IndexError, ValueError):
+        print(f"Error: {name} expects an integer.")
+        sys.exit(1)
+    del argv[i : i + 2]
+    return value
+
+
+def pop_str_option(argv, name, default=None):
+    """Remove `name VALUE` from argv and return VALUE (or default if absent)."""
+    if name not in argv:
+        return default
+    i = argv.index(name)
+    if i + 1 >= len(argv):
+        print(f"Error: {name} expects a value.")
+        sys.exit(1)
+    value = argv[i + 1]
+    del argv[i : i + 2]
+    return value
+
+
+def pop_flag(argv, name):
+    """Remove a boolean `name` flag from argv and return whether it was set."""
+    if name not in argv:
+        return False
+    argv.remove(name)
+    return True
 
 
 def main():
     if len(sys.argv) < 2 or sys.argv[1] not in {"multisentence", "remove_css"}:
         print("Usage:")
-        print(" python preprocess.py multisentence <input_file> <output_file>")
-        print(" python preprocess.py remove_css <input_dir>")
+        print(
+            " python preprocess.py multisentence <input> <output_file>"
+            " [--workers N] [--chunksize N] [--stream] [--cache] [--incremental]"
+            " [--dedup] [--near-dup J] [--dedup-max-entries N] [--profile FILE]"
+        )
+        print(
+            " python preprocess.py remove_css <input_dir>"
+            " [--workers N] [--recursive] [--no-manifest] [--profile FILE]"
+        )
         sys.exit(1)
     command = sys.argv[1]
+    argv = sys.argv[:]
+    profile = pop_str_option(argv, "--profile")
+    if profile is not None:
+        profiling.enable()
     if command == "multisentence":
-        if len(sys.argv) != 4:
+        workers = pop_int_option(argv, "--workers", 1)
+        chunksize = pop_int_option(argv, "--chunksize", 64)
+        cache = pop_flag(argv, "--cache")
+        incremental = pop_flag(argv, "--incremental")
+        stream = pop_flag(argv, "--stream")
+        dedup = pop_flag(argv, "--dedup")
+        near_dup = pop_str_option(argv, "--near-dup")
+        max_entries = pop_int_option(argv, "--dedup-max-entries", 1_000_000)
+        if near_dup is not None:
+            try:
+                near_dup = float(near_dup)
+            except ValueError:
+                near_dup = -1.0
+            if not 0 < near_dup <= 1:
+                print("Error: --near-dup expects a Jaccard similarity in (0, 1].")
+                sys.exit(1)
+        if len(argv) != 4 or workers < 1 or chunksize < 1 or max_entries < 1:
             print(
-                "Usage: python preprocess.py multisentence <input_file> <output_file>"
+                "Usage: python preprocess.py multisentence <input> <output_file>"
+                " [--workers N] [--chunksize N] [--stream] [--cache] [--incremental]"
+                " [--dedup] [--near-dup J] [--dedup-max-entries N] [--profile FILE]"
             )
             sys.exit(1)
-        input_file = sys.argv[2]
-        output_file = sys.argv[3]
-        process_amr_file(input_file, output_file)
+        output_file = argv[3]
+        try:
+            # a file, a directory of .amr files or a glob pattern
+            inputs = expand_amr_inputs(argv[2])
+        except FileNotFoundError as e:
+            print(f"Error: {e}.")
+            sys.exit(1)
+        from preprocessing.multisentence import MULTISENTENCE_KIND, process_amr_file
+
+        deduplicator = None
+        if dedup or near_dup is not None:
+            from preprocessing.dedup import Deduplicator
+
+            deduplicator = Deduplicator(near_dup, max_entries=max_entries)
+        if incremental:
+            from corpus.incremental import ResultStore, store_path_for
+
+            # one store per input file, or next to the output for several
+            store_path = store_path_for(inputs[0] if len(inputs) == 1 else output_file)
+            with ResultStore(store_path, MULTISENTENCE_KIND) as store:
+                process_amr_file(
+                    inputs,
+                    output_file,
+                    workers,
+                    chunksize,
+                    store=store,
+                    dedup=deduplicator,
+                    stream=stream,
+                )
+        else:
+            process_amr_file(
+                inputs,
+                output_file,
+                workers=workers,
+                chunksize=chunksize,
+                dedup=deduplicator,
+                stream=stream,
+            )
+        if cache:
+            from corpus.cache import build_graph_cache
+
+            cache_dir = build_graph_cache(output_file)
+            print(f"Wrote graph cache to {cache_dir}")
     elif command == "remove_css":
-        if len(sys.argv) != 3:
-            print("Usage: python preprocess.py remove_css <input_dir>")
+        workers = pop_int_option(argv, "--workers", 1)
+        recursive = pop_flag(argv, "--recursive")
+        use_manifest = not pop_flag(argv, "--no-manifest")
+        if len(argv) != 3 or workers < 1:
+            print(
+                "Usage: python preprocess.py remove_css <input_dir>"
+                " [--workers N] [--recursive] [--no-manifest] [--profile FILE]"
+            )
             sys.exit(1)
-        input_dir = sys.argv[2]
+        input_dir = argv[2]
         if not os.path.isdir(input_dir):
             print(f"Error: {input_dir} is not a valid directory.")
             sys.exit(1)
-        for filename in os.listdir(input_dir):
-            filepath = os.path.join(input_dir, filename)
-            if os.path.isfile(filepath):
-                with open(filepath, "r", encoding="utf-8") as f:
-                    content = f.read()
-                cleaned = remove_all_css(content)
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(cleaned)
-                print(f"Processed (CSS removed): {filepath}")
+        from preprocessing.batch import remove_css_in_directory
+
+        remove_css_in_directory(
+            input_dir, workers=workers, recursive=recursive, use_manifest=use_manifest
+        )
+    if profile is not None:
+        report = profiling.active().write(profile)
+        profiling.print_report(report)
+        print(f"Profile written to {profile}")
 
 
 if __name__ == "__main__":
@@ -1,7 +1,22 @@
-from .multisentence import (
-    process_amr_file,
-    read_amr_blocks,
-    split_all_snt_without_duplicates,
-)
+# Resolved on first access: `remove_css` only needs .cleaning, and should not
+# pay for importing penman through .multisentence.
+_EXPORTS = {
+    "MULTISENTENCE_KIND": ".multisentence",
+    "process_amr_file": ".multisentence",
+    "read_amr_blocks": ".multisentence",
+    "split_all_snt_without_duplicates": ".multisentence",
+    "remove_all_css": ".cleaning",
+    "Deduplicator": ".dedup",
+}
 
-from .cleaning import remove_all_css
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from corpus import chunked, ordered_pool_map, profiling
+from .cleaning import remove_all_css
+
+MANIFEST_NAME = ".remove_css_manifest.json"
+
+
+# -----------------------------------------------------------
+# 1. Discovery and manifest
+# -----------------------------------------------------------
+def discover_files(input_dir, recursive=False):
+    """Files of input_dir (sorted), skipping the manifest and our temp files."""
+    input_dir = Path(input_dir)
+    candidates = input_dir.rglob("*") if recursive else input_dir.iterdir()
+    return sorted(
+        p
+        for p in candidates
+        if p.is_file() and p.name != MANIFEST_NAME and not _is_temp_file(p)
+    )
+
+
+def _is_temp_file(path):
+    return path.name.startswith(".") and path.name.endswith(".tmp")
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _default_file_mode():
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def atomic_write_bytes(path, data):
+    """Write to a temp file in the same directory, then rename over path."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            shutil.copymode(path, tmp)
+        else:
+            os.chmod(tmp, _default_file_mode())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# -----------------------------------------------------------
+# 2. Per-file work (runs in the worker processes)
+# -----------------------------------------------------------
+def clean_file(path, known_hash=None):
+    """
+    Remove CSS from one file in place.
+    Returns (status, content_hash) with status in {"cleaned", "skipped", "failed"};
+    content_hash is the hash of the file as left on disk.
+    """
+    try:
+        with profiling.block(None, str(path)):
+            with profiling.stage("read"):
+                with open(path, "rb") as f:
+                    raw = f.read()
+                digest = hashlib.sha256(raw).hexdigest()
+            if digest == known_hash:
+                return "skipped", digest
+            with profiling.stage("clean"):
+                # Universal newlines, like reading the file in text mode
+                text = raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+                cleaned = remove_all_css(text).encode("utf-8")
+            if cleaned != raw:
+                with profiling.stage("write"):
+                    atomic_write_bytes(path, cleaned)
+            return "cleaned", hashlib.sha256(cleaned).hexdigest()
+    except (OSError, UnicodeDecodeError) as e:
+        return "failed", str(e)
+
+
+def _clean_chunk(chunk):
+    return [clean_file(path, known_hash) for path, known_hash in chunk]
+
+
+# -----------------------------------------------------------
+# 3. Batch driver
+# -----------------------------------------------------------
+def remove_css_in_directory(
+    input_dir, workers=1, recursive=False, use_manifest=True, chunksize=16
+):
+    """
+    Remove CSS from every file of input_dir, in place and atomically.
+    With a manifest, files whose content hash did not change since the last
+    run are skipped. Returns a dict of counts per status.
+    """
+    input_dir = Path(input_dir)
+    manifest_path = input_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path) if use_manifest else {}
+
+    files = discover_files(input_dir, recursive)
+    tasks = [(str(p), manifest.get(p.relative_to(input_dir).as_posix())) for p in files]
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = (
+            result
+            for chunk_results in ordered_pool_map(
+                pool, _clean_chunk, chunked(tasks, chunksize), window=2 * workers
+            )
+            for result in chunk_results
+        )
+    else:
+        pool = None
+        results = (clean_file(*task) for task in tasks)
+
+    counts = {"cleaned": 0, "skipped": 0, "failed": 0}
+    new_manifest = {}
+    try:
+        for path, (status, value) in zip(files, results):
+            counts[status] += 1
+            key = path.relative_to(input_dir).as_posix()
+            if status == "failed":
+                print(f"Failed: {path} ({value})")
+                continue
+            new_manifest[key] = value
+            if status == "cleaned":
+                print(f"Processed (CSS removed): {path}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if use_manifest:
+            # Keep entries of files not reached (interrupted or non-recursive run)
+            for key, value in manifest.items():
+                new_manifest.setdefault(key, value)
+            new_manifest = {
+                k: v for k, v in new_manifest.items() if (input_dir / k).is_file()
+            }
+            atomic_write_bytes(
+                manifest_path, json.dumps(new_manifest, indent=1).encode("utf-8")
+            )
+
+    for status, n in counts.items():
+        profiling.count(f"files_{status}", n)
+    print(
+        f"{counts['cleaned']} cleaned, {counts['skipped']} unchanged since last run, "
+        f"{counts['failed']} failed in {input_dir}"
+    )
+    return counts
@@ -21,38 +21,106 @@ def strip_html_keep_text(html: str) -> str:
     return html.strip()
 
 
+BLOCK_TOKEN_REGEX = re.compile(r"[@{};]")
+BRACE_REGEX = re.compile(r"[{}]")
+
+
+def _match_braces(text: str):
+    """
+    Return (open_positions, match) where match maps each '{' position to the
+    position of its matching '}' (depth counting from that '{'). Unmatched
+    '{' are left out of match.
+    """
+    open_positions = []
+    match = {}
+    stack = []
+    for m in BRACE_REGEX.finditer(text):
+        pos = m.start()
+        if text[pos] == "{":
+            open_positions.append(pos)
+            stack.append(pos)
+        elif stack:
+            match[stack.pop()] = pos
+    return open_positions, match
+
+
+def _iter_without_at_rules(text: str):
+    """
+    Yield (piece, is_delimiter) for `text` with at-rule blocks removed.
+    Delimiters are single '{', '}' or ';' characters; other pieces are plain
+    text (never empty). Linear in len(text).
+    """
+    open_positions, match = _match_braces(text)
+    next_open = 0
+    pos = 0
+    for m in BLOCK_TOKEN_REGEX.finditer(text):
+        t = m.start()
+        if t < pos:
+            # inside an at-rule block we already skipped
+            continue
+        if t > pos:
+            yield text[pos:t], False
+        char = text[t]
+        pos = t + 1
+        if char == "@":
+            # first '{' at or after the '@', then its matching '}'
+            while next_open < len(open_positions) and open_positions[next_open] < t:
+                next_open += 1
+            if next_open < len(open_positions):
+                close = match.get(open_positions[next_open])
+                if close is not None:
+                    # We skip the whole @rule block
+                    pos = close + 1
+                    continue
+            # no '{', or malformed block: keep the '@' and move on
+            yield "@", False
+        else:
+            yield char, True
+    if pos < len(text):
+        yield text[pos:], False
+
+
 def remove_css_blocks(text: str) -> str:
     """
     Remove CSS-like blocks of the form:
     selector { ... }
     including nested-looking content such as @media queries.
 
-    Strategy:
-    - Greedy match from a selector up to the matching closing brace at same depth
-      is hard with pure regex, so we approximate:
-      1. Remove @media/@keyframes blocks with balanced braces using a manual parser.
-      2. Then repeatedly remove simple selector { ... } one-level blocks with regex.
-    """
-    # First: remove at-rule blocks like @media, @supports, @keyframes
-    text = remove_at_rule_blocks(text)
-
-    # Then repeatedly remove simple "foo { ... }" blocks with no nested braces
-    simple_block_pattern = re.compile(
-        r"""
-        [^\{\};]+      # selector part (not { or } or ;)
-        \{             # opening brace
-        [^\{\}]*       # block content without nested braces
-        \}             # closing brace
-        """,
-        re.VERBOSE,
-    )
-
-    prev = None
-    while prev != text:
-        prev = text
-        text = re.sub(simple_block_pattern, "", text)
+    Strategy (one linear scan):
+    1. At-rule blocks (@media, @supports, @keyframes...) are skipped up to
+       their matching closing brace, found from a precomputed brace matching.
+    2. The remaining text is reduced with a stack: when a '}' closes a '{'
+       whose body has no braces left and whose selector (text since the last
+       '{', '}' or ';') is not empty, the whole "selector { body }" is dropped.
+       This is the fixed point of repeatedly removing "foo { ... }" blocks
+       with no nested braces, so nested blocks disappear from the inside out.
+    """
+    pieces = []
+    opens = []  # (index in pieces of '{', index where its selector starts)
+    closes = []  # indices in pieces of kept '}'
+    selector_start = 0  # index just after the last delimiter
+
+    for piece, is_delimiter in _iter_without_at_rules(text):
+        if not is_delimiter:
+            pieces.append(piece)
+            continue
+        if piece == "}" and opens and (not closes or closes[-1] < opens[-1][0]):
+            brace, start = opens.pop()
+            if brace > start:
+                # non-empty selector: drop "selector { body }"
+                del pieces[start:]
+                selector_start = start
+                continue
+            opens.append((brace, start))
+        index = len(pieces)
+        pieces.append(piece)
+        if piece == "{":
+            opens.append((index, selector_start))
+        elif piece == "}":
+            closes.append(index)
+        selector_start = index + 1
 
-    return text
+    return "".join(pieces)
 
 
 def remove_at_rule_blocks(text: str) -> str:
@@ -61,50 +129,69 @@ def remove_at_rule_blocks(text: str) -> str:
     @media (...) { ... }
     @supports ... { ... }
     @keyframes name { ... }
-    We do this with a small brace-matching parser.
-    """
-    result = []
-    i = 0
-    n = len(text)
-
-    while i < n:
-        if text[i] == "@":
-            # move until first '{'
-            brace_start = text.find("{", i)
-            if brace_start == -1:
-                # no '{', so not actually a block like @media { ... }
-                result.append(text[i])
-                i += 1
-                continue
+    Each '@' is dropped together with everything up to the brace matching
+    the first '{' after it; an '@' with no '{' or an unbalanced block is kept.
+    """
+    return "".join(piece for piece, _ in _iter_without_at_rules(text))
+
+
+STYLE_TAG_REGEX = re.compile(r"<style", re.IGNORECASE)
+STYLE_TAG_END_REGEX = re.compile(r"</style>", re.IGNORECASE)
+LINK_TAG_REGEX = re.compile(r"<link", re.IGNORECASE)
+STYLESHEET_REL_REGEX = re.compile(r'rel=["\']stylesheet["\']', re.IGNORECASE)
+STYLE_ATTR_DOUBLE_REGEX = re.compile(r'\sstyle\s*=\s*"[^"]*"', re.IGNORECASE)
+STYLE_ATTR_SINGLE_REGEX = re.compile(r"\sstyle\s*=\s*'[^']*'", re.IGNORECASE)
+# Only start at the beginning of a blank run, so long runs stay linear
+LINE_END_SPACES_REGEX = re.compile(r"(?<![ \t])[ \t]+\n")
+BLANK_LINES_REGEX = re.compile(r"\n\s*\n+")
 
-            # now walk braces to find the matching closing '}' at same depth
-            depth = 0
-            j = brace_start
-            matched = False
-            while j < n:
-                if text[j] == "{":
-                    depth += 1
-                elif text[j] == "}":
-                    depth -= 1
-                    if depth == 0:
-                        # block ends at j
-                        matched = True
-                        break
-                j += 1
-
-            if matched:
-                # We skip the whole @rule block
-                i = j + 1
-                continue
-            else:
-                # malformed, fallback to keep char and move on
-                result.append(text[i])
-                i += 1
-        else:
-            result.append(text[i])
-            i += 1
 
-    return "".join(result)
+def remove_style_tags(text: str) -> str:
+    """
+    Remove <style ...>...</style> blocks: from a '<style', through the first
+    '>' after it, to the first '</style>' after that. When a '<style' has no
+    '>' or no '</style>' after it, no later one has either, so the scan stops
+    there instead of retrying from every later '<style'.
+    """
+    pieces = []
+    pos = 0
+    while True:
+        m = STYLE_TAG_REGEX.search(text, pos)
+        if m is None:
+            break
+        tag_end = text.find(">", m.end())
+        if tag_end < 0:
+            break
+        end = STYLE_TAG_END_REGEX.search(text, tag_end + 1)
+        if end is None:
+            break
+        pieces.append(text[pos : m.start()])
+        pos = end.end()
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
+def remove_stylesheet_links(text: str) -> str:
+    """
+    Remove <link ... rel="stylesheet" ...> tags. A tag ends at the first '>' after its '<link'; other '<link'
+    openings before that '>' cannot match if the first one does not, so they
+    are skipped instead of each rescanning the text up to the next '>'.
+    """
+    pieces = []
+    pos = 0
+    for m in LINK_TAG_REGEX.finditer(text):
+        if m.start() < pos:
+            continue
+        end = text.find(">", m.end())
+        if end < 0:
+            break
+        if STYLESHEET_REL_REGEX.search(text, m.end(), end):
+            pieces.append(text[pos : m.start()])
+        else:
+            pieces.append(text[pos : end + 1])
+        pos = end + 1
+    pieces.append(text[pos:])
+    return "".join(pieces)
 
 
 def remove_all_css(text: str) -> str:
@@ -116,29 +203,28 @@ def remove_all_css(text: str) -> str:
     3. Remove inline style attributes style="..." or style='...'
     4. Remove CSS code blocks, including @media etc.
     5. Cleanup multiple blank lines
+    Every step is a single linear sweep over the text.
     """
 
     # 1. Remove <style> blocks (case-insensitive, multiline)
-    text = re.sub(r"<style[^>]*>[\s\S]*?</style>", "", text, flags=re.IGNORECASE)
+    text = remove_style_tags(text)
 
     # 2. Remove <link ... rel="stylesheet" ...> tags
-    text = re.sub(
-        r'<link[^>]*rel=["\']stylesheet["\'][^>]*>', "", text, flags=re.IGNORECASE
-    )
+    text = remove_stylesheet_links(text)
 
     # 3. Remove inline style attributes (double or single quotes)
     #    Examples:
     #    <div style="color:red; font-size:12px">
     #    <p STYLE='margin:0;padding:0'>
-    text = re.sub(r'\sstyle\s*=\s*"[^"]*"', "", text, flags=re.IGNORECASE)
-    text = re.sub(r"\sstyle\s*=\s*'[^']*'", "", text, flags=re.IGNORECASE)
+    text = STYLE_ATTR_DOUBLE_REGEX.sub("", text)
+    text = STYLE_ATTR_SINGLE_REGEX.sub("", text)
 
     # 4. Remove raw CSS-like content outside of tags
     text = remove_css_blocks(text)
 
     # 5. Collapse excessive blank lines / whitespace
-    text = re.sub(r"[ \t]+\n", "\n", text)  # trim line-end spaces
-    text = re.sub(r"\n\s*\n+", "\n\n", text)  # collapse many blank lines
+    text = LINE_END_SPACES_REGEX.sub("\n", text)  # trim line-end spaces
+    text = BLANK_LINES_REGEX.sub("\n\n", text)  # collapse many blank lines
     text = text.strip()
 
     return text
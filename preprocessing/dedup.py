@@ -0,0 +1,339 @@
+"""
+Duplicate sentence graphs, exact and approximate.
+
+Scraped corpora repeat the same boilerplate sentences many times. Exact
+duplicates are found with a canonical hash of the graph that does not depend
+on variable names, triple order or edge inversion; near duplicates with
+MinHash over the graph's concept-level triples, bucketed by LSH bands.
+
+Both stores keep at most `max_entries` graphs (least recently seen are
+dropped first), so memory stays bounded on large corpora; a duplicate of a
+dropped graph is then kept, and the report says how many were dropped.
+"""
+
+import hashlib
+from array import array
+from collections import OrderedDict, deque
+from typing import NamedTuple, Optional
+
+from corpus.decode import decode_noop
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+DEFAULT_NUM_PERM = 64
+
+
+def _digest(text, size=8):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=size).digest()
+
+
+# -----------------------------------------------------------
+# 1. Graph keys
+# -----------------------------------------------------------
+def normalized_triples(g):
+    """
+    NoOp triples with inverted edges `(s, :X-of, t)` to a variable turned
+    into `(t, :X, s)`, so that two layouts of one graph give the same set.
+    """
+    variables = {src for src, role, _ in g.triples if role == ":instance"}
+    return [
+        (tgt, role[:-3], src)
+        if role.endswith("-of") and role != ":instance" and tgt in variables
+        else (src, role, tgt)
+        for src, role, tgt in g.triples
+    ]
+
+
+# Leaves of the individualization search of one graph; more symmetric graphs
+# fall back to a key that only identical graphs share.
+MAX_CANONICAL_BRANCHES = 256
+
+
+def canonical_graph_hash(g) -> bytes:
+    """
+    16-byte hash of a graph up to variable renaming, triple order and
+    inversion. Each variable is labelled by its concept, then labels are
+    refined with the labels of the neighbours until they stop splitting
+    (color refinement). Variables still sharing a label are told apart by
+    individualizing each of them in turn and refining again, keeping the
+    smallest labelled triple list, so the key is a canonical form: two
+    graphs get the same hash only if they are isomorphic. Graphs too
+    symmetric for MAX_CANONICAL_BRANCHES get a key of their triples with
+    the variable names, which never merges distinct graphs.
+    """
+    triples = normalized_triples(g)
+    concepts = {src: tgt for src, role, tgt in triples if role == ":instance"}
+    edges = [t for t in triples if t[1] != ":instance"]
+    variables = set(concepts) | {src for src, _, _ in edges}
+    variables.add(g.top)
+
+    labels = {v: _digest(f"{concepts.get(v)}|{v == g.top}") for v in variables}
+    rows = _canonical_rows(
+        _refine(labels, edges), g.top, triples, edges, [MAX_CANONICAL_BRANCHES]
+    )
+    if rows is None:
+        rows = [
+            b"names",
+            repr(g.top).encode("utf-8"),
+            *sorted(repr(t).encode("utf-8") for t in triples),
+        ]
+    return hashlib.blake2b(b"\n".join(rows), digest_size=16).digest()
+
+
+def _label(labels, node):
+    return labels[node] if node in labels else repr(node).encode("utf-8")
+
+
+def _refine(labels, edges):
+    """Color refinement of variable labels until the classes stop splitting."""
+    n_classes = len(set(labels.values()))
+    for _ in range(len(labels)):
+        neighbours = {v: [] for v in labels}
+        for src, role, tgt in edges:
+            role = role.encode("utf-8")
+            neighbours[src].append(b">" + role + b" " + _label(labels, tgt))
+            if tgt in neighbours:
+                neighbours[tgt].append(b"<" + role + b" " + _label(labels, src))
+        labels = {
+            v: hashlib.blake2b(
+                labels[v] + b"|" + b",".join(sorted(neighbours[v])), digest_size=8
+            ).digest()
+            for v in labels
+        }
+        n_refined = len(set(labels.values()))
+        if n_refined == n_classes:
+            break
+        n_classes = n_refined
+    return labels
+
+
+def _canonical_rows(labels, top, triples, edges, budget):
+    """
+    Smallest [top label, *sorted labelled triples] over the individualizations
+    of refined `labels`; None once budget[0] leaves have been explored.
+    """
+    classes = {}
+    for v, lab in labels.items():
+        classes.setdefault(lab, []).append(v)
+    ties = [cell for cell in classes.values() if len(cell) > 1]
+    if not ties:
+        budget[0] -= 1
+        rows = sorted(
+            b" ".join((_label(labels, src), role.encode("utf-8"), _label(labels, tgt)))
+            for src, role, tgt in triples
+        )
+        return [_label(labels, top), *rows]
+    # the cell to split is picked by its (isomorphism-invariant) label
+    cell = min(ties, key=lambda c: (len(c), labels[c[0]]))
+    best = None
+    for v in cell:
+        if budget[0] <= 0:
+            return None
+        individualized = dict(labels)
+        individualized[v] = hashlib.blake2b(labels[v] + b"*", digest_size=8).digest()
+        rows = _canonical_rows(
+            _refine(individualized, edges), top, triples, edges, budget
+        )
+        if rows is None:
+            return None
+        if best is None or rows < best:
+            best = rows
+    return best
+
+
+def concept_shingles(g):
+    """Triples with each variable replaced by its concept (MinHash input)."""
+    triples = normalized_triples(g)
+    concepts = {src: tgt for src, role, tgt in triples if role == ":instance"}
+    return {
+        f"{concepts.get(src, src)} {role} {concepts.get(tgt, tgt)}"
+        for src, role, tgt in triples
+    }
+
+
+class GraphKeys(NamedTuple):
+    fingerprint: bytes
+    signature: Optional[tuple]  # MinHash signature, None without near dedup
+
+
+class GraphKeyer:
+    """
+    Computes the GraphKeys of a decoded sentence graph. Picklable, so that
+    pool workers compute the keys next to the graphs they produce.
+    """
+
+    def __init__(self, num_perm=0):
+        self.num_perm = num_perm
+
+    def __call__(self, g):
+        signature = self.signature(g) if self.num_perm else None
+        return GraphKeys(canonical_graph_hash(g), signature)
+
+    def signature(self, g):
+        """
+        MinHash signature: the i-th hash function of a shingle is the i-th
+        32-bit word of its SHAKE-128 digest, so one digest per shingle gives
+        all of them.
+        """
+        n_bytes = 4 * self.num_perm
+        hashes = [
+            array("I", hashlib.shake_128(s.encode("utf-8")).digest(n_bytes))
+            for s in concept_shingles(g)
+        ]
+        return tuple(map(min, zip(*hashes)))
+
+    def of_sentence(self, sentence):
+        """Keys of an encoded sentence graph (e.g. one read back from a store)."""
+        return self(decode_noop(sentence))
+
+
+# -----------------------------------------------------------
+# 2. Bounded stores
+# -----------------------------------------------------------
+class FingerprintStore:
+    """Set of exact fingerprints, keeping the `max_entries` most recently seen."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evicted = 0
+        self._seen = OrderedDict()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def add(self, fingerprint) -> bool:
+        """Record a fingerprint; False if it was already there."""
+        if fingerprint in self._seen:
+            self._seen.move_to_end(fingerprint)
+            return False
+        self._seen[fingerprint] = None
+        if len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+            self.evicted += 1
+        return True
+
+
+def lsh_bands(threshold, num_perm):
+    """
+    LSH (bands, rows), bands * rows = num_perm, whose similarity threshold
+    (1 / bands) ** (1 / rows) is closest to `threshold`.
+    """
+    return min(
+        ((b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0),
+        key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold),
+    )
+
+
+class MinHashIndex:
+    """
+    LSH index of MinHash signatures: a signature is a near duplicate when it
+    shares a band with a stored one whose estimated Jaccard similarity is at
+    least `threshold`. Keeps the `max_entries` most recently added.
+    """
+
+    def __init__(
+        self, threshold, num_perm=DEFAULT_NUM_PERM, max_entries=DEFAULT_MAX_ENTRIES
+    ):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.max_entries = max_entries
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        self.evicted = 0
+        self._signatures = OrderedDict()  # id -> signature
+        self._buckets = {}  # (band, band values) -> deque of ids, oldest first
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _band_keys(self, signature):
+        r = self.rows
+        return [(b, signature[b * r : (b + 1) * r]) for b in range(self.bands)]
+
+    def similarity(self, a, b):
+        return sum(x == y for x, y in zip(a, b)) / self.num_perm
+
+    def find(self, signature):
+        """Id of a stored near duplicate of signature, or None."""
+        checked = set()
+        for key in self._band_keys(signature):
+            for sid in self._buckets.get(key, ()):
+                if sid in checked:
+                    continue
+                checked.add(sid)
+                if self.similarity(signature, self._signatures[sid]) >= self.threshold:
+                    return sid
+        return None
+
+    def add(self, signature):
+        sid = self._next_id
+        self._next_id += 1
+        self._signatures[sid] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, deque()).append(sid)
+        if len(self._signatures) > self.max_entries:
+            # ids leave in the order they came, so old_id heads its buckets
+            old_id, old = self._signatures.popitem(last=False)
+            for key in self._band_keys(old):
+                bucket = self._buckets[key]
+                if bucket and bucket[0] == old_id:
+                    bucket.popleft()
+                if not bucket:
+                    del self._buckets[key]
+            self.evicted += 1
+
+
+# -----------------------------------------------------------
+# 3. Streaming deduplicator
+# -----------------------------------------------------------
+class Deduplicator:
+    """
+    Decides, in stream order, which sentence graphs are duplicates of one
+    already kept. `near_threshold` (a Jaccard similarity in (0, 1]) also
+    drops near duplicates; None only drops exact ones.
+    """
+
+    def __init__(
+        self,
+        near_threshold=None,
+        num_perm=DEFAULT_NUM_PERM,
+        max_entries=DEFAULT_MAX_ENTRIES,
+    ):
+        if near_threshold is not None and not 0 < near_threshold <= 1:
+            raise ValueError("near_threshold must be in (0, 1]")
+        self.keyer = GraphKeyer(num_perm if near_threshold is not None else 0)
+        self.exact = FingerprintStore(max_entries)
+        self.near = None
+        if near_threshold is not None:
+            self.near = MinHashIndex(near_threshold, num_perm, max_entries)
+        self.kept = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def is_duplicate(self, keys: GraphKeys) -> bool:
+        """Whether keys belong to a duplicate; if not, remember them."""
+        if not self.exact.add(keys.fingerprint):
+            self.exact_duplicates += 1
+            return True
+        if self.near is not None:
+            if self.near.find(keys.signature) is not None:
+                self.near_duplicates += 1
+                return True
+            self.near.add(keys.signature)
+        self.kept += 1
+        return False
+
+    @property
+    def removed(self):
+        return self.exact_duplicates + self.near_duplicates
+
+    def report(self):
+        text = f"removed {self.removed} duplicates ({self.exact_duplicates} exact"
+        if self.near is not None:
+            text += f", {self.near_duplicates} near at Jaccard >= {self.near.threshold}"
+        text += f"), kept {self.kept}"
+        evicted = self.exact.evicted
+        if self.near is not None:
+            evicted += self.near.evicted
+        if evicted:
+            text += f"; {evicted} fingerprints dropped from the bounded store"
+        return text
@@ -1,108 +1,149 @@
 import penman
 from penman.models.noop import NoOpModel
+import contextlib
+import json
+import os
 import re
+import time
+from collections import defaultdict, deque
+from functools import partial
 from pathlib import Path
 
+from corpus import (
+    BackgroundWriter,
+    chunked,
+    expand_amr_inputs,
+    iter_amr_blocks,
+    iter_amr_inputs,
+    ordered_pool_map,
+    profiling,
+    threaded_iter,
+)
+from corpus.concepts import FAIRNESS_MENTION
+from corpus.decode import decode_noop
+from corpus.incremental import block_digest
+
+# Incremental-store key of per-block results (the encoded fairness sentences
+# of _process_entry, keyed by block digest); bump when they change.
+MULTISENTENCE_KIND = "multisentence-v1"
+
+# Streaming mode: blocks read ahead per worker chunk, and sentences waiting
+# to be written.
+READ_AHEAD_CHUNKS = 4
+WRITE_QUEUE_SIZE = 1024
+
 
 # -----------------------------------------------------------
 # 1. Read AMR blocks from file (start when line starts with "(")
 # -----------------------------------------------------------
 def read_amr_blocks(filepath):
     """
-    Read a .amr file and return a list of cleaned Penman blocks.
+    Lazily yield the cleaned Penman blocks of a .amr file.
     Each block starts with '(' and ignores preceding comments or junk lines.
+    Use corpus.iter_amr_blocks to also get the `# ::id` / `# ::snt` metadata.
     """
-    blocks = []
-    current_block = []
-
-    with open(filepath, "r", encoding="utf-8") as f:
-        for line in f:
-            stripped = line.strip()
-
-            # Skip comment lines
-            if stripped.startswith("#"):
-                continue
-
-            # Start of a new AMR graph
-            if stripped.startswith("("):
-                if current_block:
-                    blocks.append("\n".join(current_block))
-                    current_block = []
-                current_block.append(stripped)
-            else:
-                # Continuation of current graph (skip empty junk before first '(')
-                if current_block and stripped:
-                    current_block.append(stripped)
-
-    if current_block:
-        blocks.append("\n".join(current_block))
-
-    return blocks
+    for block in iter_amr_blocks(filepath):
+        yield block.amr
 
 
 # -----------------------------------------------------------
-# 2. Extract subgraph starting from a given node (DFS)
+# 2. Index outgoing edges once per graph (source -> triples)
 # -----------------------------------------------------------
-def extract_subgraph(graph, subroot):
+def build_outgoing_index(triples):
+    """
+    Map each source node to its outgoing triples, preserving triple order.
+    Built once per decoded graph so subgraph walks stay linear.
+    """
+    index = defaultdict(list)
+    for triple in triples:
+        index[triple[0]].append(triple)
+    return index
+
+
+def _walk_from(index, root):
     visited = set()
-    stack = [subroot]
-    sub_triples = []
+    stack = [root]
+    collected = []
     while stack:
         node = stack.pop()
         if node in visited:
             continue
         visited.add(node)
-        for src, role, tgt in graph.triples:
-            if src == node:
-                sub_triples.append((src, role, tgt))
-                stack.append(tgt)
-    return penman.Graph(sub_triples, top=subroot)
+        for triple in index.get(node, ()):
+            collected.append(triple)
+            stack.append(triple[2])
+    return collected
 
 
 # -----------------------------------------------------------
-# 3. Keep only connected triples from top (prevents LayoutError)
+# 3. Extract subgraph starting from a given node (DFS)
 # -----------------------------------------------------------
-def get_connected_subgraph(triples, top):
-    visited = set()
-    stack = [top]
-    connected = []
-    while stack:
-        node = stack.pop()
-        if node in visited:
-            continue
-        visited.add(node)
-        for src, role, tgt in triples:
-            if src == node:
-                connected.append((src, role, tgt))
-                stack.append(tgt)
-    return connected
+def extract_subgraph(graph, subroot, index=None):
+    if index is None:
+        index = build_outgoing_index(graph.triples)
+    return penman.Graph(_walk_from(index, subroot), top=subroot)
 
 
 # -----------------------------------------------------------
-# 4. Split into sentence graphs and remove nested sub-sentences
+# 4. Keep only connected triples from top (prevents LayoutError)
 # -----------------------------------------------------------
-def split_all_snt_without_duplicates(amr_str):
+def get_connected_subgraph(triples, top, index=None):
+    if index is None:
+        index = build_outgoing_index(triples)
+    return _walk_from(index, top)
+
+
+# -----------------------------------------------------------
+# 5. Split into sentence graphs and remove nested sub-sentences
+# -----------------------------------------------------------
+def decode_for_split(amr_str):
+    """
+    NoOp-decode one block for split_decoded_graph. The sentence graphs of a
+    block with :snt* edges are rebuilt from its triples, so the fast decoder
+    is enough; a block without them is kept, and re-encoded, as penman
+    decoded it.
+    """
+    if ":snt" in amr_str:
+        g = decode_noop(amr_str)
+        if isinstance(g, penman.Graph) or any(
+            role.startswith(":snt") for _, role, _ in g.triples
+        ):
+            return g
+    return penman.decode(amr_str, model=NoOpModel())
+
+
+def split_sentence_graphs(amr_str):
+    """
+    Decode one block and split it into sentence graphs (parent first, then
+    each :snt* target), without encoding them.
+    """
     try:
-        g = penman.decode(amr_str, model=NoOpModel())
+        with profiling.stage("decode"):
+            g = decode_for_split(amr_str)
     except Exception as e:
+        profiling.count("decode_failures")
         print(f"[!] Failed to decode AMR:\n{amr_str[:80]}...\nError: {e}")
         return []
 
+    with profiling.stage("split"):
+        return split_decoded_graph(g)
+
+
+def split_decoded_graph(g):
+    """split_sentence_graphs for an already NoOp-decoded graph."""
     # Find all :snt* triples anywhere
     snt_triples = [
         (src, role, tgt) for (src, role, tgt) in g.triples if role.startswith(":snt")
     ]
 
     if not snt_triples:
-        return [penman.encode(g)]
+        return [g]
 
     snt_targets = {tgt for (_, _, tgt) in snt_triples}
+    index = build_outgoing_index(g.triples)
 
-    sentences = []
     # 1. Extract sub-sentences first
-    for _, role, tgt in snt_triples:
-        sub_g = extract_subgraph(g, tgt)
-        sentences.append(penman.encode(sub_g))
+    graphs = [extract_subgraph(g, tgt, index) for _, role, tgt in snt_triples]
 
     # 2. Rebuild parent graph without those :snt* triples
     filtered_triples = [
@@ -111,37 +152,298 @@ def split_all_snt_without_duplicates(amr_str):
 
     connected_parent_triples = get_connected_subgraph(filtered_triples, g.top)
     if connected_parent_triples:
-        parent_g = penman.Graph(connected_parent_triples, top=g.top)
-        sentences.insert(0, penman.encode(parent_g))
+        graphs.insert(0, penman.Graph(connected_parent_triples, top=g.top))
+
+    return graphs
+
 
-    return sentences
+def split_all_snt_without_duplicates(amr_str):
+    return [penman.encode(g) for g in split_sentence_graphs(amr_str)]
 
 
 # -----------------------------------------------------------
-# 5. Filter sentences containing "fairness"
+# 6. Filter sentences containing "fairness"
 # -----------------------------------------------------------
 def filter_fairness(sentences):
     return [s for s in sentences if re.search(r"\bfairness\b", s, re.IGNORECASE)]
 
 
+def filter_fairness_graphs(graphs, matcher=FAIRNESS_MENTION):
+    """
+    Graph-level filter_fairness: keep graphs with a matching variable, role,
+    concept or constant. Every word of an encoded graph comes from one of
+    those strings, so this keeps the same sentences without encoding them.
+    """
+    return [g for g in graphs if matcher.any_triple_matches(g.triples)]
+
+
 # -----------------------------------------------------------
-# 6. Main pipeline: read -> split -> filter -> save
+# 7. Per-block work (shared by the serial and pooled paths)
 # -----------------------------------------------------------
-def process_amr_file(input_path, output_path):
-    input_path = Path(input_path)
+def fairness_sentence_graphs(block, matcher=FAIRNESS_MENTION):
+    """Split one block into sentence graphs and keep those mentioning fairness."""
+    with profiling.stage("precheck"):
+        may_match = matcher.may_occur_in(block)
+    if not may_match:
+        # no graph string can match: skip decoding entirely
+        profiling.count("blocks_skipped_by_precheck")
+        return []
+    graphs = split_sentence_graphs(block)
+    with profiling.stage("filter"):
+        return filter_fairness_graphs(graphs, matcher)
+
+
+def _process_entry(gid, block, keyer=None):
+    """
+    (sentences, keys) of one block; keys are the dedup.GraphKeys of the
+    sentences when a keyer is given, else None.
+    """
+    with profiling.block(gid, block.metadata.get("id")):
+        graphs = fairness_sentence_graphs(block.amr)
+        with profiling.stage("encode"):
+            sentences = [penman.encode(g) for g in graphs]
+        if keyer is None:
+            return sentences, None
+        with profiling.stage("dedup_keys"):
+            return sentences, [keyer(g) for g in graphs]
+
+
+def _process_chunk(chunk, keyer=None):
+    """
+    Process the (gid, AmrBlock) entries of a chunk; None entries (already
+    known) are skipped.
+    """
+    start = time.perf_counter()
+    results = [
+        None if entry is None else _process_entry(*entry, keyer) for entry in chunk
+    ]
+    n_done = sum(entry is not None for entry in chunk)
+    return os.getpid(), n_done, time.perf_counter() - start, results
+
+
+def _print_worker_stats(stats):
+    for pid, (n_blocks, elapsed) in sorted(stats.items()):
+        rate = n_blocks / elapsed if elapsed > 0 else float("inf")
+        print(f"  worker {pid}: {n_blocks} blocks in {elapsed:.2f}s ({rate:.1f} blocks/s)")
+
+
+# -----------------------------------------------------------
+# 8. Main pipeline: read -> split -> filter -> save
+# -----------------------------------------------------------
+def process_amr_file(
+    input_path,
+    output_path,
+    workers=1,
+    chunksize=64,
+    store=None,
+    dedup=None,
+    stream=False,
+):
+    """
+    Split and filter every AMR block of input_path into output_path.
+    input_path may also be a directory, a glob pattern or a list of them
+    (see corpus.expand_amr_inputs); their blocks are processed in order.
+    Blocks are streamed from disk and sentences written as they are produced,
+    so memory stays bounded. With workers > 1, blocks are processed in chunks
+    on a process pool; output keeps input order. With a corpus.ResultStore,
+    blocks whose content hash is already known are not recomputed. With a
+    dedup.Deduplicator, sentences that duplicate an earlier one are dropped.
+
+    With stream=True, reading and writing overlap with the processing: a
+    reader thread keeps a bounded number of blocks ahead, and a writer
+    thread writes sentences from a bounded queue and flushes them at once,
+    so the output file grows while the run is in progress.
+    """
+    inputs = expand_amr_inputs(input_path)
     output_path = Path(output_path)
 
-    blocks = read_amr_blocks(input_path)
-    print(f"📥 Found {len(blocks)} AMR blocks in file {input_path}")
+    def lookup(block):
+        if store is None:
+            return None, None
+        with profiling.stage("store"):
+            digest = block_digest(block)
+            return digest, store.get(digest)
+
+    def remember(digest, sentences):
+        if store is not None:
+            with profiling.stage("store"):
+                store.put(digest, sentences)
+
+    keyer = None if dedup is None else dedup.keyer
+    n_blocks = 0
+    n_sentences = 0
+    with contextlib.ExitStack() as stack:
+        out = stack.enter_context(open(output_path, "w", encoding="utf-8"))
+        if stream:
+            out = stack.enter_context(BackgroundWriter(out, WRITE_QUEUE_SIZE))
+
+        def write(sentences, keys=None):
+            nonlocal n_sentences
+            if dedup is not None:
+                if keys is None:  # from the store: keys are not cached
+                    with profiling.stage("dedup_keys"):
+                        keys = [dedup.keyer.of_sentence(s) for s in sentences]
+                with profiling.stage("dedup"):
+                    sentences = [
+                        s for s, k in zip(sentences, keys) if not dedup.is_duplicate(k)
+                    ]
+            with profiling.stage("write"):
+                if sentences:
+                    out.write("".join(s.strip() + "\n\n" for s in sentences))
+            n_sentences += len(sentences)
+
+        blocks = profiling.timed_iter(iter_amr_inputs(inputs), "read")
+        if stream:
+            blocks = threaded_iter(blocks, READ_AHEAD_CHUNKS * chunksize * workers)
+            stack.enter_context(contextlib.closing(blocks))
+        blocks = enumerate(blocks)
+
+        if workers > 1:
+            stats = defaultdict(lambda: [0, 0.0])
+            lookups = deque()
+
+            def todo_chunks():
+                for chunk in chunked(blocks, chunksize):
+                    entries = [lookup(block.amr) for _, block in chunk]
+                    lookups.append(entries)
+                    yield [
+                        entry if cached is None else None
+                        for entry, (_, cached) in zip(chunk, entries)
+                    ]
+
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                task = partial(_process_chunk, keyer=keyer)
+                for pid, n_done, elapsed, results in ordered_pool_map(
+                    pool, task, todo_chunks(), window=2 * workers
+                ):
+                    stats[pid][0] += n_done
+                    stats[pid][1] += elapsed
+                    for (digest, cached), result in zip(lookups.popleft(), results):
+                        if cached is None:
+                            sentences, keys = result
+                            remember(digest, sentences)
+                        else:
+                            sentences, keys = cached, None
+                        n_blocks += 1
+                        write(sentences, keys)
+            print(f"Processed with {workers} workers (chunksize={chunksize}):")
+            _print_worker_stats(stats)
+        else:
+            for gid, block in blocks:
+                digest, sentences = lookup(block.amr)
+                keys = None
+                if sentences is None:
+                    sentences, keys = _process_entry(gid, block, keyer)
+                    remember(digest, sentences)
+                n_blocks += 1
+                write(sentences, keys)
+
+    profiling.count("blocks", n_blocks)
+    profiling.count("sentences_written", n_sentences)
+    if len(inputs) == 1:
+        print(f"📥 Read {n_blocks} AMR blocks from file {inputs[0]}")
+    else:
+        print(f"📥 Read {n_blocks} AMR blocks from {len(inputs)} files")
+    if store is not None:
+        print(f"Incremental: {store.report()}")
+    if dedup is not None:
+        profiling.count("duplicates_removed", dedup.removed)
+        print(f"Dedup: {dedup.report()}")
+    print(f"Wrote {n_sentences} AMRs containing 'fairness' to {output_path}")
+
+
+# -----------------------------------------------------------
+# 9. Shards: process each one on its own, then merge in order
+# -----------------------------------------------------------
+SENTENCES_SUFFIX = ".sentences.amr"
+
+
+def sentences_path_for(shard_path) -> Path:
+    shard_path = Path(shard_path)
+    return shard_path.with_name(shard_path.name + SENTENCES_SUFFIX)
+
+
+def _sentences_meta_path(shard_path) -> Path:
+    return sentences_path_for(shard_path).with_suffix(".json")
+
+
+def process_shard(shard_path, workers=1, chunksize=64, stream=False) -> Path:
+    """
+    process_amr_file on one shard (see corpus.shards), written to
+    `<shard>.sentences.amr` for merge_sentence_files. Duplicates are only
+    removed by the merge, which sees the sentences of every shard in order.
+    """
+    from corpus.shards import shard_stamp
+
+    output_path = sentences_path_for(shard_path)
+    process_amr_file(shard_path, output_path, workers, chunksize, stream=stream)
+    meta = {
+        "shard_stamp": shard_stamp(shard_path),
+        "sentences_stamp": shard_stamp(output_path),
+    }
+    with open(_sentences_meta_path(shard_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return output_path
+
+
+def _iter_sentence_file(path):
+    """The sentences of a file written by process_amr_file, in order."""
+    lines = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line == "\n":
+                yield "".join(lines).rstrip("\n")
+                lines = []
+            else:
+                lines.append(line)
+
+
+def merge_sentence_files(manifest, output_path, dedup=None):
+    """
+    Concatenate the `<shard>.sentences.amr` files of a corpus.shards
+    manifest into output_path, in shard order, and print what
+    process_amr_file prints for the whole corpus. With a
+    dedup.Deduplicator, duplicates are removed across all shards, as in a
+    single run. Raises ValueError if a shard's sentences are missing or
+    older than the shard.
+    """
+    from corpus.shards import shard_stamp
 
-    all_sentences = []
-    for block in blocks:
-        sentences = split_all_snt_without_duplicates(block)
-        fairness_sents = filter_fairness(sentences)
-        all_sentences.extend(fairness_sents)
+    paths = []
+    for shard in manifest.shards:
+        path = sentences_path_for(shard.path)
+        try:
+            with open(_sentences_meta_path(shard.path), encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"no processed sentences for {shard.path}") from None
+        if meta["shard_stamp"] != shard_stamp(shard.path) or meta[
+            "sentences_stamp"
+        ] != shard_stamp(path):
+            raise ValueError(f"{path} is out of date")
+        paths.append(path)
 
+    n_sentences = 0
     with open(output_path, "w", encoding="utf-8") as out:
-        for s in all_sentences:
-            out.write(s.strip() + "\n\n")
+        for path in paths:
+            sentences = _iter_sentence_file(path)
+            if dedup is not None:
+                sentences = (
+                    s
+                    for s in sentences
+                    if not dedup.is_duplicate(dedup.keyer.of_sentence(s))
+                )
+            for sentence in sentences:
+                out.write(sentence + "\n\n")
+                n_sentences += 1
 
-    print(f"Wrote {len(all_sentences)} AMRs containing 'fairness' to {output_path}")
+    sources = manifest.sources
+    if len(sources) == 1:
+        print(f"📥 Read {manifest.n_blocks} AMR blocks from file {sources[0]}")
+    else:
+        print(f"📥 Read {manifest.n_blocks} AMR blocks from {len(sources)} files")
+    if dedup is not None:
+        print(f"Dedup: {dedup.report()}")
+    print(f"Wrote {n_sentences} AMRs containing 'fairness' to {output_path}")
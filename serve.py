@@ -0,0 +1,388 @@
+"""
+Long-running JSON-lines server for the split/filter/score/summarize steps.
+
+Reads one JSON request per line (stdin, or each connection of a Unix
+socket) and writes one JSON response per line, tagged with the request id.
+Requests are handled concurrently, so responses may come out of order.
+Imports, penman's parser and the graph caches stay warm between requests.
+
+    {"id": 1, "op": "score", "amr": "(f / fairness)"}
+    {"id": 2, "op": "filter", "amrs": ["(m / multi-sentence ...)", ...]}
+    {"id": 3, "op": "top_k", "path": "data/fair_AMR-500_clean.amr", "k": 5}
+
+Ops (each takes exactly one of "amr", "amrs" or "path"):
+
+- split      sentence graphs of each block
+- filter     sentence graphs mentioning fairness (what `multisentence` keeps)
+- score      fairness centrality score and fairness node count
+- summarize  one merged summary (the counters of `analyze.py summary`)
+- top_k      top "k" graphs by score; a file with an up-to-date .gcache
+             sidecar is scored straight from the cache
+- ping       liveness check
+
+With "amr" a split/filter/score result is the item itself, otherwise a list
+in input order. Items that fail to decode carry an "error" message.
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import penman
+
+from analysis.centrality_score import (
+    score_cached_range_batched,
+    score_graph_index,
+    select_top_k,
+)
+from analysis.graph_index import GraphIndex
+from analysis.summary import FairnessSummary
+from corpus import chunked, iter_amr_blocks
+from corpus.cache import cache_path_for, load_graph_cache
+from corpus.concepts import FAIRNESS_CONCEPTS, FAIRNESS_MENTION, FAIRNESS_NODE_MATCHER
+from corpus.decode import decode_noop
+from preprocessing.multisentence import (
+    decode_for_split,
+    filter_fairness_graphs,
+    split_decoded_graph,
+)
+
+OPS = ("split", "filter", "score", "summarize", "top_k", "ping")
+# Requests read but not answered yet, over all connections; the reader waits
+# for a free slot, which holds back clients sending faster than we answer.
+DEFAULT_MAX_PENDING = 256
+
+
+# -----------------------------------------------------------
+# 1. Per-block work (runs in pool workers)
+# -----------------------------------------------------------
+def _decode(amr, matcher=None, decode=decode_noop):
+    """(graph, error); graph is also None when `matcher` rules the block out."""
+    if matcher is not None and not matcher.may_occur_in(amr):
+        return None, None
+    try:
+        return decode(amr), None
+    except Exception as e:
+        return None, str(e)
+
+
+def split_item(amr):
+    g, error = _decode(amr, decode=decode_for_split)
+    if g is None:
+        return {"error": error, "sentences": []}
+    return {"error": None, "sentences": [penman.encode(s) for s in split_decoded_graph(g)]}
+
+
+def filter_item(amr):
+    g, error = _decode(amr, FAIRNESS_MENTION, decode_for_split)
+    if g is None:
+        return {"error": error, "sentences": []}
+    graphs = filter_fairness_graphs(split_decoded_graph(g))
+    return {"error": None, "sentences": [penman.encode(s) for s in graphs]}
+
+
+def score_item(amr):
+    g, error = _decode(amr, FAIRNESS_NODE_MATCHER)
+    if g is None:
+        return {"error": error, "score": 0.0, "fairness_nodes": 0}
+    _, score, n_fair, _ = score_graph_index(GraphIndex.from_graph(g), None)
+    return {"error": None, "score": float(score), "fairness_nodes": n_fair}
+
+
+def summarize_chunk(amrs):
+    """Summary counters of a chunk of blocks, in order, plus the failures."""
+    summary = FairnessSummary()
+    errors = 0
+    for amr in amrs:
+        g, error = _decode(amr, FAIRNESS_CONCEPTS)
+        if error is not None:
+            errors += 1
+        elif g is not None:
+            summary.add(GraphIndex.from_graph(g))
+    return summary.to_dict(), errors
+
+
+ITEM_OPS = {"split": split_item, "filter": filter_item, "score": score_item, "top_k": score_item}
+
+
+def run_chunk(op, amrs):
+    if op == "summarize":
+        return summarize_chunk(amrs)
+    fn = ITEM_OPS[op]
+    return [fn(amr) for amr in amrs]
+
+
+def warm_up():
+    """Load everything a first request would, so that it is not slower."""
+    amr = "(m / multi-sentence :snt1 (f / fair-01 :ARG1 (f2 / fairness)))"
+    for op in ("split", "filter", "score", "summarize"):
+        run_chunk(op, [amr])
+
+
+def _init_worker():
+    sys.stdout = sys.stderr  # see main()
+    warm_up()
+
+
+# -----------------------------------------------------------
+# 2. Request dispatch
+# -----------------------------------------------------------
+class RequestError(ValueError):
+    pass
+
+
+class AnalysisServer:
+    """
+    Shared state of a server: the process pool and the open graph caches.
+    With workers=1 requests are handled in the dispatching thread.
+    """
+
+    def __init__(self, workers=1, chunksize=64, max_pending=DEFAULT_MAX_PENDING):
+        self.chunksize = chunksize
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.pool = None
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            # Workers are started on demand; start (and warm) all of them now
+            # rather than during the first burst of requests.
+            for future in [self.pool.submit(os.getpid) for _ in range(workers)]:
+                future.result()
+        self.dispatcher = ThreadPoolExecutor(max_workers=max(4, 2 * workers))
+        self._caches = {}  # amr path -> (stamp, GraphCache, VocabFlags)
+        self._caches_lock = threading.Lock()
+        warm_up()
+
+    def close(self):
+        self.dispatcher.shutdown(wait=True)
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def submit(self, line, respond):
+        """
+        Handle one request line in the background; `respond(dict)` gets the reply.
+        Blocks while `max_pending` requests are in flight.
+        """
+        self._slots.acquire()
+        try:
+            future = self.dispatcher.submit(self._respond, line, respond)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _respond(self, line, respond):
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                raise RequestError(f"invalid JSON: {e}") from None
+            if not isinstance(request, dict):
+                raise RequestError("a request must be a JSON object")
+            request_id = request.get("id")
+            response = {"id": request_id, "ok": True, "result": self.handle(request)}
+        except Exception as e:
+            response = {"id": request_id, "ok": False, "error": str(e)}
+        respond(response)
+
+    def handle(self, request):
+        op = request.get("op")
+        if op not in OPS:
+            raise RequestError(f"unknown op {op!r} (use one of {', '.join(OPS)})")
+        if op == "ping":
+            return "pong"
+
+        sources = [key for key in ("amr", "amrs", "path") if key in request]
+        if len(sources) != 1:
+            raise RequestError('give exactly one of "amr", "amrs" or "path"')
+        if op == "top_k":
+            k = request.get("k", 10)
+            if isinstance(k, bool) or not isinstance(k, int) or k < 1:
+                raise RequestError('"k" must be a positive integer')
+            if "path" in request:
+                cached = self._cache(request["path"])
+                if cached is not None:
+                    return _cached_top_k(*cached, k)
+
+        amrs = self._amrs(request, sources[0])
+        if op == "summarize":
+            summary = FairnessSummary()
+            errors = 0
+            for part, n_errors in self._map(op, amrs):
+                summary.merge(FairnessSummary.from_dict(part))
+                errors += n_errors
+            return {"graphs": len(amrs), "errors": errors, "summary": summary.to_dict()}
+
+        results = [r for chunk in self._map(op, amrs) for r in chunk]
+        if op == "top_k":
+            scored = (
+                (gid, r["score"], r["fairness_nodes"], None) for gid, r in enumerate(results)
+            )
+            return _top_k_rows(select_top_k(scored, k))
+        return results[0] if sources[0] == "amr" else results
+
+    @staticmethod
+    def _amrs(request, source):
+        if source == "path":
+            path = request["path"]
+            if not isinstance(path, str) or not os.path.isfile(path):
+                raise RequestError(f"no such file: {path!r}")
+            return [block.amr for block in iter_amr_blocks(path, errors="ignore")]
+        amrs = [request["amr"]] if source == "amr" else request["amrs"]
+        if not isinstance(amrs, list) or not all(isinstance(a, str) for a in amrs):
+            raise RequestError(f'"{source}" must be a string or a list of strings')
+        return amrs
+
+    def _map(self, op, amrs):
+        """run_chunk results over chunks of amrs, in order."""
+        chunks = list(chunked(amrs, self.chunksize))
+        if self.pool is None:
+            return [run_chunk(op, chunk) for chunk in chunks]
+        futures = [self.pool.submit(run_chunk, op, chunk) for chunk in chunks]
+        return [f.result() for f in futures]
+
+    def _cache(self, amr_path):
+        """Open graph cache of amr_path (and its scoring flags), or None."""
+        meta = cache_path_for(amr_path) / "meta.json"
+        try:
+            stamp = (os.stat(amr_path).st_mtime_ns, os.stat(meta).st_mtime_ns)
+        except OSError:
+            return None
+        with self._caches_lock:
+            entry = self._caches.get(amr_path)
+            if entry is None or entry[0] != stamp:
+                from analysis.batch_centrality import VocabFlags
+
+                cache = load_graph_cache(amr_path)  # checks the source hash once
+                if cache is None:
+                    self._caches.pop(amr_path, None)
+                    return None
+                entry = self._caches[amr_path] = (stamp, cache, VocabFlags(cache.strings))
+        return entry[1], entry[2]
+
+
+def _cached_top_k(cache, flags, k):
+    return _top_k_rows(select_top_k(score_cached_range_batched(cache, 0, len(cache), flags), k))
+
+
+def _top_k_rows(top_graphs):
+    return [
+        {"gid": gid, "score": float(score), "fairness_nodes": n_fair}
+        for gid, score, n_fair, _ in top_graphs
+    ]
+
+
+# -----------------------------------------------------------
+# 3. Transports
+# -----------------------------------------------------------
+def serve_lines(server, lines, respond):
+    """
+    Submit every request line, then wait for the answers still pending. Only
+    unanswered requests are kept, and server.submit bounds their number.
+    """
+    pending = set()
+    lock = threading.Lock()
+
+    def done(future):
+        with lock:
+            pending.discard(future)
+
+    for line in lines:
+        if line.strip():
+            future = server.submit(line, respond)
+            with lock:
+                pending.add(future)
+            future.add_done_callback(done)
+    with lock:
+        remaining = list(pending)
+    for future in remaining:
+        future.result()
+
+
+def serve_stdio(server, stdin, stdout):
+    lock = threading.Lock()
+
+    def respond(response):
+        with lock:
+            stdout.write(json.dumps(response) + "\n")
+            stdout.flush()
+
+    serve_lines(server, stdin, respond)
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        lock = threading.Lock()
+
+        def respond(response):
+            with lock:
+                try:
+                    self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                except OSError:
+                    pass  # client went away
+
+        lines = (line.decode("utf-8") for line in self.rfile)
+        serve_lines(self.server.analysis, lines, respond)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve_unix(server, path):
+    if os.path.exists(path):
+        os.unlink(path)
+    with _UnixServer(path, _ConnectionHandler) as unix_server:
+        unix_server.analysis = server
+        print(f"Listening on {path}", file=sys.stderr)
+        try:
+            unix_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CHAI Fairness Project analysis server")
+    parser.add_argument(
+        "--socket", metavar="PATH", help="Listen on this Unix socket instead of stdin/stdout"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Worker processes (default: 1, in-process)"
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=64, help="Blocks sent to a worker at a time (default: 64)"
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=DEFAULT_MAX_PENDING,
+        help=f"Requests in flight before reading waits (default: {DEFAULT_MAX_PENDING})",
+    )
+    args = parser.parse_args()
+    if args.workers < 1 or args.chunksize < 1 or args.max_pending < 1:
+        parser.error("--workers, --chunksize and --max-pending must be positive")
+
+    # Pipeline code prints diagnostics (decode errors); keep them out of the
+    # response stream.
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    server = AnalysisServer(args.workers, args.chunksize, args.max_pending)
+    try:
+        if args.socket:
+            serve_unix(server, args.socket)
+        else:
+            serve_stdio(server, sys.stdin, stdout)
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
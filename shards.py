@@ -0,0 +1,232 @@
+"""
+Shard/merge workflow for corpora too large for one machine.
+
+    python shards.py shard data/corpus/ shards/ --shards 8
+    # on any node, for any shard (e.g. one job per shard):
+    python shards.py process shards/part-00003-of-00008.amr
+    python shards.py analyze shards/part-00003-of-00008.amr
+    # once every shard is done:
+    python shards.py merge shards/ --sentences clean.amr --dedup
+    python shards.py merge shards/ --report all --k 10
+
+`shard` cuts the input files (a file, a directory of .amr files or a glob
+pattern) into balanced shards on block boundaries, with a `shards.json`
+manifest. `process` and `analyze` each write a partial result next to the
+shard: its fairness sentences, and its summary counters, graph scores and
+top graphs. `merge` checks that every partial is there and up to date, and
+prints the same output as `preprocess.py multisentence` and
+`analyze.py summary|centrality_score|all` run on the whole corpus.
+"""
+
+import argparse
+import sys
+
+from corpus import expand_amr_inputs
+
+
+def fail(message):
+    print(f"Error: {message}")
+    sys.exit(1)
+
+
+def run_shard(args):
+    from corpus.shards import shard_amr_files
+
+    try:
+        inputs = expand_amr_inputs(args.input)
+    except FileNotFoundError as e:
+        fail(e)
+    manifest = shard_amr_files(inputs, args.shard_dir, args.shards)
+    print(
+        f"Wrote {manifest.n_blocks} blocks from {len(inputs)} file(s)"
+        f" to {len(manifest.shards)} shards in {manifest.directory}"
+    )
+    for shard in manifest.shards:
+        print(f"  {shard.path.name}: gids {shard.first_gid}+, {shard.n_blocks} blocks")
+
+
+def run_process(args):
+    from preprocessing.multisentence import process_shard
+
+    for shard_path in args.shard_files:
+        try:
+            process_shard(shard_path, args.workers, args.chunksize, args.stream)
+        except (OSError, ValueError) as e:
+            fail(e)
+
+
+def run_analyze(args):
+    from analysis.partials import analyze_shard
+
+    for shard_path in args.shard_files:
+        try:
+            path = analyze_shard(shard_path, args.k)
+        except (OSError, ValueError) as e:
+            fail(e)
+        print(f"Partial analysis written to {path}")
+
+
+def run_merge(parser, args):
+    from corpus.shards import load_manifest
+
+    if args.sentences is None and args.report is None:
+        parser.error("merge needs --sentences OUTPUT and/or --report NAME")
+    if args.output and args.report != "centrality_score":
+        parser.error("--output is only available with --report centrality_score")
+    if args.output:
+        from analysis.output import output_format
+
+        try:
+            output_format(args.output)
+        except (ValueError, ImportError) as e:
+            parser.error(str(e))
+    try:
+        manifest = load_manifest(args.shard_dir)
+    except (OSError, ValueError) as e:
+        fail(e)
+
+    if args.sentences is not None:
+        from preprocessing.multisentence import merge_sentence_files
+
+        deduplicator = None
+        if args.dedup or args.near_dup is not None:
+            from preprocessing.dedup import Deduplicator
+
+            deduplicator = Deduplicator(
+                args.near_dup, max_entries=args.dedup_max_entries
+            )
+        try:
+            merge_sentence_files(manifest, args.sentences, deduplicator)
+        except ValueError as e:
+            fail(e)
+
+    if args.report is not None:
+        from analysis.partials import merge_analysis
+
+        try:
+            df = merge_analysis(manifest, args.report, args.k, output=args.output)
+        except ValueError as e:
+            fail(e)
+        if df is not None:
+            print(df)
+
+
+def jaccard(text):
+    """argparse type of --near-dup: a Jaccard similarity in (0, 1]."""
+    try:
+        value = float(text)
+    except ValueError:
+        value = -1.0
+    if not 0 < value <= 1:
+        raise argparse.ArgumentTypeError("expected a Jaccard similarity in (0, 1]")
+    return value
+
+
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {text!r}")
+    return value
+
+
+def main():
+    from analysis.partials import DEFAULT_PARTIAL_K, REPORTS
+
+    parser = argparse.ArgumentParser(
+        description="CHAI Fairness Project shard/merge tool"
+    )
+    subparsers = parser.add_subparsers(dest="command", help="Available commands")
+
+    parser_shard = subparsers.add_parser(
+        "shard", help="Split AMR files into balanced shards on block boundaries"
+    )
+    parser_shard.add_argument("input", help="AMR file, directory of .amr files or glob")
+    parser_shard.add_argument("shard_dir", help="Directory for the shards and manifest")
+    parser_shard.add_argument(
+        "--shards", type=positive_int, required=True, help="Number of shards"
+    )
+
+    parser_process = subparsers.add_parser(
+        "process", help="Split and filter shards (writes <shard>.sentences.amr)"
+    )
+    parser_process.add_argument("shard_files", nargs="+", help="Shard files")
+    parser_process.add_argument(
+        "--workers", type=positive_int, default=1, help="Worker processes (default: 1)"
+    )
+    parser_process.add_argument(
+        "--chunksize",
+        type=positive_int,
+        default=64,
+        help="Blocks sent to a worker at a time (default: 64)",
+    )
+    parser_process.add_argument(
+        "--stream", action="store_true", help="Overlap reading, processing and writing"
+    )
+
+    parser_analyze = subparsers.add_parser(
+        "analyze", help="Summary and scores of shards (writes <shard>.analysis.json)"
+    )
+    parser_analyze.add_argument("shard_files", nargs="+", help="Shard files")
+    parser_analyze.add_argument(
+        "--k",
+        type=positive_int,
+        default=DEFAULT_PARTIAL_K,
+        help="Top graphs kept per shard, the largest --k a merge can show "
+        f"(default: {DEFAULT_PARTIAL_K})",
+    )
+
+    parser_merge = subparsers.add_parser(
+        "merge", help="Combine the partial results of every shard"
+    )
+    parser_merge.add_argument("shard_dir", help="Directory written by `shard`")
+    parser_merge.add_argument(
+        "--sentences",
+        metavar="OUTPUT",
+        help="Write the fairness sentences of the whole corpus to OUTPUT",
+    )
+    parser_merge.add_argument(
+        "--dedup", action="store_true", help="Drop duplicate sentences across shards"
+    )
+    parser_merge.add_argument(
+        "--near-dup",
+        type=jaccard,
+        metavar="J",
+        help="Also drop near duplicates at Jaccard similarity >= J",
+    )
+    parser_merge.add_argument(
+        "--dedup-max-entries",
+        type=positive_int,
+        default=1_000_000,
+        help="Fingerprints kept for dedup (default: 1000000)",
+    )
+    parser_merge.add_argument(
+        "--report", choices=REPORTS, help="Print this analysis of the whole corpus"
+    )
+    parser_merge.add_argument(
+        "--k", type=positive_int, default=10, help="Number of top results (default: 10)"
+    )
+    parser_merge.add_argument(
+        "--output",
+        help="With --report centrality_score, also write the score of every graph "
+        "to this .csv, .parquet or .arrow file",
+    )
+
+    args = parser.parse_args()
+    if args.command == "shard":
+        run_shard(args)
+    elif args.command == "process":
+        run_process(args)
+    elif args.command == "analyze":
+        run_analyze(args)
+    elif args.command == "merge":
+        run_merge(parser, args)
+    else:
+        parser.print_help()
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()